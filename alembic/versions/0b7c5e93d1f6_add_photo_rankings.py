@@ -0,0 +1,41 @@
+"""Add photo rankings and rating timestamps
+
+Revision ID: 0b7c5e93d1f6
+Revises: e6f1d2a4b9c0
+Create Date: 2026-10-18 16:20:47.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7c5e93d1f6'
+down_revision: Union[str, None] = 'e6f1d2a4b9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ratings', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_ratings_created_at'), 'ratings', ['created_at'], unique=False)
+    op.create_table(
+        'photo_rankings',
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('photo_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('kind', 'rank')
+    )
+    op.create_index(op.f('ix_photo_rankings_photo_id'), 'photo_rankings', ['photo_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_photo_rankings_photo_id'), table_name='photo_rankings')
+    op.drop_table('photo_rankings')
+    op.drop_index(op.f('ix_ratings_created_at'), table_name='ratings')
+    op.drop_column('ratings', 'created_at')
@@ -0,0 +1,33 @@
+"""Add created_at to photos
+
+Revision ID: 0c3e5a7b9d21
+Revises: b8e4a0d3c5f7
+Create Date: 2026-10-18 20:58:42.613094
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c3e5a7b9d21'
+down_revision: Union[str, None] = 'b8e4a0d3c5f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('created_at', sa.DateTime(), nullable=True))
+    # Existing photos get the migration time, so the ones stuck processing are failed after UPLOAD_STALE_MINUTES.
+    photos = sa.table('photos', sa.column('created_at', sa.DateTime()))
+    op.execute(photos.update().values(created_at=datetime.utcnow()))
+    op.create_index('ix_photos_processing_created_at', 'photos', ['created_at'], unique=False,
+                    postgresql_where=sa.text("status = 'processing'"), sqlite_where=sa.text("status = 'processing'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_processing_created_at', table_name='photos')
+    op.drop_column('photos', 'created_at')
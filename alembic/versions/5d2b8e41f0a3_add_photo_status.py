@@ -0,0 +1,26 @@
+"""Add photo status
+
+Revision ID: 5d2b8e41f0a3
+Revises: c4f08e6d2a17
+Create Date: 2026-10-18 14:26:13.780251
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e41f0a3'
+down_revision: Union[str, None] = 'c4f08e6d2a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('status', sa.String(length=16), nullable=False, server_default='ready'))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'status')
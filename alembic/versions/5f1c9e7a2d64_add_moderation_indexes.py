@@ -0,0 +1,36 @@
+"""Add moderation view indexes
+
+Revision ID: 5f1c9e7a2d64
+Revises: d3f8a61c0e27
+Create Date: 2026-10-18 20:05:41.219874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1c9e7a2d64'
+down_revision: Union[str, None] = 'd3f8a61c0e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_comments_user_id_id', 'comments', ['user_id', 'id'], unique=False)
+    op.create_index('ix_comments_photo_id_id', 'comments', ['photo_id', 'id'], unique=False)
+    op.create_index(op.f('ix_comments_created_at'), 'comments', ['created_at'], unique=False)
+    op.create_index('ix_ratings_user_id_id', 'ratings', ['user_id', 'id'], unique=False)
+    op.create_index('ix_ratings_photo_id_id', 'ratings', ['photo_id', 'id'], unique=False)
+    op.create_index('ix_photos_user_id_id', 'photos', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_user_id_id', table_name='photos')
+    op.drop_index('ix_ratings_photo_id_id', table_name='ratings')
+    op.drop_index('ix_ratings_user_id_id', table_name='ratings')
+    op.drop_index(op.f('ix_comments_created_at'), table_name='comments')
+    op.drop_index('ix_comments_photo_id_id', table_name='comments')
+    op.drop_index('ix_comments_user_id_id', table_name='comments')
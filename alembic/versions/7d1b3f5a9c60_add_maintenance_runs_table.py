@@ -0,0 +1,30 @@
+"""Add maintenance_runs table
+
+Revision ID: 7d1b3f5a9c60
+Revises: 0c3e5a7b9d21
+Create Date: 2026-10-18 21:36:14.208517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1b3f5a9c60'
+down_revision: Union[str, None] = '0c3e5a7b9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('maintenance_runs',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('maintenance_runs')
@@ -0,0 +1,42 @@
+"""Add derived assets and photo original url
+
+Revision ID: 8e3a9c1b7d42
+Revises: 5d2b8e41f0a3
+Create Date: 2026-10-18 15:02:41.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3a9c1b7d42'
+down_revision: Union[str, None] = '5d2b8e41f0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('original_url', sa.String(), nullable=True))
+    op.execute("UPDATE photos SET original_url = url")
+    op.create_table(
+        'derived_assets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('photo_id', sa.Integer(), nullable=False),
+        sa.Column('public_id', sa.String(), nullable=False),
+        sa.Column('spec', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key')
+    )
+    op.create_index(op.f('ix_derived_assets_photo_id'), 'derived_assets', ['photo_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_derived_assets_photo_id'), table_name='derived_assets')
+    op.drop_table('derived_assets')
+    op.drop_column('photos', 'original_url')
@@ -0,0 +1,31 @@
+"""Add tag browse and autocomplete indexes
+
+Revision ID: 9a4d6c2e7b15
+Revises: 0b7c5e93d1f6
+Create Date: 2026-10-18 19:55:12.608341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d6c2e7b15'
+down_revision: Union[str, None] = '0b7c5e93d1f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_photo_m2m_tag_tag_photo', 'photo_m2m_tag', ['tag', 'photo'], unique=False)
+    op.create_index('ix_photo_m2m_tag_photo_tag', 'photo_m2m_tag', ['photo', 'tag'], unique=False)
+    op.create_index('ix_tags_name_pattern', 'tags', ['name'], unique=False,
+                    postgresql_ops={'name': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tags_name_pattern', table_name='tags')
+    op.drop_index('ix_photo_m2m_tag_photo_tag', table_name='photo_m2m_tag')
+    op.drop_index('ix_photo_m2m_tag_tag_photo', table_name='photo_m2m_tag')
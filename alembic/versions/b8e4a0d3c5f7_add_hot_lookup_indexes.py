@@ -0,0 +1,47 @@
+"""Add hot lookup indexes and make ratings unique per photo and user
+
+Revision ID: b8e4a0d3c5f7
+Revises: 5f1c9e7a2d64
+Create Date: 2026-10-18 20:24:09.731562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4a0d3c5f7'
+down_revision: Union[str, None] = '5f1c9e7a2d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the first rating of a user on a photo, then fix the aggregates of the photos that had duplicates.
+    op.execute(
+        "DELETE FROM ratings WHERE EXISTS ("
+        "SELECT 1 FROM ratings AS older WHERE older.photo_id = ratings.photo_id "
+        "AND older.user_id = ratings.user_id AND older.id < ratings.id)"
+    )
+    op.execute(
+        "UPDATE photos SET "
+        "rating_count = (SELECT count(*) FROM ratings WHERE ratings.photo_id = photos.id), "
+        "rating_sum = (SELECT coalesce(sum(ratings.rating), 0) FROM ratings WHERE ratings.photo_id = photos.id) "
+        "WHERE rating_count != (SELECT count(*) FROM ratings WHERE ratings.photo_id = photos.id)"
+    )
+    op.drop_index('ix_ratings_rating', table_name='ratings')
+    op.create_index('ix_ratings_photo_id_user_id', 'ratings', ['photo_id', 'user_id'], unique=True)
+    op.create_index('ix_tokens_user_id_expires_at', 'tokens', ['user_id', 'expires_at'], unique=False)
+    op.create_index(op.f('ix_tokens_expires_at'), 'tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_blacklisted_tokens_blacklisted_on'), 'blacklisted_tokens', ['blacklisted_on'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blacklisted_tokens_blacklisted_on'), table_name='blacklisted_tokens')
+    op.drop_index(op.f('ix_tokens_expires_at'), table_name='tokens')
+    op.drop_index('ix_tokens_user_id_expires_at', table_name='tokens')
+    op.drop_index('ix_ratings_photo_id_user_id', table_name='ratings')
+    op.create_index('ix_ratings_rating', 'ratings', ['rating'], unique=False)
@@ -0,0 +1,28 @@
+"""Add jti to tokens
+
+Revision ID: c4f08e6d2a17
+Revises: a71c5d0e9b28
+Create Date: 2026-10-18 13:02:55.104387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f08e6d2a17'
+down_revision: Union[str, None] = 'a71c5d0e9b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tokens', sa.Column('jti', sa.String(length=32), nullable=True))
+    op.create_unique_constraint('tokens_jti_key', 'tokens', ['jti'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('tokens_jti_key', 'tokens', type_='unique')
+    op.drop_column('tokens', 'jti')
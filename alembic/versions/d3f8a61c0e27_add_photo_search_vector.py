@@ -0,0 +1,43 @@
+"""Add photo search vector
+
+Revision ID: d3f8a61c0e27
+Revises: 9a4d6c2e7b15
+Create Date: 2026-10-18 20:14:31.772905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a61c0e27'
+down_revision: Union[str, None] = '9a4d6c2e7b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    # Same document as app.src.util.crud.search.search_vector_expression, with the default language.
+    op.execute(
+        """
+        UPDATE photos SET search_vector =
+            setweight(to_tsvector('english', coalesce(photos.description, '')), 'A')
+            || setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(tags.name, ' ') FROM tags
+                JOIN photo_m2m_tag ON photo_m2m_tag.tag = tags.id
+                WHERE photo_m2m_tag.photo = photos.id), '')), 'B')
+            || setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(comments.content, ' ') FROM comments
+                WHERE comments.photo_id = photos.id), '')), 'C')
+        """
+    )
+    op.create_index('ix_photos_search_vector', 'photos', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_search_vector', table_name='photos', postgresql_using='gin')
+    op.drop_column('photos', 'search_vector')
@@ -0,0 +1,40 @@
+"""Add photo rating aggregates
+
+Revision ID: e6f1d2a4b9c0
+Revises: 8e3a9c1b7d42
+Create Date: 2026-10-18 15:41:09.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f1d2a4b9c0'
+down_revision: Union[str, None] = '8e3a9c1b7d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('photos', sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE photos
+        SET rating_count = agg.rating_count, rating_sum = agg.rating_sum
+        FROM (
+            SELECT photo_id, COUNT(id) AS rating_count, COALESCE(SUM(rating), 0) AS rating_sum
+            FROM ratings
+            GROUP BY photo_id
+        ) AS agg
+        WHERE photos.id = agg.photo_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'rating_sum')
+    op.drop_column('photos', 'rating_count')
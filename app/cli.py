@@ -0,0 +1,95 @@
+"""
+Operational commands, run from the repository root:
+
+    python -m app.cli init-db               creates the tables of an empty database and stamps it with the Alembic
+                                            head revision, the Alembic chain cannot build them from nothing
+    python -m app.cli check-schema          exits with 1 unless the database is at the Alembic head revision
+    python -m app.cli prewarm               runs the startup steps once, reports their timings against
+                                            STARTUP_TIME_BUDGET_SECONDS and exits with 1 if over budget
+    python -m app.cli serve --workers 4     serves the application. Every worker checks the schema and
+                                            pre-warms its pool and templates before accepting traffic
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+STARTED_AT = time.perf_counter()
+
+from app.src.config.config import settings
+from app.src.services import startup
+from app.src.util.db import async_engine
+
+
+async def _init_db() -> int:
+    try:
+        revision = await startup.bootstrap_schema(async_engine)
+    finally:
+        await async_engine.dispose()
+    if revision is None:
+        print("Database is not empty, run `alembic upgrade head` to migrate it", file=sys.stderr)
+        return 1
+    print(f"Database schema created at head revision {revision}")
+    return 0
+
+
+async def _check_schema() -> int:
+    try:
+        revision = await startup.verify_schema_revision(async_engine)
+    except startup.SchemaRevisionError as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+    print(f"Database schema at head revision {revision}")
+    return 0
+
+
+async def _prewarm(schema_check: str, connections: int) -> int:
+    try:
+        timings = await startup.prepare(async_engine, schema_check=schema_check, prewarm_connections=connections,
+                                        started_at=STARTED_AT)
+    except startup.SchemaRevisionError as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+    for step, duration in timings.items():
+        print(f"{step:<10}{duration * 1000:>10.1f} ms")
+    over_budget = timings["total"] > settings.STARTUP_TIME_BUDGET_SECONDS
+    print(f"budget    {settings.STARTUP_TIME_BUDGET_SECONDS * 1000:>10.1f} ms{' EXCEEDED' if over_budget else ''}")
+    return 1 if over_budget else 0
+
+
+def _serve(host: str, port: int, workers: int) -> int:
+    import uvicorn
+    uvicorn.run("app.main:app", host=host, port=port, workers=workers)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init-db", help="create the schema of an empty database at the Alembic head revision")
+    commands.add_parser("check-schema", help="check that the database is at the Alembic head revision")
+    prewarm = commands.add_parser("prewarm", help="run and time the startup steps")
+    prewarm.add_argument("--schema-check", choices=("verify", "create_all", "off"), default=settings.SCHEMA_CHECK)
+    prewarm.add_argument("--connections", type=int, default=settings.STARTUP_PREWARM_CONNECTIONS)
+    serve = commands.add_parser("serve", help="serve the application with uvicorn")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        return asyncio.run(_init_db())
+    if args.command == "check-schema":
+        return asyncio.run(_check_schema())
+    if args.command == "prewarm":
+        return asyncio.run(_prewarm(args.schema_check, args.connections))
+    return _serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,52 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 import asyncio
 import sys
+from datetime import datetime
 import os
 import uvicorn
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import event, select
-from sqlalchemy.exc import DisconnectionError
-from app.src.util.db import async_engine, init_db
+from app.src.util.db import async_engine
 
+from app.src.config.config import settings
 from app.src.config.fastapi_config import app
 from app.src.util.crud.token import remove_expired_tokens, remove_blacklisted_tokens
+from app.src.util.crud.rating import reconcile_rating_aggregates
+from app.src.util.crud.user import reconcile_photo_counts
+from app.src.util.crud.ranking import refresh_photo_rankings
+from app.src.util.crud.photo import fail_stale_uploads
+from app.src.services.upload_pipeline import upload_pipeline
+from app.src.services.transform_engine import transform_engine
+from app.src.services import startup
+from app.src.services.db_pool import pool_manager
+from app.src.services.maintenance import maintenance
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/..')
 
 
-scheduler = AsyncIOScheduler()
-
-scheduler.add_job(remove_expired_tokens, 'interval', minutes=30)
-scheduler.add_job(remove_blacklisted_tokens, 'interval', minutes=30)
-
-scheduler.start()
+# Every worker schedules the jobs, each run is done by the worker holding the job's advisory lock.
+maintenance.add_job(remove_expired_tokens, minutes=30)
+maintenance.add_job(remove_blacklisted_tokens, minutes=30)
+maintenance.add_job(reconcile_rating_aggregates, hours=6)
+maintenance.add_job(reconcile_photo_counts, hours=6)
+maintenance.add_job(fail_stale_uploads, minutes=15)
+maintenance.add_job(refresh_photo_rankings, minutes=settings.RANKING_REFRESH_MINUTES, next_run_time=datetime.now())
 
 
 @app.on_event("startup")
 async def on_startup():
-    await init_db()
+    app.state.startup_timings = await startup.prepare(async_engine, started_at=STARTED_AT)
+    pool_manager.start()
+    maintenance.start()
 
 
-@event.listens_for(async_engine.sync_engine, "connect")
-async def test_connection(connection, branch):
-    if branch:
-        return
-    try:
-        await connection.scalar(select(1))
-    except DisconnectionError:
-        await connection.scalar(select(1))
+@app.on_event("shutdown")
+async def on_shutdown():
+    maintenance.shutdown()
+    await pool_manager.stop()
+    await upload_pipeline.drain()
+    transform_engine.shutdown()
 
 
 # Run the application
@@ -1,5 +1,6 @@
 import os
 from enum import Enum
+from typing import Dict, Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from fastapi.templating import Jinja2Templates
@@ -24,6 +25,8 @@ class FrontEndpoints(Enum):
     ADMIN_DELETE_PHOTO = "/admin/delete-photo"
     ADMIN_RATINGS = "/admin/ratings"
     ADMIN_COMMENTS = "/admin/comments"
+    ADMIN_RATINGS_EXPORT = "/admin/ratings/export.csv"
+    ADMIN_COMMENTS_EXPORT = "/admin/comments/export.csv"
 
 
 url_to_endpoint = {
@@ -45,23 +48,87 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = os.getenv("ENVIRONMENT")
 
     MAX_TAGS: int = 5
+    TAG_CACHE_SIZE: int = 10000
+    TAG_AUTOCOMPLETE_LIMIT: int = 10
+    SEARCH_LANGUAGE: str = 'english'
+    SEARCH_MAX_RESULTS: int = 1000
+    FEED_PAGE_SIZE: int = 12
+    FEED_MAX_PAGE_SIZE: int = 50
+    ADMIN_PAGE_SIZE: int = 50
+    ADMIN_EXPORT_BATCH_SIZE: int = 1000
+    RANKING_SIZE: int = 500
+    RANKING_REFRESH_MINUTES: int = 10
+    RANKING_PRIOR_WEIGHT: float = 5.0
+    RANKING_TRENDING_WINDOW_DAYS: int = 7
+    RANKING_TRENDING_HALF_LIFE_HOURS: float = 24.0
+    RANKING_COMMENT_WEIGHT: float = 1.0
     USERNAME_LENGTH: int = 8
 
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your_secret_key")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 4320
+    PERSIST_ACCESS_TOKENS: bool = False
+
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    REVOCATION_REFRESH_SECONDS: int = 5
+    REVOCATION_REDIS_URL: Optional[str] = os.getenv("REVOCATION_REDIS_URL")
 
     DATABASE_USER: str = os.getenv("DATABASE_USER")
     DATABASE_PASSWORD: str = os.getenv("DATABASE_PASSWORD")
     DATABASE_DOMAIN: str = os.getenv("DATABASE_DOMAIN")
     DATABASE_DB_NAME: str = os.getenv("DATABASE_DB_NAME")
+    DATABASE_ECHO: bool = os.getenv("DATABASE_ECHO", "False").lower() == "true"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_HEALTH_CHECK_SECONDS: float = 30
+    SLOW_QUERY_MS: Optional[float] = 200
+    QUERY_BUDGET: Optional[int] = 25
+    QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "False").lower() == "true"
+    SERVER_TIMING: bool = True
+    SCHEMA_CHECK: str = os.getenv("SCHEMA_CHECK", "verify")
+    STARTUP_TIME_BUDGET_SECONDS: float = 5.0
+    STARTUP_PREWARM_CONNECTIONS: int = 5
+    STARTUP_PREWARM_TEMPLATES: bool = True
+    MAINTENANCE_JITTER_SECONDS: int = 60
+    MAINTENANCE_BATCH_SIZE: int = 1000
+    TOKEN_PURGE_BATCH_SIZE: int = 5000
+    TOKEN_PURGE_TIME_BUDGET_SECONDS: Optional[float] = 60
 
     CLOUDINARY_CLOUD_NAME: str = os.getenv("CLOUDINARY_CLOUD_NAME")
     CLOUDINARY_API_KEY: str = os.getenv("CLOUDINARY_API_KEY")
     CLOUDINARY_API_SECRET: str = os.getenv("CLOUDINARY_API_SECRET")
     CLOUDINARY_API_URL: str = os.getenv("CLOUDINARY_API_URL")
 
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "cloudinary")
+    LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", os.path.join(os.path.dirname(__file__), '..', 'media'))
+    LOCAL_STORAGE_URL: str = "/media"
+
+    TRANSFORM_WORKERS: int = 2
+    TRANSFORM_MAX_DIMENSION: int = 4000
+    DERIVED_CACHE_DIR: str = os.getenv("DERIVED_CACHE_DIR", os.path.join(os.path.dirname(__file__), '..', 'cache'))
+    DERIVED_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    QR_CACHE_SIZE: int = 512
+    QR_CACHE_DIR: str = os.getenv("QR_CACHE_DIR", os.path.join(os.path.dirname(__file__), '..', 'cache', 'qr'))
+    PUBLIC_BASE_URL: Optional[str] = os.getenv("PUBLIC_BASE_URL")
+
+    UPLOAD_WORKERS: int = 4
+    UPLOAD_MAX_PENDING: int = 16
+    UPLOAD_STALE_MINUTES: int = 30
+
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_SAMPLE_RATE: float = 0.1
+    # Per-function sampling rates of log_function, keyed by "<module>.<qualname>",
+    # e.g. {"app.src.util.crud.user.get_user": 0.01}.
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_MAX_REPR_LENGTH: int = 200
+
     model_config = SettingsConfigDict(env_file=os.path.join(os.path.dirname(__file__), '.env'))
 
 
@@ -41,18 +41,22 @@ def role_required(allowed_roles: List[UserRole]):
     return role_checker
 
 
+def _is_owner_or_admin(owner_id: int, user: User) -> bool:
+    return owner_id == user.id or user.role == UserRole.ADMIN
+
+
 class Dependency(ABC):
     """
     Abstract base class for dependency checks.
 
     This class defines the abstract method is_owner_or_admin, which needs to be implemented
     by any class inheriting from it. The method is used to check if a user is the owner of
-    a resource or an admin.
+    a resource or an admin, and returns the resource so that the route does not load it again.
     """
 
     @staticmethod
     @abstractmethod
-    async def is_owner_or_admin(resource_id: int, user_id: int, db: AsyncSession):
+    async def is_owner_or_admin(resource_id: int, user: User, db: AsyncSession):
         """
         Checks if the user is the owner of the resource or an admin.
 
@@ -61,11 +65,14 @@ class Dependency(ABC):
 
         Args:
             resource_id (int): The ID of the resource to check.
-            user_id (int): The ID of the user to check.
+            user (User): The current user, as resolved by get_current_user.
             db (AsyncSession): The database session.
 
+        Returns:
+            The loaded resource.
+
         Raises:
-            HTTPException: If the user is not the owner or an admin.
+            HTTPException: If the resource is not found or the user is not the owner or an admin.
         """
         pass
 
@@ -79,26 +86,28 @@ class PhotoDependency(Dependency):
     """
 
     @staticmethod
-    async def is_owner_or_admin(photo_id: int, user_id: int, db: AsyncSession):
+    async def is_owner_or_admin(photo_id: int, user: User, db: AsyncSession) -> Photo:
         """
         Checks if the user is the owner of the photo or an admin.
 
         Args:
             photo_id (int): The ID of the photo to check.
-            user_id (int): The ID of the user to check.
+            user (User): The current user, as resolved by get_current_user.
             db (AsyncSession): The database session.
 
+        Returns:
+            Photo: The photo.
+
         Raises:
             HTTPException: If the photo is not found or the user is not the owner or an admin.
         """
         result = await db.execute(select(Photo).where(Photo.id == photo_id))
         photo = result.scalars().first()
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
         if not photo:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
-        if not (photo.user_id == user_id or user.role == UserRole.ADMIN):
+        if not _is_owner_or_admin(photo.user_id, user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+        return photo
 
 
 class CommentDependency(Dependency):
@@ -110,32 +119,37 @@ class CommentDependency(Dependency):
     """
 
     @staticmethod
-    async def is_owner_or_admin(comment_id: int, user_id: int, db: AsyncSession):
+    async def is_owner_or_admin(comment_id: int, user: User, db: AsyncSession) -> Comment:
         """
         Checks if the user is the owner of the comment or an admin.
 
         Args:
             comment_id (int): The ID of the comment to check.
-            user_id (int): The ID of the user to check.
+            user (User): The current user, as resolved by get_current_user.
             db (AsyncSession): The database session.
 
+        Returns:
+            Comment: The comment.
+
         Raises:
             HTTPException: If the comment is not found or the user is not the owner or an admin.
         """
         result = await db.execute(select(Comment).where(Comment.id == comment_id))
         comment = result.scalars().first()
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
         if not comment:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
-        if not (comment.user_id == user_id or user.role == UserRole.ADMIN):
+        if not _is_owner_or_admin(comment.user_id, user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+        return comment
 
 
 def owner_or_admin_dependency(dependency_class: Type[Dependency], resource_id_name: str) -> Callable:
     """
     Creates a dependency function to check if the user is the owner of a resource or an admin.
 
+    The current user is the one already resolved by get_current_user, and the resource is loaded once, in the
+    request's session. The resource is returned, so that the route can use it instead of fetching it again.
+
     Args:
         dependency_class (Type[Dependency]): The dependency class to use for the check.
         resource_id_name (str): The name of the resource ID parameter in the route.
@@ -157,9 +171,12 @@ def owner_or_admin_dependency(dependency_class: Type[Dependency], resource_id_na
             current_user (User): The current authenticated user, injected via dependency.
             db (AsyncSession): The asynchronous database session, injected via dependency.
 
+        Returns:
+            The loaded resource.
+
         Raises:
-            HTTPException: If the user is not the owner or an admin.
+            HTTPException: If the resource is not found or the user is not the owner or an admin.
         """
-        await dependency_class.is_owner_or_admin(resource_id, current_user.id, db)
+        return await dependency_class.is_owner_or_admin(resource_id, current_user, db)
 
     return dependency_check
@@ -1,10 +1,14 @@
 import os
+import time
 
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.exceptions import RequestValidationError
 from starlette.responses import FileResponse, RedirectResponse
 from starlette.staticfiles import StaticFiles
 from app.src.config.config import settings
+from app.src.services.query_stats import query_stats
+from app.src.services.request_metrics import request_metrics
+from app.src.services.storage import storage, LocalStorage
 from app.src.config.exceptions import custom_http_exception_handler, global_exception_handler, \
     validation_exception_handler, \
     custom_404_handler
@@ -33,6 +37,38 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+@app.middleware("http")
+async def track_route_queries(request: Request, call_next):
+    """
+    Attributes the SQL statements issued while serving a request to its route and holds the request to the query
+    budget, see QueryStats.
+
+    Also records the request in the /metrics histograms and reports the database time, the number of statements
+    and the total time in a Server-Timing header, which browsers show in the network panel.
+    """
+    started = time.perf_counter()
+    status_code = 500
+    with query_stats.track_request(budget=settings.QUERY_BUDGET, strict=settings.QUERY_BUDGET_STRICT) as queries:
+        queries.route = f"{request.method} {request.url.path}"
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            route = request.scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            queries.route = f"{request.method} {route_path}"
+            total_ms = (time.perf_counter() - started) * 1000
+            request_metrics.observe(request.method, route_path, status_code, total_ms / 1000,
+                                    queries.total_ms / 1000, queries.count)
+
+    if settings.SERVER_TIMING:
+        response.headers["Server-Timing"] = (
+            f'db;dur={queries.total_ms:.1f};desc="{queries.count} queries", '
+            f'app;dur={max(0.0, total_ms - queries.total_ms):.1f}, total;dur={total_ms:.1f}'
+        )
+    return response
+
+
 # Include API routers
 app.include_router(root.router, prefix="", tags=["root"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -53,6 +89,9 @@ app.add_exception_handler(HTTPException, custom_http_exception_handler)
 static_directory = os.path.join(os.path.dirname(__file__), '..', 'static')
 app.mount("/static", StaticFiles(directory=static_directory), name="static")
 
+if isinstance(storage, LocalStorage):
+    app.mount(settings.LOCAL_STORAGE_URL, StaticFiles(directory=storage.root_dir), name="media")
+
 
 @app.get("/favicon.ico")
 async def favicon():
@@ -1,6 +1,7 @@
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict
+from uuid import uuid4
 from app.src.util.models import user as model_user, token as model_token
 from datetime import datetime, timedelta
 from app.src.config.config import settings
@@ -14,28 +15,28 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 async def create_access_token(
         data: Dict[str, str],
         user_id: int,
-        db: AsyncSession,
+        db: Optional[AsyncSession] = None,
         expires_delta: Optional[timedelta] = None
 ) -> str:
     """
-    Creates a new access token, stores it in the database, and returns the encoded JWT.
+    Creates a new access token and returns the encoded JWT.
+
+    Access tokens are stateless: they are verified by signature and expiry alone and revoked by their jti claim,
+    so nothing is written to the database unless settings.PERSIST_ACCESS_TOKENS is enabled.
 
     Args:
         data (Dict[str, str]): A dictionary containing the claims to encode in the JWT.
         user_id (int): The ID of the user for whom the token is being created.
-        db (AsyncSession): The asynchronous database session used to store the token.
+        db (Optional[AsyncSession]): The asynchronous database session, only used when access tokens are persisted.
         expires_delta (Optional[timedelta]): Optional expiration time for the token.
             If not provided, the default expiration time from settings is used.
 
     Returns:
         str: The encoded JWT access token.
 
-    Raises:
-        HTTPException: If there is an issue storing the token in the database.
-
     Example:
         token_data = {"sub": "user@example.com"}
-        token = await create_access_token(token_data, user_id=123, db=session)
+        token = await create_access_token(token_data, user_id=123)
     """
 
     to_encode = data.copy()
@@ -44,17 +45,19 @@ async def create_access_token(
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    jti = uuid4().hex
+    to_encode.update({"exp": expire, "jti": jti})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-    token = model_token.Token(
-        token=encoded_jwt,
-        user_id=user_id,
-        expires_at=expire
-    )
-    db.add(token)
-    await db.commit()
-    await db.refresh(token)
+    if settings.PERSIST_ACCESS_TOKENS and db is not None:
+        token = model_token.Token(
+            token=encoded_jwt,
+            jti=jti,
+            user_id=user_id,
+            expires_at=expire
+        )
+        db.add(token)
+        await db.commit()
 
     return encoded_jwt
 
@@ -68,6 +71,8 @@ async def create_refresh_token(
     """
     Creates a new refresh token, stores it in the database, and returns the encoded JWT.
 
+    The token carries a jti claim, so it can be revoked by jti like access tokens.
+
     Args:
         data (Dict[str, str]): A dictionary containing the claims to encode in the JWT.
         user_id (int): The ID of the user for whom the refresh token is being created.
@@ -91,15 +96,16 @@ async def create_refresh_token(
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    jti = uuid4().hex
+    to_encode.update({"exp": expire, "jti": jti})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     token = model_token.Token(
         token=encoded_jwt,
+        jti=jti,
         user_id=user_id,
         expires_at=expire
     )
     db.add(token)
     await db.commit()
-    await db.refresh(token)
     return encoded_jwt
@@ -1,10 +1,17 @@
 import asyncio
+import atexit
 import functools
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import reprlib
+import time
 from datetime import datetime
-from contextlib import redirect_stdout
-import io
+from typing import Callable, List, Optional
+
+from app.src.config.config import settings
 
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs')
 os.makedirs(log_dir, exist_ok=True)
@@ -12,75 +19,172 @@ os.makedirs(log_dir, exist_ok=True)
 current_date = datetime.now().strftime('%Y-%m-%d')
 log_filename = os.path.join(log_dir, f'{current_date}.log')
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
 logger = logging.getLogger(__name__)
 
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(handlers: Optional[List[logging.Handler]] = None,
+                      level: str = settings.LOG_LEVEL) -> logging.handlers.QueueListener:
+    """
+    Routes every log record through a QueueHandler, so that logging never blocks the caller on I/O.
+
+    The root logger only puts records on an in-memory queue, a QueueListener thread takes them off and runs the
+    actual handlers. Calling it again replaces the previous configuration.
+
+    Args:
+        handlers (Optional[List[logging.Handler]]): The handlers to run on the listener thread.
+            Defaults to the daily log file and stderr.
+        level (str): The level of the root logger.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener.
+    """
+    global _listener
+    stop_logging()
+    if handlers is None:
+        handlers = [logging.FileHandler(log_filename), logging.StreamHandler()]
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flushes the queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+configure_logging()
+atexit.register(stop_logging)
+
+
+_repr = reprlib.Repr()
+_repr.maxstring = settings.LOG_MAX_REPR_LENGTH
+_repr.maxother = settings.LOG_MAX_REPR_LENGTH
+_repr.maxlist = _repr.maxtuple = _repr.maxset = _repr.maxdict = 5
+_repr.maxlevel = 2
 
-def log_function(func):
+
+class _LazyCall:
+    """Formats the arguments of a call only if a handler actually emits the record."""
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        parts = [_repr.repr(arg) for arg in self.args]
+        parts += [f"{key}={_repr.repr(value)}" for key, value in self.kwargs.items()]
+        return ", ".join(parts)
+
+
+class _LazyRepr:
+    """Size-capped repr computed only when the record is formatted."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return _repr.repr(self.value)
+
+
+def log_function(func: Callable = None, *, sample_rate: Optional[float] = None):
     """
-    Decorator that logs the call and return value of the decorated function.
-    Also logs any exceptions raised by the function and captures print statements.
+    Decorator that logs the calls, return values and durations of the decorated function.
+
+    Only a sample of the calls is logged, exceptions are always logged. Arguments and return values are formatted
+    lazily with size-capped reprs, so an unsampled call costs one random draw, and a sampled one never walks a
+    whole session or photo list.
+
+    Can be used bare (``@log_function``) or with a sampling rate (``@log_function(sample_rate=0.01)``).
+    The rate is taken, in order, from settings.LOG_SAMPLE_RATES keyed by ``f"{func.__module__}.{func.__qualname__}"``
+    (e.g. "app.src.routes.user.get_user", so a route and a CRUD function of the same name are told apart), the
+    ``sample_rate`` argument, and settings.LOG_SAMPLE_RATE.
 
     Args:
         func (Callable): The function to be decorated.
+        sample_rate (Optional[float]): The fraction of calls to log, between 0 and 1.
 
     Returns:
         Callable: The wrapped function with logging.
     """
+    if func is None:
+        return functools.partial(log_function, sample_rate=sample_rate)
+
+    name = func.__qualname__
+    rate = settings.LOG_SAMPLE_RATES.get(f"{func.__module__}.{func.__qualname__}", sample_rate)
+    if rate is None:
+        rate = settings.LOG_SAMPLE_RATE
+
+    def sampled() -> bool:
+        return rate > 0 and (rate >= 1 or random.random() < rate) and logger.isEnabledFor(logging.INFO)
+
+    def log_result(result, started: float) -> None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if result is None:
+            logger.info("Function '%s' completed without returning a value in %.2f ms", name, duration_ms)
+        else:
+            logger.info("Function '%s' returned %s in %.2f ms", name, _LazyRepr(result), duration_ms)
 
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):
-        stream = io.StringIO()
+        if not sampled():
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.exception("Function '%s' raised an exception: %s", name, e)
+                raise
+
+        logger.info("Function '%s' called with %s", name, _LazyCall(args, kwargs))
+        started = time.perf_counter()
         try:
-            logger.info(f"Function '{func.__name__}' called with args: {args} and kwargs: {kwargs}")
-            with redirect_stdout(stream):
-                result = await func(*args, **kwargs)
-
-            output = stream.getvalue()
-            if output:
-                logger.info(f"Print output from '{func.__name__}':\n{output}")
-            if result is None:
-                logger.info(f"Function '{func.__name__}' completed without returning a value")
-            else:
-                logger.info(f"Function '{func.__name__}' returned {result}")
-            return result
+            result = await func(*args, **kwargs)
         except Exception as e:
-            output = stream.getvalue()
-            if output:
-                logger.info(f"Print output from '{func.__name__}':\n{output}")
-            logger.exception(f"Function '{func.__name__}' raised an exception: {e}")
+            logger.exception("Function '%s' raised an exception: %s", name, e)
             raise
+        log_result(result, started)
+        return result
 
     @functools.wraps(func)
     def sync_wrapper(*args, **kwargs):
-        stream = io.StringIO()
+        if not sampled():
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                logger.exception("Function '%s' raised an exception: %s", name, e)
+                raise
+
+        logger.info("Function '%s' called with %s", name, _LazyCall(args, kwargs))
+        started = time.perf_counter()
         try:
-            logger.info(f"Function '{func.__name__}' called with args: {args} and kwargs: {kwargs}")
-            with redirect_stdout(stream):
-                result = func(*args, **kwargs)
-
-            output = stream.getvalue()
-            if output:
-                logger.info(f"Print output from '{func.__name__}':\n{output}")
-            if result is None:
-                logger.info(f"Function '{func.__name__}' completed without returning a value")
-            else:
-                logger.info(f"Function '{func.__name__}' returned {result}")
-            return result
+            result = func(*args, **kwargs)
         except Exception as e:
-            output = stream.getvalue()
-            if output:
-                logger.info(f"Print output from '{func.__name__}':\n{output}")
-            logger.exception(f"Function '{func.__name__}' raised an exception: {e}")
+            logger.exception("Function '%s' raised an exception: %s", name, e)
             raise
+        log_result(result, started)
+        return result
 
     if asyncio.iscoroutinefunction(func):
         return async_wrapper
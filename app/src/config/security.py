@@ -3,7 +3,6 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
 from app.src.config.config import settings
-from app.src.util.crud.token import is_token_blacklisted
 from app.src.util.crud.user import get_user_by_email
 from app.src.util.models import User
 from app.src.util.db import get_db
@@ -11,6 +10,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.src.config.logging_config import log_function
 from fastapi.responses import JSONResponse
 from app.src.config.jwt import create_access_token
+from app.src.services.identity_cache import identity_cache, UserSnapshot
+from app.src.services.revocation import revocation_list
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -50,11 +51,15 @@ def get_email_from_token(token: str) -> str:
         )
 
 
-@log_function
+@log_function(sample_rate=0.01)
 async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
     """
         Retrieves the current authenticated user based on the provided access or refresh token.
 
+        A valid access token is first looked up in the in-process identity cache, a hit returns the cached user
+        snapshot without touching the database. On a miss the token is verified as described below and the result
+        is cached until the token expires or is invalidated by logout or ban.
+
         This function checks the validity of the access token stored in the user's cookies. If the access token is
         blacklisted, it attempts to use the refresh token to generate a new access token. If both tokens are
         blacklisted or invalid, the user is considered unauthenticated, and an HTTP 401 Unauthorized error is raised.
@@ -64,7 +69,7 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
             db (AsyncSession): The database session dependency, used to interact with the database asynchronously.
 
         Returns:
-            User: The authenticated user object retrieved from the database.
+            UserSnapshot: A snapshot of the authenticated user.
 
         Raises:
             HTTPException:
@@ -118,12 +123,19 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
 
     if access_token:
         token_to_use = access_token.replace("Bearer ", "")
-        if await is_token_blacklisted(db, token_to_use):
+        # Checked before the cache: revocations made by other workers reach this one through the revocation list,
+        # their cache invalidations do not.
+        if await revocation_list.is_revoked(db, token_to_use):
+            identity_cache.invalidate_token(token_to_use)
             token_to_use = None
+        else:
+            cached = identity_cache.get(token_to_use)
+            if cached is not None:
+                return cached[1]
 
     if not token_to_use and refresh_token:
         token_to_use = refresh_token.replace("Bearer ", "")
-        if await is_token_blacklisted(db, token_to_use):
+        if await revocation_list.is_revoked(db, token_to_use):
             response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Both access and refresh tokens are blacklisted"}
@@ -149,7 +161,7 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
                     detail="Could not validate credentials",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
-            new_access_token = await create_access_token(data={"sub": email}, user_id=user.id, db=db)
+            new_access_token = await create_access_token(data={"sub": email}, user_id=user.id)
             response = JSONResponse(
                 content={"detail": "New access token issued"}
             )
@@ -207,7 +219,9 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    user_snapshot = UserSnapshot.from_user(user)
+    identity_cache.put(token_to_use, payload, user_snapshot)
+    return user_snapshot
 
 
 async def get_current_user_cookies(request: Request) -> str:
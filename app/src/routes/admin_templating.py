@@ -1,19 +1,69 @@
+import csv
+import io
+from datetime import date
+from typing import AsyncIterator, Callable, List, Optional
+from urllib.parse import urlencode
+
 from fastapi import APIRouter, Request, Depends,  HTTPException, Query
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from app.src.config.config import templates, FrontEndpoints
+from app.src.config.dependency import role_required
 from app.src.config.security import get_current_user
+from app.src.util.crud.moderation import (ModerationFilters, get_comments_page, get_ratings_page, get_photos_page,
+                                          get_active_users_page, iter_comment_batches, iter_rating_batches)
 from app.src.util.db import get_db
-from app.src.util.models import User, Photo
-from app.src.util.models.comment import Comment
-from app.src.util.models.rating import Rating
+from app.src.util.models import User
+from app.src.util.models.user import UserRole
 
 
 router = APIRouter()
 
 
+def moderation_filters(user_id: Optional[int] = Query(None), photo_id: Optional[int] = Query(None),
+                       date_from: Optional[date] = Query(None),
+                       date_to: Optional[date] = Query(None)) -> ModerationFilters:
+    """Builds the moderation filters from the query parameters of a request."""
+    return ModerationFilters(user_id=user_id, photo_id=photo_id, date_from=date_from, date_to=date_to)
+
+
+def _query_string(request: Request, **params) -> str:
+    """Returns the query string of the request without its cursor and messages, with params added."""
+    query = {key: value for key, value in request.query_params.items()
+             if key not in ("cursor", "message", "error") and value != ""}
+    query.update({key: value for key, value in params.items() if value is not None})
+    return urlencode(query)
+
+
+def _next_page_url(request: Request, next_cursor: Optional[int]) -> Optional[str]:
+    if next_cursor is None:
+        return None
+    return f"{request.url.path}?{_query_string(request, cursor=next_cursor)}"
+
+
+def _csv_cell(value) -> str:
+    # Keep spreadsheet applications from evaluating user-provided text as a formula.
+    text = "" if value is None else str(value)
+    return f"'{text}" if text[:1] in ("=", "+", "-", "@") else text
+
+
+async def _stream_csv(header: List[str], batches: AsyncIterator[list], row: Callable) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(value) for value in row(item)] for item in batch)
+        yield buffer.getvalue()
+
+
+def _csv_response(stream: AsyncIterator[str], filename: str) -> StreamingResponse:
+    return StreamingResponse(stream, media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
 @router.get(FrontEndpoints.ADMIN_DASHBOARD.value, response_class=HTMLResponse)
 async def get_admin_panel(request: Request, current_user: User = Depends(get_current_user)):
     """
@@ -38,30 +88,34 @@ async def get_ban_user_page(
         db: AsyncSession = Depends(get_db),
         message: str = Query(None),
         error: str = Query(None),
+        q: Optional[str] = Query(None),
+        cursor: Optional[int] = Query(None),
         current_user: User = Depends(get_current_user)
 ):
     """
-    Renders the Ban User page with a list of users and optional messages.
+    Renders the Ban User page with one page of the active users and optional messages.
 
     Args:
         request (Request): The HTTP request object.
         db (AsyncSession): The database session.
         message (str): Optional success message to display.
         error (str): Optional error message to display.
+        q (Optional[str]): Only list the users whose username starts with it.
+        cursor (Optional[int]): The cursor of the page, from the "Next" link.
         current_user: The current user.
 
     Returns:
         TemplateResponse: The rendered ban_user.html template.
     """
 
-    result = await db.execute(
-        select(User).filter(User.is_active == True, User.username != current_user.username)
-    )
-    users = result.scalars().all()
+    users, next_cursor = await get_active_users_page(db, exclude_user_id=current_user.id, username_prefix=q,
+                                                     cursor=cursor)
 
     context = {
         "request": request,
         "users": users,
+        "q": q or "",
+        "next_url": _next_page_url(request, next_cursor),
         "message": message,
         "error": error,
         "role": current_user.role.value,
@@ -74,11 +128,12 @@ async def get_ban_user_page(
 async def get_photos_for_deletion(
         request: Request,
         db: AsyncSession = Depends(get_db), message: str = Query(None), error: str = Query(None),
+        user_id: Optional[int] = Query(None), cursor: Optional[int] = Query(None),
         current_user: User = Depends(get_current_user)
 
 ):
     """
-    Renders the Delete Photo page with all available photos and optional messages.
+    Renders the Delete Photo page with one page of photos, newest first, and optional messages.
 
     Args:
         request (Request): The HTTP request object.
@@ -86,16 +141,19 @@ async def get_photos_for_deletion(
         current_user (User): The current authenticated user.
         message (str): Optional success message to display.
         error (str): Optional error message to display.
+        user_id (Optional[int]): Only list the photos of this user.
+        cursor (Optional[int]): The cursor of the page, from the "Next" link.
 
     Returns:
         TemplateResponse: The rendered delete_photo.html template.
     """
-    result = await db.execute(select(Photo))
-    photos = result.scalars().all()
+    photos, next_cursor = await get_photos_page(db, user_id=user_id, cursor=cursor)
 
     context = {
         "request": request,
         "photos": photos,
+        "user_id": user_id,
+        "next_url": _next_page_url(request, next_cursor),
         "message": message,
         "error": error,
         "role": current_user.role.value,
@@ -105,38 +163,76 @@ async def get_photos_for_deletion(
 
 
 @router.get(FrontEndpoints.ADMIN_RATINGS.value, response_class=HTMLResponse)
-async def view_all_ratings(request: Request, db: AsyncSession = Depends(get_db),
+async def view_all_ratings(request: Request, filters: ModerationFilters = Depends(moderation_filters),
+                           cursor: Optional[int] = Query(None), db: AsyncSession = Depends(get_db),
                            current_user: User = Depends(get_current_user)):
     """
-    Display a list of all ratings with associated photos and users.
-    """
+    Display one page of ratings, newest first, with their photos and users.
 
-    result = await db.execute(
-        select(Rating)
-        .options(selectinload(Rating.photo), selectinload(Rating.owner))
-    )
-    ratings = result.scalars().all()
+    The ratings can be filtered by user, photo and creation date, see moderation_filters.
+    """
+    ratings, next_cursor = await get_ratings_page(db, filters, cursor=cursor)
     return templates.TemplateResponse("admin_ratings.html", {
         "request": request,
         "ratings": ratings,
+        "filters": filters,
+        "next_url": _next_page_url(request, next_cursor),
+        "export_url": f"{FrontEndpoints.ADMIN_RATINGS_EXPORT.value}?{_query_string(request)}",
         "role": current_user.role.value,
     })
 
 
 @router.get(FrontEndpoints.ADMIN_COMMENTS.value, response_class=HTMLResponse)
-async def view_all_comments(request: Request, db: AsyncSession = Depends(get_db),
+async def view_all_comments(request: Request, filters: ModerationFilters = Depends(moderation_filters),
+                            cursor: Optional[int] = Query(None), db: AsyncSession = Depends(get_db),
                             current_user: User = Depends(get_current_user)):
     """
-    Display a list of all comments with associated photos and users.
-    """
+    Display one page of comments, newest first, with their photos and users.
 
-    result = await db.execute(
-        select(Comment)
-        .options(selectinload(Comment.photo), selectinload(Comment.user))
-    )
-    comments = result.scalars().all()
+    The comments can be filtered by user, photo and creation date, see moderation_filters.
+    """
+    comments, next_cursor = await get_comments_page(db, filters, cursor=cursor)
     return templates.TemplateResponse("admin_comments.html", {
         "request": request,
         "comments": comments,
+        "filters": filters,
+        "next_url": _next_page_url(request, next_cursor),
+        "export_url": f"{FrontEndpoints.ADMIN_COMMENTS_EXPORT.value}?{_query_string(request)}",
         "role": current_user.role.value,
     })
+
+
+@router.get(FrontEndpoints.ADMIN_RATINGS_EXPORT.value,
+            dependencies=[Depends(role_required([UserRole.ADMIN, UserRole.MODERATOR]))])
+async def export_ratings(filters: ModerationFilters = Depends(moderation_filters)) -> StreamingResponse:
+    """
+    Streams the ratings matching the filters as CSV, newest first.
+
+    Rows are fetched and written in keyset batches, so the export never holds the whole table in memory.
+    """
+    stream = _stream_csv(
+        ["id", "rating", "created_at", "photo_id", "photo_description", "user_id", "username"],
+        iter_rating_batches(filters),
+        lambda rating: (rating.id, rating.rating, rating.created_at, rating.photo_id,
+                        rating.photo.description if rating.photo else None, rating.user_id,
+                        rating.owner.username if rating.owner else None),
+    )
+    return _csv_response(stream, "ratings.csv")
+
+
+@router.get(FrontEndpoints.ADMIN_COMMENTS_EXPORT.value,
+            dependencies=[Depends(role_required([UserRole.ADMIN, UserRole.MODERATOR]))])
+async def export_comments(filters: ModerationFilters = Depends(moderation_filters)) -> StreamingResponse:
+    """
+    Streams the comments matching the filters as CSV, newest first.
+
+    Rows are fetched and written in keyset batches, so the export never holds the whole table in memory.
+    """
+    stream = _stream_csv(
+        ["id", "content", "created_at", "photo_id", "photo_description", "user_id", "username"],
+        iter_comment_batches(filters),
+        lambda comment: (comment.id, comment.content, comment.created_at, comment.photo_id,
+                         comment.photo.description if comment.photo else None, comment.user_id,
+                         comment.user.username if comment.user else None),
+    )
+    return _csv_response(stream, "comments.csv")
@@ -9,7 +9,6 @@ from app.src.config.config import settings
 from app.src.config.hash import hash_handler
 from app.src.config.jwt import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, create_refresh_token, SECRET_KEY, \
     ALGORITHM
-from app.src.util.crud.token import blacklist_token, remove_blacklisted_tokens
 from app.src.util.crud.user import get_user_by_email, update_user_last_login
 from app.src.util.db import get_db
 from datetime import timedelta, datetime
@@ -17,6 +16,8 @@ from app.src.config.logging_config import log_function
 from app.src.util.models.user import UserRole
 from app.src.util.schemas import user as user_schemas
 from app.src.util.crud import user as user_crud
+from app.src.services.identity_cache import identity_cache
+from app.src.services.revocation import revocation_list
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -100,7 +101,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
 
     access_token = await create_access_token(
-        data={"sub": db_user.email}, user_id=db_user.id, db=db, expires_delta=access_token_expires
+        data={"sub": db_user.email}, user_id=db_user.id, expires_delta=access_token_expires
     )
     refresh_token = await create_refresh_token(
         data={"sub": db_user.email}, user_id=db_user.id, db=db, expires_delta=refresh_token_expires
@@ -122,8 +123,9 @@ async def logout(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Logs out the user.
 
-    This endpoint logs out a user by invalidating their access token. The token is added to a blacklist
-    to prevent further use. Upon successful logout, it returns an HTTP 200 OK status.
+    This endpoint logs out a user by revoking their access and refresh tokens by jti until they expire,
+    to prevent further use. Cookies that do not verify against the signing key are ignored.
+    Upon successful logout, it returns an HTTP 200 OK status.
 
     Args:
         request (Request): The request object.
@@ -139,9 +141,10 @@ async def logout(request: Request, db: AsyncSession = Depends(get_db)):
     refresh_token = request.cookies.get("refresh_token")
 
     if access_token:
-        await blacklist_token(db, access_token)
+        identity_cache.invalidate_token(access_token)
+        await revocation_list.revoke(db, access_token)
     if refresh_token:
-        await blacklist_token(db, refresh_token)
+        await revocation_list.revoke(db, refresh_token)
 
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
@@ -10,9 +10,9 @@ from app.src.util.models.comment import Comment
 from app.src.util.models.user import UserRole
 from app.src.util.schemas.comment import Comment as CommentSchema, CommentUpdate
 from app.src.util.crud.comment import delete_comment, create_comment, update_comment, get_comments, \
-    get_user_comment, get_comment_by_id
+    get_comment_by_id
 from app.src.util.schemas.user import User
-from app.src.config.dependency import role_required, verify_api_key
+from app.src.config.dependency import role_required, verify_api_key, owner_or_admin_dependency, CommentDependency
 from fastapi.responses import RedirectResponse
 
 router = APIRouter()
@@ -62,7 +62,9 @@ async def read_photo_comments(photo_id: int, db: AsyncSession = Depends(get_db))
 @router.put("/comments/{comment_id}/", response_model=CommentSchema)
 @log_function
 async def update_photo_comment(comment_id: int, comment_content: str = Form(...),
-                               db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+                               db: AsyncSession = Depends(get_db),
+                               db_comment: Comment = Depends(owner_or_admin_dependency(CommentDependency,
+                                                                                       "comment_id"))):
     """
     Update a specific comment and redirect to the photo detail view.
 
@@ -70,21 +72,17 @@ async def update_photo_comment(comment_id: int, comment_content: str = Form(...)
         comment_id (int): The ID of the comment to update.
         comment_content (str): The new content for the comment.
         db (AsyncSession): The database session dependency.
-        current_user (User): The current authenticated user dependency.
+        db_comment (Comment): The comment, loaded once after checking the current user owns it or is an admin.
 
     Raises:
-        HTTPException: If the comment is not found or does not belong to the current user.
+        HTTPException: If the comment is not found or the current user is neither its owner nor an admin.
 
     Returns:
         RedirectResponse: Redirects to the photo detail view after updating the comment.
     """
 
-    db_comment = await get_user_comment(db, current_user.id, comment_id)
-    if not db_comment:
-        raise HTTPException(status_code=404, detail="Comment not found.")
-
     update_data = CommentUpdate(content=comment_content)
-    await update_comment(db=db, comment_id=comment_id, comment=update_data)
+    await update_comment(db=db, comment_id=comment_id, comment=update_data, db_comment=db_comment)
 
     return RedirectResponse(url=f"/photo/{db_comment.photo_id}", status_code=status.HTTP_302_FOUND)
 
@@ -103,11 +101,13 @@ async def delete_photo_comment(comment_id: int, db: AsyncSession = Depends(get_d
         current_user (User): The current authenticated user dependency.
 
     Raises:
-        HTTPException: If the comment is not found or does not belong to the current user.
+        HTTPException: If the comment is not found or the current user is not an admin or a moderator.
 
     Returns:
         Comment: The deleted comment.
     """
+    # Moderators may delete any comment, so this is a role check rather than CommentDependency's ownership check.
+    # get_comment_by_id is the only load of the comment, it raises 404 if it does not exist.
     result = await get_comment_by_id(db, comment_id)
-    await delete_comment(db=db, comment_id=result.id)
+    await delete_comment(db=db, comment_id=result.id, db_comment=result)
     return RedirectResponse(url="/admin/comments", status_code=status.HTTP_303_SEE_OTHER)
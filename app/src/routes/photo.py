@@ -1,32 +1,36 @@
 import base64
 from io import BytesIO
+from typing import List, Optional
 import qrcode
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File, Request, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File, Request, Body, Query, Path
 from pydantic import conlist
 from sqlalchemy.orm import joinedload
 from sqlalchemy.future import select
 from base64 import b64encode
 
-from starlette.responses import StreamingResponse
-
-from app.src.config.config import templates
+from app.src.config.config import templates, settings
 from app.src.util.models import Photo
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.src.config.dependency import owner_or_admin_dependency, PhotoDependency, verify_api_key
 from app.src.config.logging_config import log_function
 from app.src.config.security import get_current_user
-from app.src.util.crud.tag import get_tag_by_name
-from app.src.util.crud.photo import delete_photo, create_photo_in_db, update_photo_description
+from app.src.util.crud.tag import get_tag_by_name, autocomplete_tags
+from app.src.util.crud.photo import delete_photo, create_photo_in_db, update_photo_description, get_photos_feed, \
+    get_photos_by_tags
 from app.src.util.models import User
 from app.src.util.db import get_db
 from fastapi.responses import JSONResponse
 from fastapi import APIRouter, Request, Depends, HTTPException
 from app.src.util.crud.photo import get_photo, PhotoService, update_photo_url
-from app.src.util.schemas.photo import PhotoResponse
+from app.src.util.schemas.photo import PhotoResponse, PhotoFeedResponse
 from app.src.util.schemas.tag import TagResponse
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, FileResponse
 
 from app.src.services.aggregator import Aggregator
+from app.src.services.transform_engine import transform_engine
+from app.src.util.crud.derived_asset import get_derived_asset, load_spec
+from app.src.util.crud.ranking import get_ranked_photos
+from app.src.util.crud.search import search_photos
 
 router = APIRouter()
 
@@ -41,8 +45,8 @@ async def create_photo(description: str = Form(None),
     """
         Handle photo upload and description.
 
-        This endpoint allows users to upload a photo with a description and tags. The photo is uploaded to Cloudinary,
-        and the URL is stored in the database along with the description and tags.
+        This endpoint allows users to upload a photo with a description and tags. The photo is stored in the database
+        right away and uploaded to Cloudinary in the background, its URL is filled in once the upload is done.
 
         Args:
             description (str): The description of the photo.
@@ -56,12 +60,113 @@ async def create_photo(description: str = Form(None),
         """
     try:
         new_photo = await create_photo_in_db(description, file, current_user.id, db, tags)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
     return RedirectResponse("/profile/my-photos", status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.get("/photos/feed", response_model=PhotoFeedResponse, dependencies=[Depends(verify_api_key)])
+async def get_photo_feed(cursor: Optional[int] = Query(None),
+                         limit: int = Query(settings.FEED_PAGE_SIZE, ge=1, le=settings.FEED_MAX_PAGE_SIZE),
+                         db: AsyncSession = Depends(get_db)):
+    """
+    Retrieves one page of the photo feed, newest first.
+
+    Parameters:
+    cursor (Optional[int]): The next_cursor value returned with the previous page. Omit for the first page.
+    limit (int): The number of photos per page.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    PhotoFeedResponse: The photos of the page and the cursor to load more with.
+    """
+    photos, next_cursor = await get_photos_feed(db, cursor=cursor, limit=limit)
+    return PhotoFeedResponse(items=[_feed_item(photo) for photo in photos], next_cursor=next_cursor)
+
+
+@router.get("/photos/search", response_model=PhotoFeedResponse, dependencies=[Depends(verify_api_key)])
+async def search_photo_feed(q: str = Query(..., min_length=1, max_length=200),
+                            cursor: Optional[int] = Query(None, ge=0),
+                            limit: int = Query(settings.FEED_PAGE_SIZE, ge=1, le=settings.FEED_MAX_PAGE_SIZE),
+                            db: AsyncSession = Depends(get_db)):
+    """
+    Searches the photos by description, tags and comments, best match first.
+
+    Parameters:
+    q (str): The search text.
+    cursor (Optional[int]): The next_cursor value returned with the previous page. Omit for the first page.
+    limit (int): The number of photos per page.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    PhotoFeedResponse: The photos of the page and the cursor to load more with.
+    """
+    photos, next_cursor = await search_photos(db, q, cursor=cursor, limit=limit)
+    return PhotoFeedResponse(items=[_feed_item(photo) for photo in photos], next_cursor=next_cursor)
+
+
+@router.get("/photos", response_model=PhotoFeedResponse, dependencies=[Depends(verify_api_key)])
+async def browse_photos_by_tag(tag: List[str] = Query(..., max_length=settings.MAX_TAGS),
+                               match: str = Query("all", pattern="^(all|any)$"),
+                               cursor: Optional[int] = Query(None),
+                               limit: int = Query(settings.FEED_PAGE_SIZE, ge=1, le=settings.FEED_MAX_PAGE_SIZE),
+                               db: AsyncSession = Depends(get_db)):
+    """
+    Retrieves one page of the photos with the given tags, newest first, e.g. /photos?tag=sea&tag=sunset.
+
+    Parameters:
+    tag (List[str]): The tag names to filter on, repeat the parameter for several tags.
+    match (str): "all" for the photos with every tag, "any" for the photos with at least one of them.
+    cursor (Optional[int]): The next_cursor value returned with the previous page. Omit for the first page.
+    limit (int): The number of photos per page.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    PhotoFeedResponse: The photos of the page and the cursor to load more with.
+    """
+    photos, next_cursor = await get_photos_by_tags(db, tag, match_all=match == "all", cursor=cursor, limit=limit)
+    return PhotoFeedResponse(items=[_feed_item(photo) for photo in photos], next_cursor=next_cursor)
+
+
+def _feed_item(photo: Photo) -> PhotoResponse:
+    return PhotoResponse(
+        id=photo.id,
+        description=photo.description,
+        url=photo.url,
+        status=photo.status,
+        user_id=photo.user_id,
+        tags=[TagResponse(name=tag.name) for tag in photo.tags],
+        average_rating=photo.average_rating,
+        rating_count=photo.rating_count
+    )
+
+
+@router.get("/photos/ranked/{kind}", response_model=PhotoFeedResponse, dependencies=[Depends(verify_api_key)])
+async def get_ranked_photo_feed(kind: str = Path(..., pattern="^(top|trending)$"),
+                                cursor: Optional[int] = Query(None),
+                                limit: int = Query(settings.FEED_PAGE_SIZE, ge=1, le=settings.FEED_MAX_PAGE_SIZE),
+                                db: AsyncSession = Depends(get_db)):
+    """
+    Retrieves one page of the "top" or "trending" leaderboard.
+
+    Leaderboards are precomputed every few minutes by the scheduler, see refresh_photo_rankings.
+
+    Parameters:
+    kind (str): "top" for the best rated photos, "trending" for the most active ones lately.
+    cursor (Optional[int]): The next_cursor value returned with the previous page. Omit for the first page.
+    limit (int): The number of photos per page.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    PhotoFeedResponse: The photos of the page and the cursor to load more with.
+    """
+    photos, next_cursor = await get_ranked_photos(db, kind, cursor=cursor, limit=limit)
+    return PhotoFeedResponse(items=[_feed_item(photo) for photo in photos], next_cursor=next_cursor)
+
+
 @router.get("/photos/{photo_id}", response_model=PhotoResponse, dependencies=[Depends(verify_api_key)])
 @log_function
 async def get_photo_route(photo_id: int, db: AsyncSession = Depends(get_db)):
@@ -85,8 +190,11 @@ async def get_photo_route(photo_id: int, db: AsyncSession = Depends(get_db)):
         id=photo.id,
         description=photo.description,
         url=photo.url,
+        status=photo.status,
         user_id=photo.user_id,
-        tags=tags
+        tags=tags,
+        average_rating=photo.average_rating,
+        rating_count=photo.rating_count
     )
     return photo_with_tags
 
@@ -97,10 +205,12 @@ async def update_description(
         request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user),
-        _=Depends(owner_or_admin_dependency(PhotoDependency, "photo_id"))
+        photo: Photo = Depends(owner_or_admin_dependency(PhotoDependency, "photo_id"))
 ):
     """
     Update the description of a photo.
+
+    The photo is the one loaded by the ownership check.
     """
     data = await request.json()
     new_description = data.get("new_description")
@@ -109,7 +219,7 @@ async def update_description(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Description cannot be empty")
 
     try:
-        updated_photo = await update_photo_description(photo_id, new_description, db)
+        updated_photo = await update_photo_description(photo_id, new_description, db, photo=photo)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -127,7 +237,7 @@ async def update_description(
 async def delete_photo_route(
         photo_id: int,
         db: AsyncSession = Depends(get_db),
-        _=Depends(owner_or_admin_dependency(PhotoDependency, "photo_id"))
+        photo: Photo = Depends(owner_or_admin_dependency(PhotoDependency, "photo_id"))
 ):
     """
     Deletes a photo from the database based on the provided photo ID.
@@ -135,32 +245,70 @@ async def delete_photo_route(
     Parameters:
     photo_id (int): The unique identifier of the photo to delete.
     db (AsyncSession, optional): The database session. Defaults to Depends(get_db).
+    photo (Photo): The photo, as loaded by the ownership check.
 
     Returns:
     JSONResponse: A JSON response with a 'detail' key indicating the success message. If the photo is not found, raises a 404 HTTPException.
     """
-    await delete_photo(db, photo_id)
+    await delete_photo(db, photo_id, photo=photo)
     return RedirectResponse("/", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.post("/photos/generate_qrcode/{photo_id}", dependencies=[Depends(verify_api_key)])
 @log_function
-async def generate_qr_code(photo_id: int, db: AsyncSession = Depends(get_db)):
+async def generate_qr_code(photo_id: int, request: Request, format: str = Query("png", pattern="^(png|svg)$"),
+                           db: AsyncSession = Depends(get_db)):
     """
-        Generate and display a QR code for the photo URL in response to a POST request.
+        Generate a QR code for the photo URL in response to a POST request.
 
         Args:
             photo_id (int): The unique identifier of the photo.
+            request (Request): The HTTP request object.
+            format (str): The image format, "png" or "svg".
             db (AsyncSession): The SQLAlchemy asynchronous session.
 
 
         Returns:
-            TemplateResponse: The rendered template with the QR code.
+            Response: The QR code image with its ETag.
+        """
+    return await Aggregator.generate_qr(photo_id, db, request, format)
+
+
+@router.get("/photo/qr/{photo_id}")
+async def get_qr_code(photo_id: int, request: Request, format: str = Query("png", pattern="^(png|svg)$"),
+                      db: AsyncSession = Depends(get_db)):
+    """
+        Serve the QR code of a photo URL as an image, for use in <img> tags.
+
+        Args:
+            photo_id (int): The unique identifier of the photo.
+            request (Request): The HTTP request object.
+            format (str): The image format, "png" or "svg".
+            db (AsyncSession): The SQLAlchemy asynchronous session.
+
+        Returns:
+            Response: The QR code image, or 304 if the client's copy is still current.
         """
-    qr_code = await Aggregator.generate_qr(photo_id, db)
-    return StreamingResponse(qr_code, media_type="image/png")
+    return await Aggregator.generate_qr(photo_id, db, request, format)
 
 
+@router.get("/photo/tags/autocomplete", response_model=List[TagResponse], dependencies=[Depends(verify_api_key)])
+async def autocomplete_tags_route(q: str = Query(..., min_length=1, max_length=64),
+                                  limit: int = Query(settings.TAG_AUTOCOMPLETE_LIMIT, ge=1, le=50),
+                                  db: AsyncSession = Depends(get_db)):
+    """
+    Suggests the tags whose name starts with the typed text.
+
+    Parameters:
+    q (str): The beginning of the tag name.
+    limit (int): The maximum number of suggestions.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    List[TagResponse]: The matching tags, in alphabetical order.
+    """
+    return [TagResponse(name=tag.name) for tag in await autocomplete_tags(db, q, limit)]
+
 
 @router.get("/photo/tags/", response_model=TagResponse, dependencies=[Depends(verify_api_key)])
 async def get_tag_route(tag_name: str, db: AsyncSession = Depends(get_db)):
@@ -215,9 +363,11 @@ async def resize(
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     try:
-        result = await PhotoService.resize_photo(photo.public_id, width=width, height=height)
-        await update_photo_url(db, photo_id, result)
+        url = await PhotoService.resize_photo(db, photo, width=width, height=height)
+        await update_photo_url(db, photo_id, url)
         return RedirectResponse(url=f"/photo/edit/{photo_id}", status_code=302)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
@@ -277,9 +427,36 @@ async def add_filter(
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
 
-    url = await PhotoService.add_filter(photo.public_id, photo_filter)
+    url = await PhotoService.add_filter(db, photo, photo_filter)
     if not url:
         raise HTTPException(status_code=400, detail="Invalid filter or transformation failed")
 
     await update_photo_url(db, photo_id, url)
     return RedirectResponse(url=f"/photo/edit/{photo_id}", status_code=302)
+
+
+@router.get("/photo/variants/{key}")
+async def get_photo_variant(key: str, db: AsyncSession = Depends(get_db)):
+    """
+    Serves a resized or filtered variant of a photo.
+
+    The variant is read from the derived cache, or rendered again from its recorded transformation if it has been
+    evicted. Its key is derived from the original and the transformation, so the response never changes and may
+    be cached forever.
+
+    Parameters:
+    key (str): The cache key of the variant.
+    db (AsyncSession): The database session. Defaults to Depends(get_db).
+
+    Returns:
+    FileResponse: The variant image.
+
+    Raises:
+    HTTPException: 404 if the variant does not exist or its original is gone.
+    """
+    asset = await get_derived_asset(db, key)
+    try:
+        path = await transform_engine.render(asset.public_id, load_spec(asset))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
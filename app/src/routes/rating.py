@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.src.config.dependency import role_required, verify_api_key
 from app.src.util.crud.photo import get_photo
 from app.src.util.models.user import UserRole
 from app.src.util.schemas.rating import RatingResponse
-from app.src.util.crud.rating import get_rating, delete_rating
+from app.src.util.crud.rating import get_rating, delete_rating, adjust_rating_aggregate
 from app.src.util.db import get_db
 from sqlalchemy.future import select
 from app.src.util.models.rating import Rating
@@ -22,7 +23,8 @@ async def get_photo_rating(photo_id: int, db: AsyncSession = Depends(get_db)):
     """
         Retrieve the average rating for a specific photo.
 
-        This endpoint retrieves the average rating for a photo based on all ratings submitted by users.
+        This endpoint retrieves the average rating for a photo based on all ratings submitted by users,
+        read from the rating aggregates kept on the photo.
 
         Parameters:
         photo_id (int): The unique identifier of the photo.
@@ -31,11 +33,8 @@ async def get_photo_rating(photo_id: int, db: AsyncSession = Depends(get_db)):
         Returns:
         float: The average rating of the photo. If no ratings are found, returns 0.
         """
-    result = await db.execute(select(func.avg(Rating.rating)).where(Rating.photo_id == photo_id))
-    average_rating = result.scalar()
-    if average_rating is None:
-        return 0
-    return average_rating
+    photo = await get_photo(db, photo_id)
+    return photo.average_rating or 0
 
 
 @router.post("/photos/rate")
@@ -80,6 +79,14 @@ async def rate_photo(photo_id: int = Form(...), rating: int = Form(...), db: Asy
 
     new_rating = Rating(rating=rating, user_id=current_user.id, photo_id=photo_id)
     db.add(new_rating)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # A concurrent request (e.g. a double submit) rated the photo first, caught by the unique index.
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You cannot change your rating")
+    await adjust_rating_aggregate(db, photo_id, 1, rating)
     await db.commit()
 
     return RedirectResponse(url=f"/photo/{photo_id}", status_code=status.HTTP_302_FOUND)
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Request, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Request, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from app.src.config.config import templates, FrontEndpoints
+from app.src.config.dependency import verify_api_key
 from app.src.config.security import get_current_user_cookies
-from app.src.util.crud.photo import get_photos_with_details
+from app.src.services.db_pool import pool_manager
+from app.src.services.maintenance import maintenance
+from app.src.services.query_stats import query_stats
+from app.src.services.request_metrics import request_metrics
+from app.src.util.crud.photo import get_photos_feed
+from app.src.util.crud.ranking import get_ranked_photos
 from app.src.util.db import get_db
 from app.src.util.models import User
 
@@ -13,19 +21,86 @@ router = APIRouter()
 
 @router.get(FrontEndpoints.HOME.value, response_class=HTMLResponse)
 async def read_root(request: Request, db: AsyncSession = Depends(get_db),
-                    current_user_username: User = Depends(get_current_user_cookies)):
+                    current_user_username: User = Depends(get_current_user_cookies),
+                    cursor: Optional[int] = Query(None),
+                    sort: str = Query("latest", pattern="^(latest|top|trending)$")):
     """
         Displays the home page with photos and user-specific navigation links.
 
+        Photos are rendered one fixed-size page at a time, the "Load more" link carries the cursor of the next page.
+        They are sorted newest first, or by one of the precomputed leaderboards ("top", "trending").
+
         Args:
             request (Request): The request object.
             db (AsyncSession): The asynchronous database session.
             current_user_username: The username of current authenticated user.
+            cursor (Optional[int]): The id (or rank, for leaderboards) of the last photo of the previous page.
+            sort (str): "latest", "top" or "trending".
 
         Returns:
             TemplateResponse: The rendered home page template with photos and user-specific navigation.
         """
 
-    photos_with_details = await get_photos_with_details(db)
-    return templates.TemplateResponse("index.html", {"request": request, "photos": photos_with_details,
-                                                     "current_user": current_user_username})
\ No newline at end of file
+    if sort == "latest":
+        photos, next_cursor = await get_photos_feed(db, cursor=cursor)
+    else:
+        photos, next_cursor = await get_ranked_photos(db, sort, cursor=cursor)
+    return templates.TemplateResponse("index.html", {"request": request, "photos": photos,
+                                                     "next_cursor": next_cursor, "sort": sort,
+                                                     "current_user": current_user_username})
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_api_key)])
+async def get_metrics():
+    """
+    Exposes the per-route request metrics, the connection pool metrics and the maintenance job metrics for
+    Prometheus.
+
+    Returns:
+        PlainTextResponse: Request counts by status, and request duration, database time and statement count
+        histograms, by route. Pool occupancy, checkout wait time histogram, timeouts and connection churn.
+        Maintenance job runs by outcome, rows purged and runtime histogram, by job.
+    """
+    return PlainTextResponse(request_metrics.render() + pool_manager.render() + maintenance.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/admin/query-stats", dependencies=[Depends(verify_api_key)])
+async def get_query_stats(reset: bool = Query(False)):
+    """
+    Returns the SQL statistics collected since startup or the last reset.
+
+    Args:
+        reset (bool): Clear the statistics after reading them.
+
+    Returns:
+        dict: Per-statement duration histograms and per-route query counts.
+    """
+    snapshot = query_stats.snapshot()
+    if reset:
+        query_stats.reset()
+    return snapshot
+
+
+@router.get("/admin/pool-stats", dependencies=[Depends(verify_api_key)])
+async def get_pool_stats():
+    """
+    Returns the state of the database connection pool.
+
+    Returns:
+        dict: Pool occupancy (idle, checked out, overflow), checkout count and wait time, timeouts,
+        connections opened and invalidated, and health check results since startup.
+    """
+    return pool_manager.snapshot()
+
+
+@router.get("/admin/jobs", dependencies=[Depends(verify_api_key)])
+async def get_job_stats():
+    """
+    Returns the statistics of the maintenance jobs run by this worker.
+
+    Returns:
+        dict: Per job, the runs by outcome (ok, skipped because another worker was the leader, failed), the rows
+        it purged or updated, and the time and duration of its last run.
+    """
+    return maintenance.snapshot()
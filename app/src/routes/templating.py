@@ -12,7 +12,6 @@ from app.src.util.crud.photo import get_post_by_id, get_photo, PhotoService
 from app.src.util.db import get_db
 from app.src.util.models import User, Photo
 from app.src.util.schemas.user import User as UserSchema, UserProfile
-from app.src.services.aggregator import Aggregator
 
 router = APIRouter()
 
@@ -175,7 +174,7 @@ async def edit_photo(photo_id: int, request: Request, db: AsyncSession = Depends
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
 
 
-    if photo.owner.id != current_user.id:
+    if photo.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not allowed to edit this photo")
 
     return templates.TemplateResponse("edit_photo.html",
@@ -201,7 +200,7 @@ async def get_user_photos(request: Request, db: AsyncSession = Depends(get_db),
 @router.get("/photo/show-qr/{photo_id}", response_class=HTMLResponse)
 async def display_qr_code(photo_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Display the QR code for a photo URL by calling the existing POST endpoint.
+    Display the QR code for a photo URL. The image itself is served by /photo/qr/{photo_id}.
 
     Args:
         photo_id (int): The unique identifier of the photo.
@@ -211,11 +210,11 @@ async def display_qr_code(photo_id: int, request: Request, db: AsyncSession = De
     Returns:
         TemplateResponse: The rendered template with the QR code.
     """
-    qr_code = await Aggregator.generate_qr(photo_id, db)
+    photo = await get_photo(db, photo_id)
     ref = request.headers.get("referer")
     return templates.TemplateResponse("qr_code.html", {
         "request": request,
-        "qr_code": qr_code,
+        "photo": photo,
         "referer": ref,
     })
 
@@ -31,7 +31,7 @@ async def get_users(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(g
     return users
 
 
-@router.get("/{user_id}", response_model=schema_user.User, dependencies=[Depends(verify_api_key)])
+@router.get("/{user_id:int}", response_model=schema_user.User, dependencies=[Depends(verify_api_key)])
 @log_function
 async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """
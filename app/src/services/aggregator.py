@@ -1,30 +1,51 @@
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.src.util.crud.photo import get_photo, PhotoService
+
+from app.src.services.qr_codes import qr_code_cache, MEDIA_TYPES
+from app.src.util.crud.photo import get_photo
 
 
 class Aggregator:
     """Class for storing shared logic for various endpoints."""
     @staticmethod
-    async def generate_qr(photo_id: int, db: AsyncSession):
+    async def generate_qr(photo_id: int, db: AsyncSession, request: Request, fmt: str = "png") -> Response:
         """
         Shared logic for generating a QR code for a photo.
 
+        The QR code is served from the QR code cache as raw image bytes with an ETag. Since the ETag only depends
+        on the absolute photo URL and the format, a client revalidating with If-None-Match gets a 304 without any
+        rendering. Relative photo URLs are resolved against settings.PUBLIC_BASE_URL, or the request's base URL.
+        The response is marked no-cache: the photo URL changes after a resize or a filter, so clients must
+        revalidate on every use, which costs a 304 while the URL is unchanged.
+
         Args:
             photo_id (int): The unique identifier of the photo.
             db (AsyncSession): The SQLAlchemy asynchronous session.
+            request (Request): The HTTP request, used to resolve relative photo URLs and for If-None-Match.
+            fmt (str): "png" or "svg".
 
         Returns:
-            QR code image or raises an HTTPException if the photo is not found.
+            Response: The QR code image, or an empty 304 response.
+
+        Raises:
+            HTTPException: If the photo is not found or has no URL yet, or the format is not supported.
         """
 
         photo = await get_photo(db, photo_id)
-        if photo is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not Found")
-
-        qr_code = await PhotoService.generate_qr_code(photo.url)
-        if qr_code is None:
+        if photo is None or not photo.url:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="QR Code not Found")
-
-        return qr_code
-
+        if fmt not in MEDIA_TYPES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported QR code format: {fmt}")
+
+        request_base_url = str(request.base_url)
+        etag = qr_code_cache.etag_for(photo.url, fmt, request_base_url)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        qr_code = await qr_code_cache.get(photo.url, fmt, request_base_url)
+        return Response(content=qr_code.content, media_type=qr_code.media_type, headers=headers)
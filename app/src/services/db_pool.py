@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.src.config.config import settings
+from app.src.services.request_metrics import DURATION_BUCKETS_S, PREFIX, Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports how long every checkout waited for a connection to pool_manager."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_manager.timeouts += 1
+            raise
+        finally:
+            pool_manager.wait.observe(time.perf_counter() - started)
+
+
+async def warmup(engine, connections: int) -> int:
+    """
+    Opens connections concurrently and returns them to the pool, so the first requests do not pay for the
+    connection handshakes.
+
+    Args:
+        engine (AsyncEngine): The engine whose pool to fill.
+        connections (int): The number of connections to open, at most the pool size is kept.
+
+    Returns:
+        int: The number of connections opened.
+    """
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        # Connections beyond the pool size are overflow, closed as soon as they are returned.
+        connections = min(connections, pool_size())
+    connections = max(0, connections)
+    errors = await _hold_connections(engine, connections)
+    return connections - len(errors)
+
+
+async def _hold_connections(engine, count: int) -> List[BaseException]:
+    """Checks out ``count`` distinct connections at once, runs SELECT 1 on each, and returns the errors."""
+    pending = count
+    all_open = asyncio.Event()
+    errors = []
+
+    async def ping():
+        nonlocal pending
+        try:
+            async with engine.connect() as conn:
+                try:
+                    await conn.execute(text("SELECT 1"))
+                except exc.DBAPIError as error:
+                    # A disconnect is detected by SQLAlchemy, which invalidates the connection itself.
+                    if not conn.invalidated:
+                        await conn.invalidate()
+                    errors.append(error)
+                pending -= 1
+                if pending == 0:
+                    all_open.set()
+                # Hold the connection until all are checked out, otherwise the same one is checked out again.
+                await all_open.wait()
+        except Exception:
+            all_open.set()
+            raise
+
+    await asyncio.gather(*(ping() for _ in range(count)))
+    return errors
+
+
+async def _ping_one(engine, timeout: float) -> Optional[BaseException]:
+    """
+    Checks out one connection and runs SELECT 1 on it, the checkout included in the timeout.
+
+    Returns:
+        Optional[BaseException]: The error if the connection is dead, None if it answered.
+    """
+    async def ping():
+        async with engine.connect() as conn:
+            try:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+            except (exc.DBAPIError, asyncio.TimeoutError) as error:
+                # A disconnect is detected by SQLAlchemy, which invalidates the connection itself.
+                if not conn.invalidated:
+                    await conn.invalidate()
+                return error
+        return None
+
+    try:
+        return await asyncio.wait_for(ping(), timeout)
+    except asyncio.TimeoutError as error:
+        return error
+
+
+class PoolManager:
+    """
+    Health and statistics of the connection pool of the application engine.
+
+    Instead of pinging every connection on checkout (pool_pre_ping, one extra round trip per request), the
+    connections idle in the pool are checked in the background every ``health_check_seconds``: one at a time,
+    each one is checked out and sent SELECT 1, the dead ones are invalidated and replaced on their next checkout.
+    Connections are also recycled after settings.DB_POOL_RECYCLE_SECONDS. A connection that dies between two
+    checks fails the statement that uses it, after which SQLAlchemy invalidates the whole pool.
+
+    Pool occupancy, checkout wait times, timeouts and connection churn are exposed by snapshot() and render().
+    """
+
+    def __init__(self, health_check_seconds: float, health_check_timeout: float = 5.0):
+        self.health_check_seconds = health_check_seconds
+        self.health_check_timeout = health_check_timeout
+        self.engine = None
+        self.wait = Histogram(DURATION_BUCKETS_S)
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.health_checks = 0
+        self.health_check_failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def attach(self, engine) -> None:
+        """
+        Manages the pool of an engine, created with poolclass=InstrumentedPool.
+
+        Args:
+            engine (AsyncEngine): The engine of the application.
+        """
+        self.engine = engine
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+        event.listen(engine.sync_engine, "invalidate", self._on_invalidate)
+
+    async def check_idle_connections(self) -> int:
+        """
+        Pings the connections idle in the pool and invalidates the dead ones.
+
+        The connections are checked out one at a time, so the check never holds more than one connection that
+        a request could use. The pool is FIFO: a connection returned after its ping goes behind the other idle
+        ones, so as many checkouts as there are idle connections visit each of them once. A checkout is only
+        made while a connection is idle, so the check never waits for the pool or opens an overflow connection.
+        The connections taken by requests in the meantime are skipped, traffic exercises them anyway.
+
+        Returns:
+            int: The number of dead connections found.
+        """
+        pool = self.engine.pool
+        idle = pool.checkedin()
+        if not idle:
+            return 0
+        dead = 0
+        for _ in range(idle):
+            if not pool.checkedin():
+                break
+            if await _ping_one(self.engine, self.health_check_timeout) is not None:
+                dead += 1
+        self.health_checks += 1
+        self.health_check_failures += dead
+        if dead:
+            logger.warning("Pool health check: %d of %d idle connections were dead", dead, idle)
+        return dead
+
+    def start(self) -> None:
+        """Starts the background health checks, if enabled."""
+        if self.health_check_seconds and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the background health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        """Returns the current occupancy of the pool and the statistics collected since startup."""
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "checkouts": self.wait.count,
+            "wait_ms_total": round(self.wait.sum * 1000, 3),
+            "wait_ms_avg": round(self.wait.sum * 1000 / self.wait.count, 3) if self.wait.count else 0.0,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "health_checks": self.health_checks,
+            "health_check_failures": self.health_check_failures,
+        }
+
+    def render(self) -> str:
+        """Returns the pool metrics in the Prometheus text format, version 0.0.4."""
+        snapshot = self.snapshot()
+        lines = []
+        for name, kind, help_text, value in (
+            ("db_pool_size", "gauge", "Persistent connections of the pool.", snapshot["size"]),
+            ("db_pool_checked_in", "gauge", "Connections idle in the pool.", snapshot["checked_in"]),
+            ("db_pool_checked_out", "gauge", "Connections in use.", snapshot["checked_out"]),
+            ("db_pool_overflow", "gauge", "Connections open beyond the pool size.", snapshot["overflow"]),
+            ("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.",
+             snapshot["timeouts"]),
+            ("db_pool_connects_total", "counter", "Connections opened.", snapshot["connects"]),
+            ("db_pool_invalidations_total", "counter", "Connections invalidated.", snapshot["invalidations"]),
+            ("db_pool_health_check_failures_total", "counter", "Idle connections found dead by the health check.",
+             snapshot["health_check_failures"]),
+        ):
+            lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} {kind}",
+                      f"{PREFIX}_{name} {value}"]
+        lines += [f"# HELP {PREFIX}_db_pool_wait_seconds Time spent waiting for a connection on checkout.",
+                  f"# TYPE {PREFIX}_db_pool_wait_seconds histogram"]
+        lines += self.wait.samples(f"{PREFIX}_db_pool_wait_seconds")
+        return "\n".join(lines) + "\n"
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_seconds)
+            try:
+                await self.check_idle_connections()
+            except Exception:
+                logger.exception("Pool health check failed")
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+
+pool_manager = PoolManager(health_check_seconds=settings.DB_POOL_HEALTH_CHECK_SECONDS)
@@ -0,0 +1,158 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from app.src.config.config import settings
+from app.src.util.models.user import UserRole
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Immutable, session-independent copy of the fields of a User that request handlers rely on.
+
+    Attributes:
+        id (int): The primary key of the user.
+        email (str): The email of the user.
+        username (str): The username of the user.
+        role (UserRole): The role of the user.
+        is_active (bool): Indicates if the user is active.
+        registered_at (datetime): The timestamp when the user was registered.
+        last_login (datetime): The timestamp of the user's last login.
+        photos_uploaded (int): The number of photos uploaded.
+    """
+    id: int
+    email: str
+    username: str
+    role: UserRole
+    is_active: bool
+    registered_at: Optional[datetime]
+    last_login: Optional[datetime]
+    photos_uploaded: int
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        """
+        Builds a snapshot from a User model instance.
+
+        Args:
+            user (User): The user loaded from the database.
+
+        Returns:
+            UserSnapshot: The snapshot of the user.
+        """
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            registered_at=user.registered_at,
+            last_login=user.last_login,
+            photos_uploaded=user.photos_uploaded,
+        )
+
+
+class IdentityCache:
+    """
+    Bounded LRU cache mapping an access token to its decoded claims and a snapshot of the user it belongs to.
+
+    Each entry lives until the earlier of the token's ``exp`` claim and ``ttl_seconds`` after it was stored,
+    the latter bounds how long other workers may serve a stale identity after a ban. Revoked
+    tokens are rejected before the cache is consulted.
+    The cache is used from the event loop only, so no locking is needed.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict, UserSnapshot]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[Tuple[dict, UserSnapshot]]:
+        """
+        Returns the cached claims and user snapshot for a token, or None on a miss or an expired entry.
+
+        Args:
+            token (str): The raw access token.
+
+        Returns:
+            Optional[Tuple[dict, UserSnapshot]]: The decoded claims and the user snapshot.
+        """
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, claims, user = entry
+        if expires_at <= time.time():
+            self._discard(token)
+            return None
+        self._entries.move_to_end(token)
+        return claims, user
+
+    def put(self, token: str, claims: dict, user: UserSnapshot) -> None:
+        """
+        Stores the claims and user snapshot of a token, evicting the least recently used entry when full.
+
+        Args:
+            token (str): The raw access token.
+            claims (dict): The decoded JWT claims.
+            user (UserSnapshot): The snapshot of the user the token belongs to.
+        """
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+
+        self._discard(token)
+        self._entries[token] = (expires_at, claims, user)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest_token = next(iter(self._entries))
+            self._discard(oldest_token)
+
+    def invalidate_token(self, token: str) -> None:
+        """
+        Removes a single token from the cache, e.g. on logout.
+
+        Args:
+            token (str): The raw access token, with or without the "Bearer " prefix.
+        """
+        self._discard(token.replace("Bearer ", ""))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Removes every cached token of a user, e.g. after a ban.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._discard(token)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[2].id
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+identity_cache = IdentityCache(max_size=settings.USER_CACHE_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
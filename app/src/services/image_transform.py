@@ -0,0 +1,116 @@
+import os
+from typing import Dict, Tuple
+
+from PIL import Image, ImageEnhance, ImageOps
+
+# Local approximations of the Cloudinary "art:" filters offered in the UI, as
+# (color, contrast, brightness, grayscale) adjustments.
+FILTERS: Dict[str, Tuple[float, float, float, bool]] = {
+    "al_dente": (1.1, 1.3, 1.0, False),
+    "athena": (0.7, 1.1, 1.05, False),
+    "audrey": (0.0, 1.3, 1.0, True),
+    "aurora": (1.3, 0.9, 1.1, False),
+    "daguerre": (0.0, 1.5, 0.95, True),
+    "eucalyptus": (0.8, 1.0, 1.05, False),
+    "fes": (1.2, 1.1, 1.0, False),
+    "frost": (0.6, 0.9, 1.15, False),
+    "hairspray": (1.4, 1.2, 1.05, False),
+    "hokusai": (1.5, 1.3, 0.95, False),
+    "incognito": (0.3, 1.2, 0.9, False),
+    "primavera": (1.3, 1.0, 1.1, False),
+    "quartz": (0.5, 1.2, 1.1, False),
+    "red_rock": (1.4, 1.2, 0.95, False),
+    "refresh": (1.2, 1.1, 1.1, False),
+    "sizzle": (1.6, 1.3, 1.0, False),
+    "sonnet": (0.8, 0.9, 1.05, False),
+    "ukulele": (1.3, 1.1, 1.05, False),
+    "zorro": (0.0, 1.6, 0.9, True),
+}
+
+FORMAT_EXTENSIONS = {
+    "JPEG": ".jpg",
+    "PNG": ".png",
+    "GIF": ".gif",
+    "WEBP": ".webp",
+    "BMP": ".bmp",
+    "TIFF": ".tiff",
+}
+
+
+def detect_extension(path: str) -> str:
+    """
+    Returns the file extension matching the image format of a file.
+
+    Raises:
+        ValueError: If the file is not an image in a supported format.
+    """
+    try:
+        with Image.open(path) as img:
+            image_format = img.format
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("File is not a supported image") from e
+    if image_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    return FORMAT_EXTENSIONS[image_format]
+
+
+def apply_transform(source_path: str, target_path: str, spec: dict) -> None:
+    """
+    Writes a transformed copy of an image.
+
+    Args:
+        source_path (str): The original image.
+        target_path (str): Where to write the result. The format is taken from its extension.
+        spec (dict): Either {"width": int, "height": int} to crop-fill to that size,
+            or {"filter": str} with one of FILTERS.
+
+    Raises:
+        ValueError: If the spec is invalid.
+    """
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if "filter" in spec:
+            if spec["filter"] not in FILTERS:
+                raise ValueError(f"Unknown filter: {spec['filter']}")
+            color, contrast, brightness, grayscale = FILTERS[spec["filter"]]
+            img = img.convert("RGB")
+            if grayscale:
+                img = ImageOps.grayscale(img).convert("RGB")
+            else:
+                img = ImageEnhance.Color(img).enhance(color)
+            img = ImageEnhance.Contrast(img).enhance(contrast)
+            img = ImageEnhance.Brightness(img).enhance(brightness)
+        else:
+            width, height = int(spec.get("width", 0)), int(spec.get("height", 0))
+            if width <= 0 or height <= 0:
+                raise ValueError("Invalid width or height")
+            img = ImageOps.fit(img, (width, height), method=Image.LANCZOS, centering=(0.5, 0.5))
+
+        if target_path.lower().endswith((".jpg", ".jpeg")) and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(target_path)
+
+
+def render_variant(source_path: str, target_stem: str, spec: dict) -> str:
+    """
+    Renders a variant next to ``target_stem`` and returns its path.
+
+    The variant is written as PNG if the source has an alpha channel and as JPEG otherwise. It is first written
+    to a temporary file and then moved into place, so readers never see a partial file. Module-level so that it
+    can be run in a worker process.
+
+    Raises:
+        ValueError: If the spec is invalid.
+    """
+    with Image.open(source_path) as img:
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+    extension = ".png" if has_alpha and "filter" not in spec else ".jpg"
+    target_path = target_stem + extension
+    temp_path = f"{target_stem}.{os.getpid()}.tmp{extension}"
+    try:
+        apply_transform(source_path, temp_path, spec)
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return target_path
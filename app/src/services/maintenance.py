@@ -0,0 +1,286 @@
+import hashlib
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import and_, delete, func, insert, literal_column, select, update
+
+from app.src.config.config import settings
+from app.src.services.request_metrics import PREFIX, Histogram, _escape
+from app.src.util.db import AsyncSessionLocal, async_engine
+from app.src.util.models import MaintenanceRun
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the job runtime histogram buckets. A +Inf bucket is always added.
+JOB_DURATION_BUCKETS_S = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+INTERVAL_UNITS = ("weeks", "days", "hours", "minutes", "seconds")
+
+
+def lock_key(name: str) -> int:
+    """Returns a stable signed 64-bit advisory lock key for a job name."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+@asynccontextmanager
+async def advisory_lock(name: str, engine=async_engine) -> AsyncIterator[bool]:
+    """
+    Tries to take the PostgreSQL session advisory lock of a name, without waiting.
+
+    Yields True if this process holds the lock until the block exits, False if another process holds it.
+    On other databases there is a single process, which always gets the lock.
+
+    Args:
+        name (str): The name of the lock, e.g. the job name.
+        engine (AsyncEngine): The engine to take the lock on. A connection is held for the duration of the block.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    key = lock_key(name)
+    async with engine.connect() as conn:
+        acquired = (await conn.execute(select(func.pg_try_advisory_lock(key)))).scalar()
+        await conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.execute(select(func.pg_advisory_unlock(key)))
+                await conn.commit()
+
+
+async def delete_in_batches(model, condition, key_column=None, batch_size: int = settings.MAINTENANCE_BATCH_SIZE,
+                            time_budget: Optional[float] = None, session_factory=AsyncSessionLocal) -> int:
+    """
+    Deletes the rows of a model matching a condition, at most ``batch_size`` rows per transaction.
+
+    Every batch is a single statement committed on its own, so locks are held briefly and concurrent writers
+    are never blocked by one long DELETE. On PostgreSQL a batch is
+    ``DELETE ... WHERE ctid IN (SELECT ctid ... WHERE condition LIMIT batch_size)``, elsewhere the primary
+    key is used instead of ctid.
+
+    With ``key_column``, an indexed column of the condition such as an expiry, the rows are deleted in its
+    order and every batch starts at the last key deleted by the previous one (DELETE ... RETURNING). Each batch
+    is then a short range scan of the index, instead of a scan that walks again over the index entries of the
+    rows deleted but not yet vacuumed. Only the keys of one batch are ever held in memory.
+
+    Args:
+        model: The model whose rows to delete.
+        condition: The WHERE clause selecting the rows to delete.
+        key_column: An indexed column to delete the rows in the order of, or None.
+        batch_size (int): The maximum number of rows deleted per transaction.
+        time_budget (Optional[float]): Seconds after which no new batch is started, the remaining rows are left
+            to the next run. None to delete every matching row. At least one batch is always run.
+        session_factory: Creates the session to run the batches in.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    started = time.perf_counter()
+    table = model.__table__
+    deleted = 0
+    lower_bound = None
+    async with session_factory() as db:
+        dialect = db.bind.dialect
+        if dialect.name == "postgresql":
+            row_id = literal_column("ctid")
+        else:
+            row_id = list(table.primary_key.columns)[0]
+        keyset = key_column is not None and dialect.delete_returning
+        while True:
+            where = condition if lower_bound is None else and_(condition, key_column >= lower_bound)
+            batch = select(row_id).select_from(table).where(where)
+            if key_column is not None:
+                batch = batch.order_by(key_column)
+            statement = delete(table).where(row_id.in_(batch.limit(batch_size).scalar_subquery()))
+            if keyset:
+                keys = (await db.execute(statement.returning(key_column))).scalars().all()
+                count = len(keys)
+                if count:
+                    lower_bound = max(keys)
+            else:
+                count = (await db.execute(statement)).rowcount
+            await db.commit()
+            deleted += count
+            if count < batch_size:
+                return deleted
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                logger.info("Deleted %d %s rows, stopped after the time budget of %.1f s", deleted, table.name,
+                            time_budget)
+                return deleted
+
+
+class JobStats:
+    """Outcomes, rows affected and runtime of one maintenance job."""
+
+    __slots__ = ("runs", "rows", "duration", "last_run_at", "last_duration_s")
+
+    def __init__(self):
+        self.runs: Dict[str, int] = {"ok": 0, "skipped": 0, "failed": 0}
+        self.rows = 0
+        self.duration = Histogram(JOB_DURATION_BUCKETS_S)
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_s: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "runs": dict(self.runs),
+            "rows": self.rows,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_s": round(self.last_duration_s, 3) if self.last_duration_s is not None else None,
+        }
+
+
+class MaintenanceScheduler:
+    """
+    Periodic maintenance jobs (purges, reconciliations, leaderboard refreshes) that are safe to schedule in every
+    worker of a multi-process deployment.
+
+    Every worker schedules every job, with a random jitter so the workers do not all wake up at the same moment.
+    A run first takes the PostgreSQL advisory lock of its job, which keeps two workers from running it at once.
+    The worker that gets the lock then checks the job's row in maintenance_runs: if another worker already ran
+    the job in the current interval it skips the run, otherwise it records the run and does it. So an interval
+    job runs once per interval across the deployment, whichever worker fires first. A leader that dies releases
+    its lock with its connection, so the next run is picked up by another worker.
+
+    Runs are counted by outcome ("ok", "skipped" when another worker holds the lock or already ran the job in
+    this interval, "failed"), and the rows reported by the job (its return value, when it is an int) and its
+    runtime are recorded.
+    """
+
+    def __init__(self, engine=async_engine, jitter_seconds: int = settings.MAINTENANCE_JITTER_SECONDS):
+        self.engine = engine
+        self.jitter_seconds = jitter_seconds
+        self._scheduler = AsyncIOScheduler()
+        self._stats: Dict[str, JobStats] = {}
+        self._min_gaps: Dict[str, timedelta] = {}
+        self._lock = threading.Lock()
+
+    def add_job(self, func: Callable[[], Awaitable], trigger: str = "interval", name: Optional[str] = None,
+                **trigger_args) -> None:
+        """
+        Schedules a job.
+
+        Args:
+            func (Callable[[], Awaitable]): The coroutine function of the job. It may return the number of rows
+                it affected.
+            trigger (str): The APScheduler trigger, "interval" by default.
+            name (Optional[str]): The name of the job, also its lock name. Defaults to the function name.
+            **trigger_args: The trigger arguments, e.g. minutes=30, and other add_job options such as
+                next_run_time.
+        """
+        name = name or func.__name__
+        self._stats[name] = JobStats()
+        trigger_args.setdefault("jitter", self.jitter_seconds or None)
+        if trigger == "interval":
+            interval = timedelta(**{unit: trigger_args[unit] for unit in INTERVAL_UNITS if unit in trigger_args})
+            # A run is skipped if the last one started less than an interval ago, less the jitter so that runs
+            # fired early in the next interval are not skipped too.
+            self._min_gaps[name] = max(interval - timedelta(seconds=trigger_args["jitter"] or 0), interval / 2)
+        self._scheduler.add_job(self.run, trigger, args=[name, func], id=name, name=name, **trigger_args)
+
+    async def _claim(self, name: str) -> bool:
+        """
+        Records a run of a job in maintenance_runs, unless it already ran in the current interval.
+
+        To be called while holding the job's advisory lock. Jobs with a trigger other than "interval" are
+        recorded but never skipped.
+
+        Args:
+            name (str): The name of the job.
+
+        Returns:
+            bool: True if the run was recorded and is to be done, False if it is to be skipped.
+        """
+        now = datetime.utcnow()
+        min_gap = self._min_gaps.get(name)
+        table = MaintenanceRun.__table__
+        async with self.engine.begin() as conn:
+            last_run_at = (await conn.execute(select(table.c.last_run_at).where(table.c.name == name))).scalar()
+            if last_run_at is None:
+                await conn.execute(insert(table).values(name=name, last_run_at=now))
+                return True
+            if min_gap is not None and now - last_run_at < min_gap:
+                return False
+            await conn.execute(update(table).where(table.c.name == name).values(last_run_at=now))
+        return True
+
+    async def run(self, name: str, func: Callable[[], Awaitable]) -> None:
+        """
+        Runs a job if this worker wins its advisory lock and the job was not run in the current interval yet,
+        and records the outcome.
+
+        Args:
+            name (str): The name of the job.
+            func (Callable[[], Awaitable]): The coroutine function of the job.
+        """
+        stats = self._stats.setdefault(name, JobStats())
+        async with advisory_lock(f"maintenance:{name}", self.engine) as leader:
+            if not leader:
+                with self._lock:
+                    stats.runs["skipped"] += 1
+                logger.debug("Maintenance job %s skipped, another worker is running it", name)
+                return
+            if not await self._claim(name):
+                with self._lock:
+                    stats.runs["skipped"] += 1
+                logger.debug("Maintenance job %s skipped, another worker ran it in this interval", name)
+                return
+            started = time.perf_counter()
+            outcome = "failed"
+            try:
+                result = await func()
+                outcome = "ok"
+            except Exception:
+                logger.exception("Maintenance job %s failed", name)
+                result = None
+            finally:
+                duration = time.perf_counter() - started
+                with self._lock:
+                    stats.runs[outcome] += 1
+                    stats.duration.observe(duration)
+                    stats.last_run_at = datetime.utcnow()
+                    stats.last_duration_s = duration
+                    if isinstance(result, int) and not isinstance(result, bool):
+                        stats.rows += result
+        logger.info("Maintenance job %s %s in %.3f s (%s)", name, outcome, duration, result)
+
+    def start(self) -> None:
+        """Starts the scheduler, from the running event loop."""
+        if not self._scheduler.running:
+            self._scheduler.start()
+
+    def shutdown(self) -> None:
+        """Stops the scheduler without waiting for running jobs."""
+        if self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+
+    def snapshot(self) -> dict:
+        """Returns the statistics of every job."""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
+
+    def render(self) -> str:
+        """Returns the job metrics in the Prometheus text format, version 0.0.4."""
+        runs = [f"# HELP {PREFIX}_job_runs_total Maintenance job runs, by outcome.",
+                f"# TYPE {PREFIX}_job_runs_total counter"]
+        rows = [f"# HELP {PREFIX}_job_rows_total Rows affected by maintenance jobs.",
+                f"# TYPE {PREFIX}_job_rows_total counter"]
+        durations = [f"# HELP {PREFIX}_job_duration_seconds Runtime of maintenance jobs.",
+                     f"# TYPE {PREFIX}_job_duration_seconds histogram"]
+        with self._lock:
+            for name, stats in sorted(self._stats.items()):
+                labels = f'job="{_escape(name)}"'
+                for outcome, count in stats.runs.items():
+                    runs.append(f'{PREFIX}_job_runs_total{{{labels},outcome="{outcome}"}} {count}')
+                rows.append(f"{PREFIX}_job_rows_total{{{labels}}} {stats.rows}")
+                durations += stats.duration.samples(f"{PREFIX}_job_duration_seconds", labels)
+        return "\n".join(runs + rows + durations) + "\n"
+
+
+maintenance = MaintenanceScheduler()
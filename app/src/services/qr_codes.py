@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import qrcode
+import qrcode.image.svg
+
+from app.src.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+class QRCodeImage(NamedTuple):
+    """A rendered QR code: its bytes, media type and ETag."""
+    content: bytes
+    media_type: str
+    etag: str
+
+
+class QRCodeCache:
+    """
+    Renders QR codes for URLs and memoizes them in two tiers.
+
+    The first tier is an in-memory LRU of ``max_size`` images, the second one is a directory of rendered files
+    that survives restarts and is shared by the workers of a host. Images are keyed by (absolute URL, format),
+    and the ETag is derived from the same key, so it is known before rendering and conditional requests can be
+    answered without touching either tier. Rendering runs on the default executor, off the event loop.
+
+    Relative photo URLs are resolved against ``base_url`` (settings.PUBLIC_BASE_URL). Without it they are
+    resolved against the base URL of the request, which comes from the client's Host header: those images are
+    only kept in the bounded memory tier, so arbitrary Host values cannot fill the disk.
+    """
+
+    def __init__(self, max_size: int, cache_dir: Optional[str], base_url: Optional[str] = None):
+        self.max_size = max_size
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self.base_url = base_url
+        self._entries: "OrderedDict[Tuple[str, str], QRCodeImage]" = OrderedDict()
+        self._keys_by_url: Dict[str, Set[Tuple[str, str]]] = {}
+        self._url_by_key: Dict[Tuple[str, str], str] = {}
+
+    def resolve(self, url: str, request_base_url: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Returns the absolute URL a QR code encodes for a photo URL.
+
+        Args:
+            url (str): The URL as stored on the photo.
+            request_base_url (Optional[str]): The base URL of the request, used if no base URL is configured.
+
+        Returns:
+            Tuple[str, bool]: The absolute URL, and whether it is independent of the request.
+        """
+        if urlparse(url).scheme:
+            return url, True
+        if self.base_url:
+            return urljoin(self.base_url, url), True
+        if request_base_url:
+            return urljoin(request_base_url, url), False
+        return url, True
+
+    def etag_for(self, url: str, fmt: str, request_base_url: Optional[str] = None) -> str:
+        """Returns the ETag of the QR code of a photo URL in the given format."""
+        return f'"{_digest(self.resolve(url, request_base_url)[0], fmt)}"'
+
+    async def get(self, url: str, fmt: str = "png", request_base_url: Optional[str] = None) -> QRCodeImage:
+        """
+        Returns the QR code of a URL, rendering it on a miss.
+
+        Args:
+            url (str): The URL to encode, as stored on the photo.
+            fmt (str): "png" or "svg".
+            request_base_url (Optional[str]): The base URL of the request, relative URLs are resolved against it
+                when settings.PUBLIC_BASE_URL is not set.
+
+        Returns:
+            QRCodeImage: The rendered QR code.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported QR code format: {fmt}")
+        absolute_url, trusted = self.resolve(url, request_base_url)
+        key = (absolute_url, fmt)
+        image = self._entries.get(key)
+        if image is not None:
+            self._entries.move_to_end(key)
+            return image
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(None, self._load_or_render, absolute_url, fmt, trusted)
+        image = QRCodeImage(content=content, media_type=MEDIA_TYPES[fmt], etag=f'"{_digest(absolute_url, fmt)}"')
+        self._put(url, key, image)
+        return image
+
+    def invalidate(self, url: Optional[str]) -> None:
+        """
+        Drops the cached QR codes of a URL from both tiers, e.g. after the URL of a photo changed.
+
+        Args:
+            url (Optional[str]): The URL whose QR codes are no longer needed.
+        """
+        if not url:
+            return
+        for key in self._keys_by_url.pop(url, set()):
+            self._entries.pop(key, None)
+            self._url_by_key.pop(key, None)
+        absolute_url, trusted = self.resolve(url)
+        if not trusted:
+            return
+        for fmt in MEDIA_TYPES:
+            path = self._path(absolute_url, fmt)
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        """Removes all in-memory entries."""
+        self._entries.clear()
+        self._keys_by_url.clear()
+        self._url_by_key.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, url: str, key: Tuple[str, str], image: QRCodeImage) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = image
+        self._entries.move_to_end(key)
+        self._keys_by_url.setdefault(url, set()).add(key)
+        self._url_by_key[key] = url
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            evicted_url = self._url_by_key.pop(evicted, None)
+            keys = self._keys_by_url.get(evicted_url)
+            if keys is not None:
+                keys.discard(evicted)
+                if not keys:
+                    del self._keys_by_url[evicted_url]
+
+    def _path(self, absolute_url: str, fmt: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{_digest(absolute_url, fmt)}.{fmt}")
+
+    def _load_or_render(self, absolute_url: str, fmt: str, persist: bool) -> bytes:
+        path = self._path(absolute_url, fmt) if persist else None
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                pass
+
+        content = render_qr_code(absolute_url, fmt)
+        if path is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+            except OSError:
+                logger.warning("Could not write QR code to %s", path, exc_info=True)
+        return content
+
+
+def _digest(url: str, fmt: str) -> str:
+    return hashlib.sha256(f"{fmt}\n{url}".encode("utf-8")).hexdigest()[:32]
+
+
+def render_qr_code(data: str, fmt: str = "png") -> bytes:
+    """
+    Renders a QR code. This call is CPU bound, run it off the event loop.
+
+    Args:
+        data (str): The data to encode.
+        fmt (str): "png" or "svg".
+
+    Returns:
+        bytes: The encoded image.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    if fmt == "svg":
+        qr_code = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        qr_code = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = io.BytesIO()
+    qr_code.save(buffer)
+    return buffer.getvalue()
+
+
+qr_code_cache = QRCodeCache(max_size=settings.QR_CACHE_SIZE, cache_dir=settings.QR_CACHE_DIR,
+                            base_url=settings.PUBLIC_BASE_URL)
@@ -0,0 +1,246 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.src.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in milliseconds, of the statement duration histogram buckets. The last bucket is unbounded.
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class StatementStats:
+    """Duration histogram of one SQL statement."""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets: List[int] = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect_left(BUCKETS_MS, duration_ms)] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request issues more statements than its query budget allows, in strict mode."""
+
+
+class RequestQueries:
+    """Queries issued while serving one request, attributed to its route when the request is done."""
+
+    __slots__ = ("route", "count", "total_ms", "budget", "strict", "exceeded")
+
+    def __init__(self, budget: Optional[int] = None, strict: bool = False):
+        self.route: Optional[str] = None
+        self.count = 0
+        self.total_ms = 0.0
+        self.budget = budget
+        self.strict = strict
+        self.exceeded: Optional[str] = None
+
+
+class RouteStats:
+    """Aggregated query counts of a route."""
+
+    __slots__ = ("requests", "queries", "total_ms", "max_queries")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.total_ms = 0.0
+        self.max_queries = 0
+
+    def add(self, request: RequestQueries) -> None:
+        self.requests += 1
+        self.queries += request.count
+        self.total_ms += request.total_ms
+        self.max_queries = max(self.max_queries, request.count)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": round(self.queries / self.requests, 2) if self.requests else 0.0,
+            "max_queries": self.max_queries,
+            "query_ms": round(self.total_ms, 3),
+        }
+
+
+_current_request: ContextVar[Optional[RequestQueries]] = ContextVar("current_request_queries", default=None)
+
+
+class QueryStats:
+    """
+    Lightweight SQL instrumentation built on the before/after_cursor_execute engine events.
+
+    Every statement is timed and added to a per-statement duration histogram. Statements slower than
+    ``slow_query_ms`` are logged with their duration and route, without parameters. Queries issued inside
+    track_request() are also aggregated per route. This replaces engine echo, which logged every statement
+    with its parameters.
+
+    Statements are keyed by their SQL text, with whitespace collapsed and cut to ``max_statement_length``.
+    At most ``max_statements`` distinct statements are tracked, later ones are counted under "<other>".
+
+    A tracked request can be given a query budget. The statement that goes over it is logged, or in strict mode
+    fails with QueryBudgetExceeded, which is how N+1 and over-fetching regressions are caught in tests.
+    """
+
+    def __init__(self, slow_query_ms: Optional[float], max_statements: int = 500, max_statement_length: int = 300):
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self.max_statement_length = max_statement_length
+        self._statements: Dict[str, StatementStats] = {}
+        self._routes: Dict[str, RouteStats] = {}
+        self._budget: Optional[Tuple[int, List[RequestQueries]]] = None
+        self._lock = threading.Lock()
+
+    def attach(self, engine) -> None:
+        """
+        Starts timing the statements of an engine.
+
+        Args:
+            engine (Engine | AsyncEngine): The engine to instrument.
+        """
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    @contextmanager
+    def track_request(self, budget: Optional[int] = None, strict: bool = False) -> Iterator[RequestQueries]:
+        """
+        Collects the queries issued in the current context, e.g. while serving a request.
+
+        Set ``route`` on the yielded object before the block exits, the totals are then added to that route.
+
+        Args:
+            budget (Optional[int]): The number of statements the block may issue, None for no limit.
+            strict (bool): True to raise QueryBudgetExceeded from the statement over the budget instead of
+                logging a warning.
+        """
+        with self._lock:
+            if self._budget is None:
+                request = RequestQueries(budget=budget, strict=strict)
+            else:
+                request = RequestQueries(budget=self._budget[0], strict=True)
+                self._budget[1].append(request)
+        token = _current_request.set(request)
+        try:
+            yield request
+        finally:
+            _current_request.reset(token)
+            if request.route is not None:
+                with self._lock:
+                    stats = self._routes.get(request.route)
+                    if stats is None:
+                        stats = self._routes[request.route] = RouteStats()
+                    stats.add(request)
+
+    @contextmanager
+    def budget(self, max_queries: int) -> Iterator[RequestQueries]:
+        """
+        Fails the block with QueryBudgetExceeded if it, or any request served while it is open, issues more than
+        ``max_queries`` statements.
+
+        Meant for tests. ``with query_stats.budget(3): await get_photos_feed(db)`` fails at the statement over the
+        budget. ``with query_stats.budget(5): client.get("/photos/feed")`` holds every request served meanwhile,
+        in whatever thread or context, to the budget in strict mode, and fails when the block exits, since the
+        application turns the exception raised in the route into an error response. Queries issued directly
+        inside the block are not added to the per-route statistics. Budgets cannot be nested.
+        """
+        with self._lock:
+            if self._budget is not None:
+                raise RuntimeError("A query budget is already active")
+            self._budget = (max_queries, [])
+        try:
+            with self.track_request(budget=max_queries, strict=True) as request:
+                yield request
+        finally:
+            with self._lock:
+                requests = self._budget[1]
+                self._budget = None
+        exceeded = [tracked.exceeded for tracked in requests if tracked.exceeded]
+        if exceeded:
+            raise QueryBudgetExceeded(exceeded[0])
+
+    def snapshot(self) -> dict:
+        """Returns the collected statistics, statements sorted by total time."""
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "statements": [{"statement": sql, **stats.as_dict()} for sql, stats in statements],
+                "routes": {route: stats.as_dict() for route, stats in sorted(self._routes.items())},
+            }
+
+    def reset(self) -> None:
+        """Drops all collected statistics."""
+        with self._lock:
+            self._statements.clear()
+            self._routes.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        # after_cursor_execute is not called for a failed statement, drop its start time.
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        duration_ms = (time.perf_counter() - started) * 1000
+        sql = _WHITESPACE.sub(" ", statement).strip()[:self.max_statement_length]
+
+        with self._lock:
+            stats = self._statements.get(sql)
+            if stats is None:
+                key = sql if len(self._statements) < self.max_statements else "<other>"
+                stats = self._statements.setdefault(key, StatementStats())
+            stats.add(duration_ms)
+
+        request = _current_request.get()
+        if request is not None:
+            request.count += 1
+            request.total_ms += duration_ms
+            if request.budget is not None and request.count == request.budget + 1:
+                message = (f"Query budget of {request.budget} statements exceeded "
+                           f"(route {request.route or '-'}): {sql}")
+                request.exceeded = message
+                if request.strict:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+
+        if self.slow_query_ms is not None and duration_ms >= self.slow_query_ms:
+            logger.warning("Slow query (%.1f ms, route %s): %s", duration_ms,
+                           request.route if request is not None and request.route else "-", sql)
+
+
+query_stats = QueryStats(slow_query_ms=settings.SLOW_QUERY_MS)
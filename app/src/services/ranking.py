@@ -0,0 +1,56 @@
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+
+def bayesian_average(rating_count: int, rating_sum: int, prior_mean: float, prior_weight: float) -> float:
+    """
+    Returns the rating average of a photo pulled towards the site-wide mean.
+
+    A photo with a single 5 does not outrank one with a hundred 4.8s: each photo starts with ``prior_weight``
+    virtual ratings of ``prior_mean``, which real ratings progressively outweigh.
+
+    Args:
+        rating_count (int): The number of ratings of the photo.
+        rating_sum (int): The sum of the ratings of the photo.
+        prior_mean (float): The mean rating over all photos.
+        prior_weight (float): The number of virtual ratings.
+
+    Returns:
+        float: The Bayesian average.
+    """
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + rating_count)
+
+
+def decay(event_time: datetime, now: datetime, half_life_hours: float) -> float:
+    """Returns the weight of an event that happened at ``event_time``, halved every ``half_life_hours``."""
+    age_hours = max(0.0, (now - event_time).total_seconds() / 3600)
+    return 0.5 ** (age_hours / half_life_hours)
+
+
+def trending_scores(ratings: Iterable[Tuple[int, int, datetime]], comments: Iterable[Tuple[int, datetime]],
+                    now: datetime, half_life_hours: float, comment_weight: float, limit: int) -> List[Tuple[int, float]]:
+    """
+    Ranks photos by recent activity, every rating and comment counting less as it ages.
+
+    A rating weighs rating/5 and a comment ``comment_weight``, both multiplied by their decay().
+
+    Args:
+        ratings (Iterable[Tuple[int, int, datetime]]): (photo_id, rating, created_at) of the recent ratings.
+        comments (Iterable[Tuple[int, datetime]]): (photo_id, created_at) of the recent comments.
+        now (datetime): The reference time.
+        half_life_hours (float): The half-life of an event.
+        comment_weight (float): The weight of a comment relative to a 5-star rating.
+        limit (int): The number of photos to return.
+
+    Returns:
+        List[Tuple[int, float]]: (photo_id, score) of the ``limit`` best photos, best first.
+    """
+    scores: Dict[int, float] = {}
+    for photo_id, rating, created_at in ratings:
+        if created_at is not None:
+            scores[photo_id] = scores.get(photo_id, 0.0) + (rating or 0) / 5 * decay(created_at, now, half_life_hours)
+    for photo_id, created_at in comments:
+        if created_at is not None:
+            scores[photo_id] = scores.get(photo_id, 0.0) + comment_weight * decay(created_at, now, half_life_hours)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
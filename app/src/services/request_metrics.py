@@ -0,0 +1,124 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds of the histogram buckets, Prometheus style ("le"). A +Inf bucket is always added.
+DURATION_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+PREFIX = "photoshare"
+
+
+class Histogram:
+    """Cumulative-on-render histogram with fixed bucket bounds."""
+
+    __slots__ = ("bounds", "buckets", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.buckets: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str = "") -> List[str]:
+        lines = []
+        cumulative = 0
+        bucket_labels = f"{labels}," if labels else ""
+        series_labels = f"{{{labels}}}" if labels else ""
+        for bound, bucket in zip(list(self.bounds) + ["+Inf"], self.buckets):
+            cumulative += bucket
+            lines.append(f'{name}_bucket{{{bucket_labels}le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{series_labels} {self.sum:.6f}")
+        lines.append(f"{name}_count{series_labels} {self.count}")
+        return lines
+
+
+class RouteMetrics:
+    """Request, database time and statement count distributions of one route."""
+
+    __slots__ = ("duration", "db_duration", "queries", "responses")
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS_S)
+        self.db_duration = Histogram(DURATION_BUCKETS_S)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.responses: Dict[int, int] = {}
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics, rendered in the Prometheus text exposition format.
+
+    Routes are labelled by their path template (e.g. "/photos/{photo_id}"), so the number of series stays bounded
+    by the number of routes. Requests that match no route share the "unmatched" label.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status_code: int, duration_s: float, db_duration_s: float,
+                queries: int) -> None:
+        """
+        Records a served request.
+
+        Args:
+            method (str): The HTTP method.
+            route (str): The path template of the matched route.
+            status_code (int): The response status.
+            duration_s (float): The time spent serving the request, in seconds.
+            db_duration_s (float): The time spent executing SQL statements, in seconds.
+            queries (int): The number of SQL statements issued.
+        """
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.duration.observe(duration_s)
+            metrics.db_duration.observe(db_duration_s)
+            metrics.queries.observe(queries)
+            metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text format, version 0.0.4."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            requests = [f"# HELP {PREFIX}_http_requests_total Requests served, by route and status.",
+                        f"# TYPE {PREFIX}_http_requests_total counter"]
+            histograms = {
+                "duration": [f"# HELP {PREFIX}_http_request_duration_seconds Time spent serving a request.",
+                             f"# TYPE {PREFIX}_http_request_duration_seconds histogram"],
+                "db_duration": [f"# HELP {PREFIX}_db_duration_seconds Time spent in SQL statements per request.",
+                                f"# TYPE {PREFIX}_db_duration_seconds histogram"],
+                "queries": [f"# HELP {PREFIX}_db_queries_per_request SQL statements issued per request.",
+                            f"# TYPE {PREFIX}_db_queries_per_request histogram"],
+            }
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                for status_code, count in sorted(metrics.responses.items()):
+                    requests.append(f'{PREFIX}_http_requests_total{{{labels},status="{status_code}"}} {count}')
+                histograms["duration"] += metrics.duration.samples(f"{PREFIX}_http_request_duration_seconds", labels)
+                histograms["db_duration"] += metrics.db_duration.samples(f"{PREFIX}_db_duration_seconds", labels)
+                histograms["queries"] += metrics.queries.samples(f"{PREFIX}_db_queries_per_request", labels)
+
+        lines = requests
+        for family in histograms.values():
+            lines += family
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drops all collected metrics."""
+        with self._lock:
+            self._routes.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
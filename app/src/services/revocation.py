@@ -0,0 +1,229 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.config.config import settings
+from app.src.util.crud.token import revoke_jti, get_revocations_since, blacklist_token, is_token_blacklisted
+
+
+class RevocationBackend(ABC):
+    """
+    Shared store of revoked jti values, so that every worker sees a revocation as soon as it is made.
+
+    Implementations only have to remember a jti until its expiry.
+    """
+
+    @abstractmethod
+    async def add(self, jti: str, expires_at: datetime) -> None:
+        """
+        Records a revoked jti.
+
+        Args:
+            jti (str): The jti claim of the revoked token.
+            expires_at (datetime): The expiry of the token (naive UTC), after which the entry may be dropped.
+        """
+        pass
+
+    @abstractmethod
+    async def contains(self, jti: str) -> bool:
+        """
+        Checks whether a jti has been revoked.
+
+        Args:
+            jti (str): The jti claim to check.
+
+        Returns:
+            bool: True if the jti is revoked and not yet expired.
+        """
+        pass
+
+
+class InMemoryRevocationBackend(RevocationBackend):
+    """Process-local backend, meant for tests and single-worker runs."""
+
+    def __init__(self):
+        self.entries: Dict[str, datetime] = {}
+
+    async def add(self, jti: str, expires_at: datetime) -> None:
+        self.entries[jti] = expires_at
+
+    async def contains(self, jti: str) -> bool:
+        expires_at = self.entries.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= datetime.utcnow():
+            del self.entries[jti]
+            return False
+        return True
+
+
+class RedisRevocationBackend(RevocationBackend):
+    """
+    Backend for any client exposing the async redis API (redis.asyncio, fakeredis, KeyDB, Valkey...).
+
+    Every jti is stored as its own key with an absolute expiry, so the server evicts it by itself.
+    """
+
+    def __init__(self, client, key_prefix: str = "revoked:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRevocationBackend":
+        """
+        Creates the backend from a redis URL.
+
+        Raises:
+            RuntimeError: If the optional redis package is not installed.
+        """
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("REVOCATION_REDIS_URL is set but the 'redis' package is not installed") from e
+        return cls(redis_asyncio.from_url(url))
+
+    async def add(self, jti: str, expires_at: datetime) -> None:
+        ttl = int((expires_at - datetime.utcnow()).total_seconds())
+        if ttl > 0:
+            await self.client.set(f"{self.key_prefix}{jti}", 1, ex=ttl)
+
+    async def contains(self, jti: str) -> bool:
+        return bool(await self.client.exists(f"{self.key_prefix}{jti}"))
+
+
+class TokenRevocationList:
+    """
+    Memory-resident set of revoked jti values, kept in sync with the revoked_tokens table.
+
+    Lookups are answered from a dict in O(1). The dict is refreshed incrementally: at most once every
+    ``refresh_seconds`` the revocations recorded since the previous refresh are pulled from the database,
+    re-reading a small overlap window to tolerate late commits. When a shared backend is configured it is
+    consulted on a local miss, so revocations made by other workers apply without waiting for the refresh.
+    """
+
+    def __init__(self, refresh_seconds: int, backend: Optional[RevocationBackend] = None):
+        self.refresh_seconds = refresh_seconds
+        self.backend = backend
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> None:
+        """
+        Pulls new revocations from the database and drops expired ones from memory.
+
+        Args:
+            db (AsyncSession): The database session.
+            force (bool): Refresh even if the refresh interval has not elapsed yet.
+        """
+        if not force and time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = time.monotonic()
+
+        now = datetime.utcnow()
+        if self._watermark is None:
+            since = datetime.min
+        else:
+            since = self._watermark - timedelta(seconds=self.refresh_seconds * 2)
+        for revoked in await get_revocations_since(db, since):
+            self._revoked[revoked.jti] = revoked.expires_at
+        self._watermark = now
+
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        for jti in expired:
+            del self._revoked[jti]
+
+    async def is_revoked(self, db: AsyncSession, token: str) -> bool:
+        """
+        Checks whether a raw token has been revoked.
+
+        Tokens issued before jti claims were introduced fall back to the legacy blacklist table.
+
+        Args:
+            db (AsyncSession): The database session.
+            token (str): The raw JWT, with or without the "Bearer " prefix.
+
+        Returns:
+            bool: True if the token is revoked.
+        """
+        token = token.replace("Bearer ", "")
+        claims = _unverified_claims(token)
+        jti = claims.get("jti")
+        if not jti:
+            return await is_token_blacklisted(db, token)
+
+        await self.refresh(db)
+        expires_at = self._revoked.get(jti)
+        if expires_at is not None and expires_at > datetime.utcnow():
+            return True
+        if self.backend is not None and await self.backend.contains(jti):
+            return True
+        return False
+
+    async def revoke(self, db: AsyncSession, token: str, user_id: int = None) -> bool:
+        """
+        Revokes a raw token until its expiry.
+
+        Only tokens signed by this application and not yet expired are recorded: the claims are client input,
+        and an invalid or expired token cannot authenticate anyway.
+
+        Args:
+            db (AsyncSession): The database session.
+            token (str): The raw JWT, with or without the "Bearer " prefix.
+            user_id (int): The ID of the user the token was issued to, if known.
+
+        Returns:
+            bool: True if the token was revoked, False if it did not verify.
+        """
+        token = token.replace("Bearer ", "")
+        claims = _verified_claims(token)
+        if claims is None:
+            return False
+        jti = claims.get("jti")
+        if not jti:
+            await blacklist_token(db, token)
+            return True
+
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = datetime.utcfromtimestamp(exp)
+        else:
+            expires_at = datetime.utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+        await revoke_jti(db, jti, expires_at, user_id)
+        self._revoked[jti] = expires_at
+        if self.backend is not None:
+            await self.backend.add(jti, expires_at)
+        return True
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+def _unverified_claims(token: str) -> dict:
+    try:
+        return jwt.get_unverified_claims(token)
+    except JWTError:
+        return {}
+
+
+def _verified_claims(token: str) -> Optional[dict]:
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+
+
+def _create_backend() -> Optional[RevocationBackend]:
+    if settings.REVOCATION_REDIS_URL:
+        return RedisRevocationBackend.from_url(settings.REVOCATION_REDIS_URL)
+    return None
+
+
+revocation_list = TokenRevocationList(refresh_seconds=settings.REVOCATION_REFRESH_SECONDS, backend=_create_backend())
@@ -0,0 +1,102 @@
+import math
+import re
+from typing import Dict, List, Set, Tuple
+
+# Field weights, the same as the ts_rank defaults for the setweight labels used on PostgreSQL.
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits a text into lowercase word tokens."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    In-process full-text index of photos, used instead of the tsvector column when the database is not PostgreSQL
+    (SQLite, local runs).
+
+    Every document is a set of weighted fields (see WEIGHTS). The index maps each term to the weighted term
+    frequency of every document containing it. A query matches the documents containing all its terms, ranked by
+    the sum of the weighted frequencies times the inverse document frequency of each term.
+
+    The index lives in the memory of one process and is not transactional: it is built from the database on first
+    use and then updated by the CRUD functions.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._terms: Dict[int, Set[str]] = {}
+
+    def index(self, doc_id: int, fields: Dict[str, str]) -> None:
+        """
+        Adds or replaces a document.
+
+        Args:
+            doc_id (int): The id of the document, e.g. the photo id.
+            fields (Dict[str, str]): The text of the document by weight label, e.g. {"A": description, "B": tags}.
+        """
+        self.remove(doc_id)
+        scores: Dict[str, float] = {}
+        for label, text in fields.items():
+            weight = WEIGHTS[label]
+            for term in tokenize(text):
+                scores[term] = scores.get(term, 0.0) + weight
+        for term, score in scores.items():
+            self._postings.setdefault(term, {})[doc_id] = score
+        self._terms[doc_id] = set(scores)
+
+    def remove(self, doc_id: int) -> None:
+        """Removes a document, if indexed."""
+        for term in self._terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        Finds the documents containing every term of a query.
+
+        Args:
+            query (str): The search text.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[int, float]]: (document id, score) pairs, best first, newest first among equal scores.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        postings = [self._postings.get(term) for term in terms]
+        if not all(postings):
+            return []
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            candidates.intersection_update(other)
+            if not candidates:
+                return []
+
+        total = len(self._terms)
+        idf = [math.log(1 + total / len(p)) for p in postings]
+        scored = [(doc_id, sum(p[doc_id] * w for p, w in zip(postings, idf))) for doc_id in candidates]
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        return scored[:limit]
+
+    def clear(self) -> None:
+        """Drops every document and marks the index as not built."""
+        self._postings.clear()
+        self._terms.clear()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+search_index = InvertedIndex()
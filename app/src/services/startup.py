@@ -0,0 +1,201 @@
+import logging
+import os
+import time
+from typing import Dict, Optional, Set
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.src.config.config import settings, templates
+from app.src.services.db_pool import warmup
+from app.src.services.maintenance import lock_key
+from app.src.util import models  # noqa: F401, registers every table on Base.metadata
+from app.src.util.db import Base
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'alembic')
+
+
+class SchemaRevisionError(RuntimeError):
+    """Raised when the database schema is not at the Alembic head revision of the code."""
+
+
+def _script_directory() -> ScriptDirectory:
+    config = Config()
+    config.set_main_option("script_location", os.path.normpath(ALEMBIC_DIR))
+    return ScriptDirectory.from_config(config)
+
+
+def head_revisions() -> Set[str]:
+    """Returns the head revisions of the Alembic scripts, read from alembic/versions without touching the database."""
+    return set(_script_directory().get_heads())
+
+
+async def current_revisions(engine) -> Set[str]:
+    """
+    Returns the revisions the database is stamped with, in a single query on alembic_version.
+
+    Args:
+        engine (AsyncEngine): The engine of the database.
+
+    Returns:
+        Set[str]: The current revisions, empty if the database was never migrated.
+    """
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            return set()
+        return set(result.scalars().all())
+
+
+async def verify_schema_revision(engine) -> str:
+    """
+    Checks that the database was migrated to the head revision of the code (alembic current == head).
+
+    Args:
+        engine (AsyncEngine): The engine of the database.
+
+    Returns:
+        str: The current revision.
+
+    Raises:
+        SchemaRevisionError: If the database is behind, ahead or on another branch.
+    """
+    heads = head_revisions()
+    current = await current_revisions(engine)
+    if not current:
+        raise SchemaRevisionError(
+            f"Database schema has no revision, the code expects {', '.join(sorted(heads))}. Run "
+            f"`python -m app.cli init-db` on an empty database, or stamp an existing one with the revision its "
+            f"tables match (`alembic stamp <revision>`) and run `alembic upgrade head`."
+        )
+    if current != heads:
+        raise SchemaRevisionError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"the code expects {', '.join(sorted(heads))}. Run `alembic upgrade head`."
+        )
+    return ", ".join(sorted(current))
+
+
+def _bootstrap_schema(conn) -> Optional[str]:
+    tables = set(inspect(conn).get_table_names())
+    if "alembic_version" in tables or tables & set(Base.metadata.tables):
+        return None
+    Base.metadata.create_all(conn)
+    context = MigrationContext.configure(conn)
+    context.stamp(_script_directory(), "head")
+    return ", ".join(sorted(context.get_current_heads()))
+
+
+async def bootstrap_schema(engine) -> Optional[str]:
+    """
+    Creates the schema of an empty database from the models and stamps it with the head revision.
+
+    The Alembic chain cannot build the schema from nothing: its first revisions predate the migrations and
+    drop the tables instead of creating them. A new database is therefore built with Base.metadata.create_all
+    and stamped as `alembic stamp head` would, in one transaction, and later upgrades run from there.
+    A database holding an alembic_version table or any application table is left untouched.
+
+    On PostgreSQL the workers starting together wait on a transaction advisory lock, so only the first one
+    creates the schema and the others find it stamped.
+
+    Args:
+        engine (AsyncEngine): The engine of the database.
+
+    Returns:
+        Optional[str]: The revision stamped, None if the database was not empty.
+    """
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(select(func.pg_advisory_xact_lock(lock_key("schema:bootstrap"))))
+        return await conn.run_sync(_bootstrap_schema)
+
+
+def prewarm_templates() -> int:
+    """
+    Compiles every Jinja2 template into the environment's cache.
+
+    Returns:
+        int: The number of templates compiled.
+    """
+    names = [name for name in templates.env.list_templates() if name.endswith(".html")]
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
+
+
+async def prepare(engine, schema_check: str = settings.SCHEMA_CHECK,
+                  prewarm_connections: int = settings.STARTUP_PREWARM_CONNECTIONS,
+                  warm_templates: bool = settings.STARTUP_PREWARM_TEMPLATES,
+                  started_at: Optional[float] = None) -> Dict[str, float]:
+    """
+    Runs the startup steps of a worker and times them against settings.STARTUP_TIME_BUDGET_SECONDS.
+
+    schema_check is one of:
+
+    - "verify": one query on alembic_version, the worker refuses to start unless it is at the head revision.
+      An empty database is first bootstrapped with bootstrap_schema,
+    - "create_all": the former behaviour, Base.metadata.create_all with a catalog probe per table,
+    - "off": no check.
+
+    Args:
+        engine (AsyncEngine): The engine of the database.
+        schema_check (str): How to check the schema.
+        prewarm_connections (int): The number of pool connections to open, 0 to skip.
+        warm_templates (bool): True to compile the templates.
+        started_at (Optional[float]): time.perf_counter() at process start, to include the import time.
+
+    Returns:
+        Dict[str, float]: The duration of every step and the total, in seconds.
+
+    Raises:
+        SchemaRevisionError: If schema_check is "verify" and the database is not at the head revision.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    if started_at is not None:
+        timings["import"] = started - started_at
+
+    step_started = time.perf_counter()
+    if schema_check == "verify":
+        try:
+            revision = await verify_schema_revision(engine)
+        except SchemaRevisionError:
+            # An empty database is bootstrapped. If it is not, or another worker has just bootstrapped it,
+            # it is checked again.
+            revision = await bootstrap_schema(engine)
+            if revision is None:
+                revision = await verify_schema_revision(engine)
+            else:
+                logger.info("Created the schema of the empty database at revision %s", revision)
+        logger.info("Database schema at revision %s", revision)
+    elif schema_check == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+    elif schema_check != "off":
+        raise ValueError(f"Unknown SCHEMA_CHECK {schema_check!r}, expected verify, create_all or off")
+    timings["schema"] = time.perf_counter() - step_started
+
+    if prewarm_connections > 0:
+        step_started = time.perf_counter()
+        await warmup(engine, prewarm_connections)
+        timings["pool"] = time.perf_counter() - step_started
+
+    if warm_templates:
+        step_started = time.perf_counter()
+        prewarm_templates()
+        timings["templates"] = time.perf_counter() - step_started
+
+    timings["total"] = sum(timings.values())
+    summary = ", ".join(f"{step} {duration * 1000:.0f} ms" for step, duration in timings.items())
+    if timings["total"] > settings.STARTUP_TIME_BUDGET_SECONDS:
+        logger.warning("Startup took longer than its budget of %.1f s: %s", settings.STARTUP_TIME_BUDGET_SECONDS,
+                       summary)
+    else:
+        logger.info("Startup: %s", summary)
+    return timings
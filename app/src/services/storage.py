@@ -0,0 +1,203 @@
+import glob
+import os
+import shutil
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import cloudinary
+import cloudinary.uploader
+
+from app.src.config.config import settings
+
+
+class StorageBackend(ABC):
+    """
+    Abstract image storage.
+
+    All methods block (network or disk I/O), call them from a thread pool, never directly on the event loop.
+    Images are addressed by their public id, e.g. "<folder>/<uuid>".
+    """
+
+    @abstractmethod
+    def upload(self, path: str, public_id: str) -> str:
+        """
+        Stores the image at ``path`` under ``public_id``.
+
+        Returns:
+            str: The URL of the stored image.
+        """
+        pass
+
+    @abstractmethod
+    def transform(self, public_id: str, spec: dict) -> str:
+        """
+        Creates a transformed variant of a stored image.
+
+        Args:
+            public_id (str): The public id of the original image.
+            spec (dict): {"width": int, "height": int} to crop-fill, or {"filter": str} to apply a filter.
+
+        Returns:
+            str: The URL of the variant.
+
+        Raises:
+            ValueError: If the transformation is invalid or fails.
+        """
+        pass
+
+    @abstractmethod
+    def url_for(self, public_id: str) -> Optional[str]:
+        """Returns the URL of a stored image, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    def download(self, public_id: str, target_path: str) -> None:
+        """
+        Copies the original of a stored image to a local file.
+
+        Raises:
+            ValueError: If the image does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, public_id: str) -> None:
+        """Deletes a stored image and its variants."""
+        pass
+
+
+class CloudinaryStorage(StorageBackend):
+    """Stores images in Cloudinary and lets it render the transformations."""
+
+    def __init__(self):
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET,
+            secure=True,
+        )
+
+    def upload(self, path: str, public_id: str) -> str:
+        r = cloudinary.uploader.upload(path, public_id=public_id, overwrite=True)
+        return cloudinary.CloudinaryImage(public_id).build_url(version=r.get("version"))
+
+    def transform(self, public_id: str, spec: dict) -> str:
+        if "filter" in spec:
+            transformation = {"effect": f"art:{spec['filter']}"}
+        else:
+            transformation = {
+                "width": spec.get("width"),
+                "height": spec.get("height"),
+                "crop": "fill",
+                "gravity": "auto",
+            }
+        result = cloudinary.uploader.explicit(
+            public_id,
+            type="upload",
+            eager=[
+                transformation,
+                {"fetch_format": "auto"},
+                {"radius": "max"},
+            ],
+        )
+        eager = result.get("eager") or []
+        if not eager or not eager[0].get("secure_url"):
+            raise ValueError("Transformation failed")
+        return eager[0]["secure_url"]
+
+    def url_for(self, public_id: str) -> Optional[str]:
+        return cloudinary.CloudinaryImage(public_id).build_url()
+
+    def download(self, public_id: str, target_path: str) -> None:
+        try:
+            with urllib.request.urlopen(self.url_for(public_id), timeout=30) as response, \
+                    open(target_path, "wb") as target:
+                shutil.copyfileobj(response, target)
+        except OSError as e:
+            raise ValueError("Image not found") from e
+
+    def delete(self, public_id: str) -> None:
+        cloudinary.uploader.destroy(public_id, invalidate=True)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Stores images on the local disk under ``root_dir`` and serves them from ``base_url``.
+
+    Suitable for single-node deployments and as an offline stand-in for Cloudinary in load tests.
+    Transformations are rendered with Pillow.
+    """
+
+    def __init__(self, root_dir: str, base_url: str):
+        self.root_dir = os.path.abspath(root_dir)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def upload(self, path: str, public_id: str) -> str:
+        from app.src.services.image_transform import detect_extension
+
+        extension = detect_extension(path)
+        target = self._path(public_id + extension)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+        return self._url(public_id + extension)
+
+    def transform(self, public_id: str, spec: dict) -> str:
+        from app.src.services.image_transform import apply_transform
+
+        source = self._find(public_id)
+        if source is None:
+            raise ValueError("Image not found")
+        extension = os.path.splitext(source)[1]
+        if "filter" in spec:
+            suffix = f"f_{spec['filter']}"
+        else:
+            suffix = f"w_{spec.get('width')}_h_{spec.get('height')}"
+        name = f"{public_id}.{suffix}{extension}"
+        apply_transform(source, self._path(name), spec)
+        return self._url(name)
+
+    def url_for(self, public_id: str) -> Optional[str]:
+        source = self._find(public_id)
+        if source is None:
+            return None
+        return self._url(os.path.relpath(source, self.root_dir).replace(os.sep, "/"))
+
+    def download(self, public_id: str, target_path: str) -> None:
+        source = self._find(public_id)
+        if source is None:
+            raise ValueError("Image not found")
+        shutil.copyfile(source, target_path)
+
+    def delete(self, public_id: str) -> None:
+        for path in glob.glob(glob.escape(self._path(public_id)) + ".*"):
+            os.remove(path)
+
+    def _path(self, name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root_dir, name))
+        if not path.startswith(self.root_dir + os.sep):
+            raise ValueError("Invalid public id")
+        return path
+
+    def _url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    def _find(self, public_id: str) -> Optional[str]:
+        base = self._path(public_id)
+        for path in glob.glob(glob.escape(base) + ".*"):
+            if "." not in os.path.basename(path)[len(os.path.basename(base)) + 1:]:
+                return path
+        return None
+
+
+def create_storage() -> StorageBackend:
+    """Creates the storage backend selected by settings.STORAGE_BACKEND ("cloudinary" or "local")."""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_URL)
+    if settings.STORAGE_BACKEND == "cloudinary":
+        return CloudinaryStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+storage = create_storage()
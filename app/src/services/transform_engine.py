@@ -0,0 +1,208 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from app.src.config.config import settings
+from app.src.services.image_transform import FILTERS, render_variant
+from app.src.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+
+class TransformEngine:
+    """
+    Renders resized and filtered variants of stored images locally, on a pool of worker processes.
+
+    Rendered files live in a content-addressed cache on disk:
+    - ``originals/<sha256(public_id)>`` holds a copy of the original, downloaded from storage once;
+    - ``derived/<key>.<ext>`` holds a variant, where ``key`` is the digest of the public id and canonical spec.
+
+    The cache is bounded to ``max_bytes``: files are touched on every hit and the least recently used ones are
+    evicted once the bound is exceeded. An evicted file is simply rendered again on the next request, the
+    recipe is kept in the derived_assets table. Concurrent requests for the same file share a single render.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_workers: int, max_dimension: int):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.originals_dir = os.path.join(self.cache_dir, "originals")
+        self.derived_dir = os.path.join(self.cache_dir, "derived")
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.max_dimension = max_dimension
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._size: Optional[int] = None
+
+    def normalize_spec(self, spec: dict) -> dict:
+        """
+        Validates a transformation and returns it in canonical form.
+
+        Args:
+            spec (dict): {"width": int, "height": int} to crop-fill, or {"filter": str} to apply a filter.
+
+        Returns:
+            dict: The spec with only the relevant keys, and integer sizes.
+
+        Raises:
+            ValueError: If the spec is invalid.
+        """
+        if "filter" in spec:
+            if spec["filter"] not in FILTERS:
+                raise ValueError(f"Unknown filter: {spec['filter']}")
+            return {"filter": spec["filter"]}
+        try:
+            width, height = int(spec.get("width")), int(spec.get("height"))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid width or height")
+        if not (0 < width <= self.max_dimension and 0 < height <= self.max_dimension):
+            raise ValueError("Invalid width or height")
+        return {"width": width, "height": height}
+
+    @staticmethod
+    def canonical_spec(spec: dict) -> str:
+        """Serializes a normalized spec so that equal transformations give equal strings."""
+        return json.dumps(spec, sort_keys=True, separators=(",", ":"))
+
+    @staticmethod
+    def key_for(public_id: str, spec: dict) -> str:
+        """Returns the cache key of a variant, the sha256 of its public id and canonical spec."""
+        payload = f"{public_id}\n{TransformEngine.canonical_spec(spec)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def render(self, public_id: str, spec: dict) -> str:
+        """
+        Returns the path of a rendered variant, rendering it if it is not cached.
+
+        Args:
+            public_id (str): The public id of the original image in storage.
+            spec (dict): A spec returned by normalize_spec().
+
+        Returns:
+            str: The path of the variant in the cache.
+
+        Raises:
+            ValueError: If the spec is invalid or the original does not exist.
+        """
+        key = self.key_for(public_id, spec)
+        cached = self._find_variant(key)
+        if cached is not None:
+            _touch(cached)
+            return cached
+        return await self._once(key, lambda: self._render(public_id, key, spec))
+
+    def shutdown(self) -> None:
+        """Stops the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _render(self, public_id: str, key: str, spec: dict) -> str:
+        source = await self._original(public_id)
+        os.makedirs(self.derived_dir, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        try:
+            path = await loop.run_in_executor(self._pool(), render_variant, source,
+                                              os.path.join(self.derived_dir, key), spec)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed on OOM), start a fresh pool for the next request.
+            self._executor = None
+            raise
+        await self._account(path)
+        return path
+
+    async def _original(self, public_id: str) -> str:
+        path = os.path.join(self.originals_dir, hashlib.sha256(public_id.encode("utf-8")).hexdigest())
+        if os.path.exists(path):
+            _touch(path)
+            return path
+        return await self._once(f"original:{path}", lambda: self._download(public_id, path))
+
+    async def _download(self, public_id: str, path: str) -> str:
+        os.makedirs(self.originals_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, storage.download, public_id, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        await self._account(path)
+        return path
+
+    async def _once(self, key: str, factory) -> str:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _account(self, added_path: str) -> None:
+        loop = asyncio.get_running_loop()
+        if self._size is None:
+            self._size = await loop.run_in_executor(None, self._scan_size)
+        else:
+            self._size += os.path.getsize(added_path)
+        if self._size > self.max_bytes:
+            self._size = await loop.run_in_executor(None, self._evict, added_path)
+
+    def _files(self):
+        for directory in (self.originals_dir, self.derived_dir):
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and ".tmp" not in entry.name:
+                        yield entry
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._files())
+
+    def _evict(self, keep: str) -> int:
+        files = sorted((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._files() if e.path != keep)
+        total = sum(size for _, size, _ in files) + os.path.getsize(keep)
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        logger.info("Derived cache evicted down to %d bytes", total)
+        return total
+
+    def _find_variant(self, key: str) -> Optional[str]:
+        matches = glob.glob(os.path.join(self.derived_dir, key + ".*"))
+        matches = [path for path in matches if ".tmp" not in path]
+        return matches[0] if matches else None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+transform_engine = TransformEngine(
+    cache_dir=settings.DERIVED_CACHE_DIR,
+    max_bytes=settings.DERIVED_CACHE_MAX_BYTES,
+    max_workers=settings.TRANSFORM_WORKERS,
+    max_dimension=settings.TRANSFORM_MAX_DIMENSION,
+)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Set
+
+from fastapi import HTTPException, status
+
+from app.src.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadPipeline:
+    """
+    Runs blocking storage uploads on a bounded thread pool so they never stall the event loop.
+
+    An upload goes through three steps:
+    - reserve() takes one of ``max_pending`` slots, or rejects the request with 503 when all are taken;
+    - spool() copies the request body to a temporary file off the event loop, because the UploadFile is closed
+      as soon as the request finishes;
+    - submit() schedules the upload on the pool and, once it is done, hands the result to a completion callback
+      that finalizes the database row. The slot is released when the upload finishes.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="photo-upload")
+        self.max_pending = max_pending
+        self.pending = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def reserve(self) -> None:
+        """
+        Takes an upload slot.
+
+        Raises:
+            HTTPException: 503 if ``max_pending`` uploads are already in flight.
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Too many uploads in progress, please try again later")
+        self.pending += 1
+
+    def release(self) -> None:
+        """Gives back an upload slot taken with reserve()."""
+        self.pending = max(0, self.pending - 1)
+
+    async def spool(self, file) -> str:
+        """
+        Copies an uploaded file to a temporary file on disk without blocking the event loop.
+
+        Args:
+            file (UploadFile): The uploaded file.
+
+        Returns:
+            str: The path of the temporary copy. It is removed by submit() once the upload is done.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _copy_to_tempfile, file.file)
+
+    def submit(self, upload: Callable[[str], object], path: str,
+               on_complete: Callable[[Optional[object], Optional[BaseException]], Awaitable[None]]) -> asyncio.Task:
+        """
+        Schedules an upload of a spooled file.
+
+        Args:
+            upload (Callable[[str], object]): Blocking function uploading the file at the given path.
+                It runs on the upload pool.
+            path (str): The path returned by spool().
+            on_complete (Callable): Coroutine function called on the event loop with the upload result and
+                None, or with None and the exception raised by the upload.
+
+        Returns:
+            asyncio.Task: The task running the upload.
+        """
+        task = asyncio.create_task(self._run(upload, path, on_complete))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def abort(self, path: str) -> None:
+        """Releases the slot of a spooled file that will not be submitted and removes the file."""
+        self.release()
+        _remove_quietly(path)
+
+    async def drain(self) -> None:
+        """Waits for in-flight uploads to finish and shuts the pool down."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    async def _run(self, upload, path, on_complete):
+        loop = asyncio.get_running_loop()
+        result, error = None, None
+        try:
+            result = await loop.run_in_executor(self.executor, upload, path)
+        except Exception as e:
+            logger.exception("Upload of %s failed", path)
+            error = e
+        finally:
+            self.release()
+            _remove_quietly(path)
+        try:
+            await on_complete(result, error)
+        except Exception:
+            logger.exception("Finalizing upload of %s failed", path)
+
+
+def _copy_to_tempfile(source) -> str:
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="photoshare-upload-", delete=False) as target:
+        shutil.copyfileobj(source, target)
+        return target.name
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+upload_pipeline = UploadPipeline(max_workers=settings.UPLOAD_WORKERS, max_pending=settings.UPLOAD_MAX_PENDING)
@@ -1,8 +1,10 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
 from app.src.config.logging_config import log_function
 from app.src.util.crud.photo import get_photo
+from app.src.util.crud.search import update_search_document
 from app.src.util.models.comment import Comment
 from app.src.util.schemas.comment import CommentUpdate
 from sqlalchemy.future import select
@@ -35,6 +37,8 @@ async def create_comment(db: AsyncSession, comment: str, user_id: int, photo_id:
         user_id=user_id
     )
     db.add(new_comment)
+    await db.flush()
+    await update_search_document(db, photo_id)
     await db.commit()
     await db.refresh(new_comment)
     return new_comment
@@ -71,7 +75,8 @@ async def get_comments(db: AsyncSession, photo_id: int):
 
 
 @log_function
-async def update_comment(db: AsyncSession, comment_id: int, comment: CommentUpdate):
+async def update_comment(db: AsyncSession, comment_id: int, comment: CommentUpdate,
+                         db_comment: Optional[Comment] = None):
     """
     Update an existing comment in the database.
 
@@ -79,16 +84,20 @@ async def update_comment(db: AsyncSession, comment_id: int, comment: CommentUpda
         db (Session): The database session.
         comment_id (int): The ID of the comment to update.
         comment (CommentUpdate): The comment update schema.
+        db_comment (Optional[Comment]): The comment, if already loaded in this session.
 
     Returns:
         Comment: The updated comment object.
     """
-    result = await db.execute(select(Comment).filter(Comment.id == comment_id))
-    db_comment = result.scalars().first()
+    if db_comment is None:
+        result = await db.execute(select(Comment).filter(Comment.id == comment_id))
+        db_comment = result.scalars().first()
 
     if db_comment:
         db_comment.content = comment.content
         db_comment.updated_at = datetime.utcnow()
+        await db.flush()
+        await update_search_document(db, db_comment.photo_id)
         await db.commit()
         await db.refresh(db_comment)
     return db_comment
@@ -126,20 +135,24 @@ async def get_comment_by_id(db: AsyncSession, comment_id: int):
 
 
 @log_function
-async def delete_comment(db: AsyncSession, comment_id: int):
+async def delete_comment(db: AsyncSession, comment_id: int, db_comment: Optional[Comment] = None):
     """
     Delete a comment from the database.
 
     Args:
         db (Session): The database session.
         comment_id (int): The ID of the comment to delete.
+        db_comment (Optional[Comment]): The comment, if already loaded in this session.
 
     Returns:
         Comment: The deleted comment object.
         """
-    db_comment = await get_comment_by_id(db, comment_id)
+    if db_comment is None:
+        db_comment = await get_comment_by_id(db, comment_id)
 
     await db.delete(db_comment)
+    await db.flush()
+    await update_search_document(db, db_comment.photo_id)
     await db.commit()
     return db_comment
 
@@ -0,0 +1,67 @@
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.src.services.transform_engine import TransformEngine
+from app.src.util.models.derived_asset import DerivedAsset
+from app.src.util.models.photo import Photo
+
+
+async def get_derived_asset(db: AsyncSession, key: str) -> DerivedAsset:
+    """
+    Retrieves a derived asset by its cache key.
+
+    Args:
+        db (AsyncSession): The database session.
+        key (str): The cache key of the variant.
+
+    Returns:
+        DerivedAsset: The derived asset.
+
+    Raises:
+        HTTPException: 404 if no variant with this key exists.
+    """
+    result = await db.execute(select(DerivedAsset).where(DerivedAsset.key == key))
+    asset = result.scalars().first()
+    if asset is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
+    return asset
+
+
+async def get_or_create_derived_asset(db: AsyncSession, photo: Photo, spec: dict) -> DerivedAsset:
+    """
+    Returns the derived asset of a photo for a transformation, recording it if it is new.
+
+    Args:
+        db (AsyncSession): The database session.
+        photo (Photo): The photo the variant is made from.
+        spec (dict): A normalized transformation, see TransformEngine.normalize_spec.
+
+    Returns:
+        DerivedAsset: The existing or newly created derived asset.
+    """
+    key = TransformEngine.key_for(photo.public_id, spec)
+    result = await db.execute(select(DerivedAsset).where(DerivedAsset.key == key))
+    asset = result.scalars().first()
+    if asset is not None:
+        return asset
+
+    asset = DerivedAsset(key=key, photo_id=photo.id, public_id=photo.public_id,
+                         spec=TransformEngine.canonical_spec(spec))
+    db.add(asset)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Created concurrently by another request.
+        await db.rollback()
+        return await get_derived_asset(db, key)
+    await db.refresh(asset)
+    return asset
+
+
+def load_spec(asset: DerivedAsset) -> dict:
+    """Returns the transformation of a derived asset as a dict."""
+    return json.loads(asset.spec)
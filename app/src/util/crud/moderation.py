@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.src.config.config import settings
+from app.src.config.logging_config import log_function
+from app.src.util.db import AsyncSessionLocal
+from app.src.util.models import Photo, User
+from app.src.util.models.comment import Comment
+from app.src.util.models.rating import Rating
+
+
+@dataclass(frozen=True)
+class ModerationFilters:
+    """
+    Filters of the admin moderation views. Every filter left to None is not applied.
+
+    Attributes:
+        user_id (Optional[int]): Only the rows of this user: the author of a comment or rating, the owner of a photo.
+        photo_id (Optional[int]): Only the comments or ratings of this photo.
+        date_from (Optional[date]): Only the comments or ratings created on this day or later.
+        date_to (Optional[date]): Only the comments or ratings created on this day or earlier.
+    """
+    user_id: Optional[int] = None
+    photo_id: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    def apply(self, stmt, model):
+        """
+        Adds the filters to a select of Comment or Rating.
+
+        Args:
+            stmt (Select): The statement to filter.
+            model (Type[Comment] | Type[Rating]): The model selected by the statement.
+
+        Returns:
+            Select: The filtered statement.
+        """
+        if self.user_id is not None:
+            stmt = stmt.where(model.user_id == self.user_id)
+        if self.photo_id is not None:
+            stmt = stmt.where(model.photo_id == self.photo_id)
+        if self.date_from is not None:
+            stmt = stmt.where(model.created_at >= datetime.combine(self.date_from, time.min))
+        if self.date_to is not None:
+            stmt = stmt.where(model.created_at < datetime.combine(self.date_to + timedelta(days=1), time.min))
+        return stmt
+
+
+def _page_limit(limit: int) -> int:
+    return max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+
+
+async def _keyset_page(db: AsyncSession, stmt, id_column, cursor: Optional[int], limit: int,
+                       descending: bool = True) -> Tuple[list, Optional[int]]:
+    if cursor is not None:
+        stmt = stmt.where(id_column < cursor if descending else id_column > cursor)
+    stmt = stmt.order_by(desc(id_column) if descending else id_column).limit(limit + 1)
+    rows = list((await db.execute(stmt)).scalars().all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+@log_function
+async def get_comments_page(db: AsyncSession, filters: ModerationFilters = ModerationFilters(),
+                            cursor: Optional[int] = None,
+                            limit: int = settings.ADMIN_PAGE_SIZE) -> Tuple[List[Comment], Optional[int]]:
+    """
+    Retrieves a single page of comments for moderation, newest first, using keyset pagination on Comment.id.
+
+    Args:
+        db (AsyncSession): The database session.
+        filters (ModerationFilters): The filters to apply.
+        cursor (Optional[int]): The id of the last comment of the previous page. None for the first page.
+        limit (int): The maximum number of comments to return.
+
+    Returns:
+        Tuple[List[Comment], Optional[int]]: The comments of the page, with their photo and author loaded,
+        and the cursor of the next page, or None if this is the last page.
+    """
+    stmt = filters.apply(
+        select(Comment).options(selectinload(Comment.photo), selectinload(Comment.user)), Comment
+    )
+    return await _keyset_page(db, stmt, Comment.id, cursor, _page_limit(limit))
+
+
+@log_function
+async def get_ratings_page(db: AsyncSession, filters: ModerationFilters = ModerationFilters(),
+                           cursor: Optional[int] = None,
+                           limit: int = settings.ADMIN_PAGE_SIZE) -> Tuple[List[Rating], Optional[int]]:
+    """
+    Retrieves a single page of ratings for moderation, newest first, using keyset pagination on Rating.id.
+
+    Args:
+        db (AsyncSession): The database session.
+        filters (ModerationFilters): The filters to apply.
+        cursor (Optional[int]): The id of the last rating of the previous page. None for the first page.
+        limit (int): The maximum number of ratings to return.
+
+    Returns:
+        Tuple[List[Rating], Optional[int]]: The ratings of the page, with their photo and author loaded,
+        and the cursor of the next page, or None if this is the last page.
+    """
+    stmt = filters.apply(
+        select(Rating).options(selectinload(Rating.photo), selectinload(Rating.owner)), Rating
+    )
+    return await _keyset_page(db, stmt, Rating.id, cursor, _page_limit(limit))
+
+
+@log_function
+async def get_photos_page(db: AsyncSession, user_id: Optional[int] = None, cursor: Optional[int] = None,
+                          limit: int = settings.ADMIN_PAGE_SIZE) -> Tuple[List[Photo], Optional[int]]:
+    """
+    Retrieves a single page of photos for moderation, newest first, using keyset pagination on Photo.id.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (Optional[int]): Only the photos of this user, if given.
+        cursor (Optional[int]): The id of the last photo of the previous page. None for the first page.
+        limit (int): The maximum number of photos to return.
+
+    Returns:
+        Tuple[List[Photo], Optional[int]]: The photos of the page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    stmt = select(Photo)
+    if user_id is not None:
+        stmt = stmt.where(Photo.user_id == user_id)
+    return await _keyset_page(db, stmt, Photo.id, cursor, _page_limit(limit))
+
+
+@log_function
+async def get_active_users_page(db: AsyncSession, exclude_user_id: Optional[int] = None,
+                                username_prefix: Optional[str] = None, cursor: Optional[int] = None,
+                                limit: int = settings.ADMIN_PAGE_SIZE) -> Tuple[List[User], Optional[int]]:
+    """
+    Retrieves a single page of the active users, in id order, using keyset pagination on User.id.
+
+    Args:
+        db (AsyncSession): The database session.
+        exclude_user_id (Optional[int]): A user to leave out, e.g. the admin looking at the page.
+        username_prefix (Optional[str]): Only the users whose username starts with it. LIKE wildcards in it
+            are matched literally.
+        cursor (Optional[int]): The id of the last user of the previous page. None for the first page.
+        limit (int): The maximum number of users to return.
+
+    Returns:
+        Tuple[List[User], Optional[int]]: The users of the page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    stmt = select(User).where(User.is_active == True)
+    if exclude_user_id is not None:
+        stmt = stmt.where(User.id != exclude_user_id)
+    if username_prefix and username_prefix.strip():
+        stmt = stmt.where(User.username.startswith(username_prefix.strip(), autoescape=True))
+    return await _keyset_page(db, stmt, User.id, cursor, _page_limit(limit), descending=False)
+
+
+async def iter_comment_batches(filters: ModerationFilters = ModerationFilters(),
+                               batch_size: int = settings.ADMIN_EXPORT_BATCH_SIZE) -> AsyncIterator[List[Comment]]:
+    """
+    Yields every comment matching the filters, newest first, in keyset batches, for exports.
+
+    Runs in its own session so it can be consumed by a streaming response after the request's session is closed.
+    Only one batch is held in memory at a time.
+
+    Args:
+        filters (ModerationFilters): The filters to apply.
+        batch_size (int): The number of comments fetched per query.
+    """
+    stmt = filters.apply(
+        select(Comment).options(selectinload(Comment.photo), selectinload(Comment.user)), Comment
+    )
+    async for batch in _iter_batches(stmt, Comment.id, batch_size):
+        yield batch
+
+
+async def iter_rating_batches(filters: ModerationFilters = ModerationFilters(),
+                              batch_size: int = settings.ADMIN_EXPORT_BATCH_SIZE) -> AsyncIterator[List[Rating]]:
+    """
+    Yields every rating matching the filters, newest first, in keyset batches, for exports.
+
+    Runs in its own session so it can be consumed by a streaming response after the request's session is closed.
+    Only one batch is held in memory at a time.
+
+    Args:
+        filters (ModerationFilters): The filters to apply.
+        batch_size (int): The number of ratings fetched per query.
+    """
+    stmt = filters.apply(
+        select(Rating).options(selectinload(Rating.photo), selectinload(Rating.owner)), Rating
+    )
+    async for batch in _iter_batches(stmt, Rating.id, batch_size):
+        yield batch
+
+
+async def _iter_batches(stmt, id_column, batch_size: int) -> AsyncIterator[list]:
+    cursor = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            batch, cursor = await _keyset_page(db, stmt, id_column, cursor, batch_size)
+            if batch:
+                yield batch
+            if cursor is None:
+                return
+            # Keep the identity map from growing with the export.
+            db.expunge_all()
@@ -1,135 +1,124 @@
+import asyncio
 import base64
+import functools
 import io
 from base64 import b64encode
+from datetime import datetime, timedelta
 
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, func, desc, update, insert
 from sqlalchemy.orm import joinedload, selectinload
 from io import BytesIO
+from typing import List, Optional, Tuple
 from uuid import uuid4
-import cloudinary
-import cloudinary.uploader
-import qrcode
+import logging
 from fastapi import HTTPException
 from fastapi import status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.src.config.config import settings
 from app.src.config.logging_config import log_function
-from app.src.util.crud.tag import parse_tags
-from app.src.util.crud.user import get_user
-from app.src.util.models.photo import Photo
-from app.src.util.models.rating import Rating
-from app.src.util.models.user import User
+from app.src.services.qr_codes import qr_code_cache
+from app.src.services.storage import storage
+from app.src.services.transform_engine import transform_engine
+from app.src.services.upload_pipeline import upload_pipeline
+from app.src.util.crud.derived_asset import get_or_create_derived_asset
+from app.src.util.crud.search import update_search_document, remove_search_document
+from app.src.util.crud.tag import parse_tags, get_tag_ids
+from app.src.util.crud.user import adjust_photos_uploaded
+from app.src.util.db import AsyncSessionLocal
+from app.src.util.models.comment import Comment
+from app.src.util.models.photo import Photo, PhotoStatus, photo_m2m_tag
 from tenacity import retry, wait_fixed, stop_after_attempt
 
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET,
-    secure=True,
-)
+logger = logging.getLogger(__name__)
 
 
 class PhotoService:
     """
-    A class that provides image-related services such as uploading, resizing, adding filters, and generating QR codes.
+    A class that provides image-related services such as uploading, resizing and adding filters.
+
+    Images are kept in the configured storage backend (see app.src.services.storage), whose blocking calls are run on
+    the upload pool so they never stall the event loop. Resized and filtered variants are rendered locally by the
+    transformation engine (see app.src.services.transform_engine) and recorded as derived assets, the original is
+    never overwritten.
     """
 
     @staticmethod
-    @log_function
-    async def upload_photo(file):
-        """Uploads an image to the cloud storage.
+    def new_public_id() -> str:
+        """Generates the public id under which a new image is stored."""
+        return f"f4aaafaf-7376-4506-976a-bae4d91b5e7c/{uuid4()}"
 
+    @staticmethod
+    def upload_file(path: str, public_id: str) -> str:
+        """Uploads an image file from disk to the storage backend and returns its URL.
+
+        This call blocks for the whole upload, run it through the upload pipeline or another executor.
         """
-        unique_filename = str(uuid4())
-        public_id = f"f4aaafaf-7376-4506-976a-bae4d91b5e7c/{unique_filename}"
-        r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
-        src_url = cloudinary.CloudinaryImage(public_id).build_url(
-            version=r.get("version")
-        )
-        return public_id, src_url
+        return storage.upload(path, public_id)
 
     @staticmethod
-    @log_function
-    async def resize_photo(
-            public_id: str, width: int, height: int):
-        """Resizes an image using Cloudinary API.
+    async def _run_blocking(func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(upload_pipeline.executor, func, *args)
+
+    @staticmethod
+    def variant_url(key: str) -> str:
+        """Returns the URL under which a derived asset is served."""
+        return f"/photo/variants/{key}"
+
+    @staticmethod
+    async def create_variant(db: AsyncSession, photo: Photo, spec: dict) -> str:
+        """Records a derived asset of a photo, renders it with the local transformation engine and returns its URL.
 
+        Rendering up front validates the transformation and warms the derived cache, repeated requests for the
+        same (public_id, spec) reuse both the asset and the rendered file.
+
+        Raises:
+            ValueError: If the transformation is invalid or the original cannot be read.
         """
+        if not photo.public_id or photo.status != PhotoStatus.READY.value:
+            raise ValueError("Photo is not ready")
+        spec = transform_engine.normalize_spec(spec)
+        await transform_engine.render(photo.public_id, spec)
+        asset = await get_or_create_derived_asset(db, photo, spec)
+        return PhotoService.variant_url(asset.key)
 
-        transformed_url = cloudinary.uploader.explicit(
-            public_id,
-            type="upload",
-            eager=[
-                {
-                    "width": width,
-                    "height": height,
-                    "crop": "fill",
-                    "gravity": "auto",
-                },
-                {"fetch_format": "auto"},
-                {"radius": "max"},
-            ],
-        )
+    @staticmethod
+    @log_function
+    async def resize_photo(db: AsyncSession, photo: Photo, width: int, height: int) -> str:
+        """Creates a resized variant of a photo and returns its URL.
+
+        """
         try:
-            url_to_return = transformed_url["eager"][0]["secure_url"]
-        except KeyError:
+            return await PhotoService.create_variant(db, photo, {"width": width, "height": height})
+        except ValueError:
             raise HTTPException(status_code=400, detail="Invalid width or height")
-        return url_to_return
 
     @staticmethod
     @log_function
-    async def add_filter(public_id: str, filter: str):
-        """Apply a filter to an image and return the transformed URL.
+    async def add_filter(db: AsyncSession, photo: Photo, filter: str) -> str:
+        """Creates a filtered variant of a photo and returns its URL.
         """
-
-        effect = f"art:{filter}"
-        transformed_url = cloudinary.uploader.explicit(
-            public_id,
-            type="upload",
-            eager=[
-                {
-                    "effect": effect,
-                },
-                {"fetch_format": "auto"},
-                {"radius": "max"},
-            ],
-        )
-        print(transformed_url)
-        if 'eager' in transformed_url and transformed_url['eager']:
-            url_to_return = transformed_url["eager"][0].get("secure_url")
-        else:
+        try:
+            return await PhotoService.create_variant(db, photo, {"filter": filter})
+        except ValueError:
             raise HTTPException(status_code=400, detail="Invalid filter or transformation failed")
-        return url_to_return
 
     @staticmethod
-    @log_function
-    async def generate_qr_code(photo_url: str) -> str:
-        """Generates a QR code image from the given image URL and returns it as a base64 encoded string."""
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(photo_url)
-        qr.make(fit=True)
-
-        qr_code = qr.make_image(fill_color="black", back_color="white")
-
-        qr_code_io = io.BytesIO()
-        qr_code.save(qr_code_io)
-        qr_code_io.seek(0)
-
-        qr_code_base64 = base64.b64encode(qr_code_io.getvalue()).decode("utf-8")
-
-        return qr_code_base64
+    async def delete_image(public_id: str) -> None:
+        """Deletes an image and its variants from the storage backend, logging instead of raising on failure."""
+        try:
+            await PhotoService._run_blocking(storage.delete, public_id)
+        except Exception:
+            logger.exception("Could not delete image %s from storage", public_id)
 
 @log_function
-async def create_photo_in_db(description: str, file, user_id: int, db: AsyncSession, tag_names: list = []) -> Photo:
+async def create_photo_in_db(description: str, file, user_id: int, db: AsyncSession, tag_names: list = None) -> Photo:
     """
-        Creates a Photo record in the database and uploads the image to Cloudinary.
+        Creates a Photo record in the database and queues the image for upload to the storage backend.
+
+        The photo is returned right away in the "processing" state, its url is filled in by
+        finalize_photo_upload once the upload pipeline is done.
 
         Args:
             description (str): The description of the photo.
@@ -140,28 +129,94 @@ async def create_photo_in_db(description: str, file, user_id: int, db: AsyncSess
 
         Returns:
             Photo: The created Photo object.
+
+        Raises:
+            HTTPException: 503 if too many uploads are already in progress.
         """
-    public_id, photo_url = await PhotoService.upload_photo(file)
-    tag_instances = await parse_tags(db, tag_names, settings.MAX_TAGS)
-    new_photo = Photo(
-        description=description,
-        url=photo_url,
-        public_id=public_id,
-        user_id=user_id,
-        tags=tag_instances
+    upload_pipeline.reserve()
+    try:
+        spooled_path = await upload_pipeline.spool(file)
+    except Exception:
+        upload_pipeline.release()
+        raise
+
+    public_id = PhotoService.new_public_id()
+    try:
+        tag_ids = await parse_tags(db, tag_names, settings.MAX_TAGS)
+        new_photo = Photo(
+            description=description,
+            url=None,
+            public_id=public_id,
+            status=PhotoStatus.PROCESSING.value,
+            user_id=user_id
+        )
+        db.add(new_photo)
+        await db.flush()
+        if tag_ids:
+            await db.execute(insert(photo_m2m_tag), [{"photo": new_photo.id, "tag": tag_id} for tag_id in tag_ids])
+        await update_search_document(db, new_photo.id)
+        await adjust_photos_uploaded(db, user_id, 1)
+        await db.commit()
+        await db.refresh(new_photo)
+    except Exception:
+        upload_pipeline.abort(spooled_path)
+        raise
+
+    upload_pipeline.submit(
+        functools.partial(PhotoService.upload_file, public_id=public_id),
+        spooled_path,
+        functools.partial(finalize_photo_upload, new_photo.id, public_id)
     )
-    db.add(new_photo)
+    return new_photo
 
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalars().first()
-    if user:
-        user.photos_uploaded = user.photos_uploaded + 1
-        db.add(user)
 
-    await db.commit()
-    await db.refresh(new_photo)
+async def finalize_photo_upload(photo_id: int, public_id: str, url: Optional[str],
+                                error: Optional[BaseException]) -> None:
+    """
+    Completion callback of the upload pipeline: stores the uploaded URL and marks the photo ready,
+    or marks it failed if the upload raised.
 
-    return new_photo
+    Runs after the request that created the photo has finished, so it uses its own session. If the photo was
+    deleted while its upload was in flight, the stored image is deleted too instead of being orphaned.
+
+    Args:
+        photo_id (int): The ID of the uploaded photo.
+        public_id (str): The public id the image was stored under.
+        url (Optional[str]): The URL returned by the storage, None if the upload failed.
+        error (Optional[BaseException]): The exception raised by the upload, if any.
+    """
+    if error is None:
+        values = {"url": url, "original_url": url, "status": PhotoStatus.READY.value}
+    else:
+        values = {"status": PhotoStatus.FAILED.value}
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(update(Photo).where(Photo.id == photo_id).values(**values))
+        await db.commit()
+    if result.rowcount == 0 and error is None:
+        logger.info("Photo %s was deleted during its upload, deleting image %s", photo_id, public_id)
+        await PhotoService.delete_image(public_id)
+
+
+async def fail_stale_uploads() -> int:
+    """
+    Marks failed the photos still processing settings.UPLOAD_STALE_MINUTES after they were created.
+
+    The upload pipeline lives in the worker that received the upload, so a photo whose worker crashed or was
+    restarted before finalize_photo_upload ran would stay processing forever.
+
+    Returns:
+        int: The number of photos marked failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.UPLOAD_STALE_MINUTES)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Photo)
+            .where(Photo.status == PhotoStatus.PROCESSING.value, Photo.created_at < cutoff)
+            .values(status=PhotoStatus.FAILED.value)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
 
 
 @log_function
@@ -190,7 +245,8 @@ async def get_photo(db: AsyncSession, photo_id: int):
 
 
 @log_function
-async def update_photo_description(photo_id: int, new_description: str, db: AsyncSession) -> Photo:
+async def update_photo_description(photo_id: int, new_description: str, db: AsyncSession,
+                                   photo: Optional[Photo] = None) -> Photo:
     """
     Updates the description of a photo in the database.
 
@@ -198,39 +254,46 @@ async def update_photo_description(photo_id: int, new_description: str, db: Asyn
         photo_id (int): The ID of the photo to update.
         new_description (str): The new description for the photo.
         db (AsyncSession): The database session.
+        photo (Optional[Photo]): The photo, if already loaded in this session.
 
     Returns:
         Photo: The updated Photo object.
     """
-    photo = await get_photo(db, photo_id)
+    if photo is None:
+        photo = await get_photo(db, photo_id)
     photo.description = new_description
     db.add(photo)
+    await db.flush()
+    await update_search_document(db, photo_id)
     await db.commit()
     await db.refresh(photo)
     return photo
 
 
 @log_function
-async def delete_photo(db: AsyncSession, photo_id: int):
+async def delete_photo(db: AsyncSession, photo_id: int, photo: Optional[Photo] = None):
     """
-    Deletes a photo from the database and decrements the owner's photo counter.
+    Deletes a photo from the database, decrements the owner's photo counter and removes the image from storage.
 
     Parameters:
     db (AsyncSession): The database session.
     photo_id (int): The ID of the photo to delete.
+    photo (Optional[Photo]): The photo, if already loaded in this session.
 
     Raises:
     HTTPException: If the photo is not found.
     """
-    photo = await get_photo(db, photo_id)
-
-    user = await get_user(db, photo.user_id)
-    if user:
-        user.photos_uploaded -= 1
-        db.add(user)
+    if photo is None:
+        photo = await get_photo(db, photo_id)
 
+    public_id, url = photo.public_id, photo.url
+    await adjust_photos_uploaded(db, photo.user_id, -1)
     await db.delete(photo)
     await db.commit()
+    remove_search_document(photo_id)
+    qr_code_cache.invalidate(url)
+    if public_id:
+        await PhotoService.delete_image(public_id)
 
 
 @log_function
@@ -246,29 +309,116 @@ async def update_photo_url(db: AsyncSession, photo_id: int, new_url: str, ) -> P
         Photo: The updated Photo object.
     """
     photo = await get_photo(db, photo_id)
+    old_url = photo.url
     photo.url = new_url
     db.add(photo)
     await db.commit()
     await db.refresh(photo)
+    if old_url != new_url:
+        qr_code_cache.invalidate(old_url)
     return photo
 
 
 @retry(wait=wait_fixed(1), stop=stop_after_attempt(3))
-@log_function
-async def get_photos_with_details(db: AsyncSession):
+async def get_photos_feed(db: AsyncSession, cursor: Optional[int] = None,
+                          limit: int = settings.FEED_PAGE_SIZE) -> Tuple[List[Photo], Optional[int]]:
+    """
+    Retrieves a single page of the photo feed, newest first, using keyset pagination on Photo.id.
+    Only the photos whose upload is done are listed.
+
+    Instead of OFFSET the page is located with ``Photo.id < cursor``, so every page is a bounded range read
+    on the primary key and page N costs the same as page 1.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy asynchronous session.
+        cursor (Optional[int]): The id of the last photo of the previous page. None for the first page.
+        limit (int): The maximum number of photos to return.
+
+    Returns:
+        Tuple[List[Photo], Optional[int]]: The photos of the page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    limit = max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+    stmt = (
+        select(Photo)
+        .options(selectinload(Photo.tags), selectinload(Photo.owner))
+        .where(Photo.status == PhotoStatus.READY.value)
+        .order_by(desc(Photo.id))
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(Photo.id < cursor)
+
+    result = await db.execute(stmt)
+    photos = list(result.scalars().all())
+
+    next_cursor = None
+    if len(photos) > limit:
+        photos = photos[:limit]
+        next_cursor = photos[-1].id
+    return photos, next_cursor
+
+
+async def get_photos_by_tags(db: AsyncSession, tag_names: List[str], match_all: bool = True,
+                             cursor: Optional[int] = None,
+                             limit: int = settings.FEED_PAGE_SIZE) -> Tuple[List[Photo], Optional[int]]:
+    """
+    Retrieves a single page of the photos with the given tags, newest first, using keyset pagination on Photo.id.
+
+    The photo ids are found on photo_m2m_tag, one range of the (tag, photo) index per tag joined to the photos
+    whose upload is done, and only the photos of the page are then loaded.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy asynchronous session.
+        tag_names (List[str]): The tag names to filter on.
+        match_all (bool): True to require every tag, False to require any of them.
+        cursor (Optional[int]): The id of the last photo of the previous page. None for the first page.
+        limit (int): The maximum number of photos to return.
+
+    Returns:
+        Tuple[List[Photo], Optional[int]]: The photos of the page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    limit = max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+    names = list(dict.fromkeys(name.strip() for name in tag_names if name and name.strip()))
+    tag_ids = list((await get_tag_ids(db, names)).values())
+    if not tag_ids or (match_all and len(tag_ids) < len(names)):
+        return [], None
+
+    stmt = (
+        select(photo_m2m_tag.c.photo)
+        .join(Photo, Photo.id == photo_m2m_tag.c.photo)
+        .where(photo_m2m_tag.c.tag.in_(tag_ids), Photo.status == PhotoStatus.READY.value)
+        .group_by(photo_m2m_tag.c.photo)
+        .order_by(desc(photo_m2m_tag.c.photo))
+        .limit(limit + 1)
+    )
+    if match_all and len(tag_ids) > 1:
+        stmt = stmt.having(func.count(func.distinct(photo_m2m_tag.c.tag)) == len(tag_ids))
+    if cursor is not None:
+        stmt = stmt.where(photo_m2m_tag.c.photo < cursor)
+    photo_ids = list((await db.execute(stmt)).scalars().all())
+
+    next_cursor = None
+    if len(photo_ids) > limit:
+        photo_ids = photo_ids[:limit]
+        next_cursor = photo_ids[-1]
+    if not photo_ids:
+        return [], None
+
     result = await db.execute(
         select(Photo)
         .options(selectinload(Photo.tags), selectinload(Photo.owner))
+        .where(Photo.id.in_(photo_ids))
         .order_by(desc(Photo.id))
     )
-    photos_with_details = result.scalars().all()
-    return photos_with_details
+    return list(result.scalars().all()), next_cursor
 
 
 async def get_post_by_id(db: AsyncSession, photo_id: int) -> Photo:
     """
     Retrieve a photo by its ID, including related tags, comments, and the owner.
-    Also calculates the average rating for the photo.
+    The average rating is read from the rating aggregates kept on the photo, see Photo.average_rating.
 
     Args:
         db (AsyncSession): The SQLAlchemy asynchronous session.
@@ -281,16 +431,11 @@ async def get_post_by_id(db: AsyncSession, photo_id: int) -> Photo:
 
     result = await db.execute(
         select(Photo)
-        .options(selectinload(Photo.tags), selectinload(Photo.comments), selectinload(Photo.owner))
+        .options(
+            selectinload(Photo.tags),
+            selectinload(Photo.comments).selectinload(Comment.user),
+            selectinload(Photo.owner)
+        )
         .filter(Photo.id == photo_id)
-        .outerjoin(Rating)
-        .group_by(Photo.id)
-        .add_columns(func.round(func.avg(Rating.rating), 2).label("average_rating"))
     )
-
-    photo, average_rating = result.first() or (None, None)
-
-    if photo:
-        photo.average_rating = average_rating  # Attach the calculated average rating to the photo
-
-    return photo
+    return result.scalars().first()
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, desc, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.src.config.config import settings
+from app.src.config.logging_config import log_function
+from app.src.services.ranking import trending_scores
+from app.src.util.db import AsyncSessionLocal
+from app.src.util.models.comment import Comment
+from app.src.util.models.photo import Photo, PhotoStatus
+from app.src.util.models.photo_ranking import PhotoRanking
+from app.src.util.models.rating import Rating
+
+RANKING_KINDS = ("top", "trending")
+
+
+async def compute_top_rated(db: AsyncSession, limit: int) -> List[Tuple[int, float]]:
+    """
+    Ranks rated photos by the Bayesian average of their ratings, see app.src.services.ranking.bayesian_average.
+
+    The score is computed in SQL from the rating aggregates kept on the photos, so no ratings are read.
+
+    Args:
+        db (AsyncSession): The database session.
+        limit (int): The number of photos to return.
+
+    Returns:
+        List[Tuple[int, float]]: (photo_id, score) of the ``limit`` best photos, best first.
+    """
+    totals = await db.execute(select(func.sum(Photo.rating_count), func.sum(Photo.rating_sum)))
+    rating_count, rating_sum = totals.one()
+    prior_mean = (rating_sum or 0) / rating_count if rating_count else 0.0
+    prior_weight = settings.RANKING_PRIOR_WEIGHT
+
+    score = ((prior_weight * prior_mean + Photo.rating_sum) / (prior_weight + Photo.rating_count)).label("score")
+    result = await db.execute(
+        select(Photo.id, score)
+        .where(Photo.rating_count > 0, Photo.status == PhotoStatus.READY.value)
+        .order_by(desc(score), desc(Photo.id))
+        .limit(limit)
+    )
+    return [(photo_id, float(value)) for photo_id, value in result.all()]
+
+
+async def compute_trending(db: AsyncSession, limit: int, now: Optional[datetime] = None) -> List[Tuple[int, float]]:
+    """
+    Ranks photos by their time-decayed rating and comment activity over the trending window,
+    see app.src.services.ranking.trending_scores.
+
+    Args:
+        db (AsyncSession): The database session.
+        limit (int): The number of photos to return.
+        now (Optional[datetime]): The reference time, defaults to the current UTC time.
+
+    Returns:
+        List[Tuple[int, float]]: (photo_id, score) of the ``limit`` best photos, best first.
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=settings.RANKING_TRENDING_WINDOW_DAYS)
+    ratings = await db.execute(
+        select(Rating.photo_id, Rating.rating, Rating.created_at)
+        .join(Photo, Photo.id == Rating.photo_id)
+        .where(Rating.created_at >= since, Photo.status == PhotoStatus.READY.value)
+    )
+    comments = await db.execute(
+        select(Comment.photo_id, Comment.created_at)
+        .join(Photo, Photo.id == Comment.photo_id)
+        .where(Comment.created_at >= since, Photo.status == PhotoStatus.READY.value)
+    )
+    return trending_scores(ratings.all(), comments.all(), now,
+                           half_life_hours=settings.RANKING_TRENDING_HALF_LIFE_HOURS,
+                           comment_weight=settings.RANKING_COMMENT_WEIGHT, limit=limit)
+
+
+@log_function(sample_rate=1.0)
+async def refresh_photo_rankings() -> dict:
+    """
+    Scheduled job that rebuilds the materialized "top" and "trending" leaderboards in the photo_rankings table.
+
+    Each leaderboard is replaced in a single transaction, so readers see either the old or the new ranking.
+
+    Returns:
+        dict: The number of ranked photos per leaderboard.
+    """
+    sizes = {}
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        rankings = {
+            "top": await compute_top_rated(db, settings.RANKING_SIZE),
+            "trending": await compute_trending(db, settings.RANKING_SIZE, now),
+        }
+        for kind, ranked in rankings.items():
+            await db.execute(delete(PhotoRanking).where(PhotoRanking.kind == kind))
+            if ranked:
+                await db.execute(insert(PhotoRanking), [
+                    {"kind": kind, "rank": rank, "photo_id": photo_id, "score": score, "computed_at": now}
+                    for rank, (photo_id, score) in enumerate(ranked, start=1)
+                ])
+            sizes[kind] = len(ranked)
+        await db.commit()
+    return sizes
+
+
+async def get_ranked_photos(db: AsyncSession, kind: str, cursor: Optional[int] = None,
+                            limit: int = settings.FEED_PAGE_SIZE) -> Tuple[List[Photo], Optional[int]]:
+    """
+    Retrieves a page of a materialized leaderboard.
+
+    The page is a range read on the (kind, rank) primary key of photo_rankings, joined to photos by primary key.
+
+    Args:
+        db (AsyncSession): The database session.
+        kind (str): The leaderboard, one of RANKING_KINDS.
+        cursor (Optional[int]): The rank of the last photo of the previous page. None for the first page.
+        limit (int): The maximum number of photos to return.
+
+    Returns:
+        Tuple[List[Photo], Optional[int]]: The photos of the page, best first, and the cursor of the next page,
+        or None if this is the last page.
+    """
+    limit = max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+    stmt = (
+        select(Photo, PhotoRanking.rank)
+        .join(PhotoRanking, PhotoRanking.photo_id == Photo.id)
+        .options(selectinload(Photo.tags), selectinload(Photo.owner))
+        .where(PhotoRanking.kind == kind)
+        .order_by(PhotoRanking.rank)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(PhotoRanking.rank > cursor)
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].rank
+    return [row.Photo for row in rows], next_cursor
@@ -1,11 +1,36 @@
+from sqlalchemy import update, func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
+from app.src.config.logging_config import log_function
+from app.src.util.db import AsyncSessionLocal
 from app.src.util.models.rating import Rating
 from app.src.util.schemas.rating import RatingCreate
 from sqlalchemy.future import select
 from app.src.util.models import User, Photo
 
+
+async def adjust_rating_aggregate(db: AsyncSession, photo_id: int, count_delta: int, sum_delta: int) -> None:
+    """
+    Adds deltas to the rating_count and rating_sum of a photo.
+
+    The update is a single relative UPDATE, so concurrent ratings never overwrite each other. It is not committed:
+    call it in the same transaction as the change to the ratings table.
+
+    Args:
+        db (AsyncSession): The database session.
+        photo_id (int): The ID of the rated photo.
+        count_delta (int): The change of the number of ratings.
+        sum_delta (int): The change of the sum of ratings.
+    """
+    await db.execute(
+        update(Photo)
+        .where(Photo.id == photo_id)
+        .values(rating_count=Photo.rating_count + count_delta, rating_sum=Photo.rating_sum + sum_delta)
+        .execution_options(synchronize_session=False)
+    )
+
 async def get_rating(db: AsyncSession, rating_id: int) -> Rating:
     """
     Retrieve a rating by its ID from the database.
@@ -69,8 +94,15 @@ async def create_rating(photo_id: int, rate: int, user_id, db: AsyncSession) ->
     if already_rated:
         raise HTTPException(status_code=status.HTTP_423_LOCKED, detail="It's not possible to rate twice.")
 
-    new_rating = Rating(photo_id=photo_id, rate=rate, user_id=user_id)
+    new_rating = Rating(photo_id=photo_id, rating=rate, user_id=user_id)
     db.add(new_rating)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # A concurrent request rated the photo first, caught by the unique (photo_id, user_id) index.
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_423_LOCKED, detail="It's not possible to rate twice.")
+    await adjust_rating_aggregate(db, photo_id, 1, rate)
     await db.commit()
     await db.refresh(new_rating)
     return new_rating
@@ -93,10 +125,16 @@ async def update_rating(db: AsyncSession, rating_id: int, body: RatingCreate) ->
     rating_db = result.scalars().first()
 
     if rating_db:
+        old_photo_id, old_rating = rating_db.photo_id, rating_db.rating or 0
 
         for key, value in body.dict().items():
             setattr(rating_db, key, value)
 
+        if rating_db.photo_id != old_photo_id:
+            await adjust_rating_aggregate(db, old_photo_id, -1, -old_rating)
+            await adjust_rating_aggregate(db, rating_db.photo_id, 1, rating_db.rating)
+        elif rating_db.rating != old_rating:
+            await adjust_rating_aggregate(db, rating_db.photo_id, 0, rating_db.rating - old_rating)
         await db.commit()
         await db.refresh(rating_db)
 
@@ -120,10 +158,34 @@ async def delete_rating(rate_id: int, db: AsyncSession, user: User) -> None:
 
     if rate:
         await db.delete(rate)  # Perform deletion
+        await adjust_rating_aggregate(db, rate.photo_id, -1, -(rate.rating or 0))
         await db.commit()  # Commit the transaction
         return rate
     return None
 
 
+@log_function
+async def reconcile_rating_aggregates() -> int:
+    """
+    Scheduled job that recomputes rating_count and rating_sum of the photos whose aggregates drifted
+    from the ratings table, e.g. after manual edits or rows deleted outside the CRUD functions.
 
-
+    Returns:
+        int: The number of photos fixed.
+    """
+    actual_count = (
+        select(func.count(Rating.id)).where(Rating.photo_id == Photo.id).correlate(Photo).scalar_subquery()
+    )
+    actual_sum = (
+        select(func.coalesce(func.sum(Rating.rating), 0)).where(Rating.photo_id == Photo.id)
+        .correlate(Photo).scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Photo)
+            .where(or_(Photo.rating_count != actual_count, Photo.rating_sum != actual_sum))
+            .values(rating_count=actual_count, rating_sum=actual_sum)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
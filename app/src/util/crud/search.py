@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import cast, desc, event, func, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.src.config.config import settings
+from app.src.config.logging_config import log_function
+from app.src.services.search_index import search_index
+from app.src.util.models import Photo, Tag
+from app.src.util.models.comment import Comment
+from app.src.util.models.photo import PhotoStatus, photo_m2m_tag
+
+# Session.info key of the in-process index documents waiting for the session's commit.
+PENDING_DOCUMENTS = "search_documents"
+
+
+def uses_full_text(db: AsyncSession) -> bool:
+    """Returns True if searches run on the tsvector column, False if they use the in-process index."""
+    return db.bind.dialect.name == "postgresql"
+
+
+def _weighted(text, label: str):
+    language = cast(literal(settings.SEARCH_LANGUAGE), REGCONFIG)
+    return func.setweight(func.to_tsvector(language, func.coalesce(text, '')), literal_column(f"'{label}'"),
+                          type_=TSVECTOR)
+
+
+def search_vector_expression():
+    """
+    Returns the SQL expression of the search vector of a photo, correlated to the photos table.
+
+    The description weighs "A", the tag names "B" and the comments "C".
+    """
+    tag_names = (
+        select(func.string_agg(Tag.name, ' '))
+        .join(photo_m2m_tag, photo_m2m_tag.c.tag == Tag.id)
+        .where(photo_m2m_tag.c.photo == Photo.id)
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.string_agg(Comment.content, ' '))
+        .where(Comment.photo_id == Photo.id)
+        .scalar_subquery()
+    )
+    return (
+        _weighted(Photo.description, 'A')
+        .op('||', return_type=TSVECTOR)(_weighted(tag_names, 'B'))
+        .op('||', return_type=TSVECTOR)(_weighted(comments, 'C'))
+    )
+
+
+async def update_search_document(db: AsyncSession, photo_id: int) -> None:
+    """
+    Recomputes the search document of a photo after its description, tags or comments changed.
+
+    On PostgreSQL this is one UPDATE of the photo's search_vector, run in the caller's transaction and committed
+    with it. Otherwise the document is read in the caller's transaction and applied to the in-process index,
+    if it has been built already, once the session commits. It is dropped if the session rolls back.
+
+    Args:
+        db (AsyncSession): The database session.
+        photo_id (int): The ID of the photo.
+    """
+    if uses_full_text(db):
+        await db.execute(
+            update(Photo)
+            .where(Photo.id == photo_id)
+            .values(search_vector=search_vector_expression())
+            .execution_options(synchronize_session=False)
+        )
+    elif search_index.ready:
+        documents = await _load_documents(db, [photo_id])
+        db.sync_session.info.setdefault(PENDING_DOCUMENTS, {})[photo_id] = documents.get(photo_id)
+
+
+def _apply_pending_documents(session: Session) -> None:
+    for photo_id, fields in session.info.pop(PENDING_DOCUMENTS, {}).items():
+        if fields is None:
+            search_index.remove(photo_id)
+        else:
+            search_index.index(photo_id, fields)
+
+
+def _discard_pending_documents(session: Session) -> None:
+    session.info.pop(PENDING_DOCUMENTS, None)
+
+
+event.listen(Session, "after_commit", _apply_pending_documents)
+event.listen(Session, "after_rollback", _discard_pending_documents)
+
+
+def remove_search_document(photo_id: int) -> None:
+    """Drops a deleted photo from the in-process index. The tsvector column goes away with the row."""
+    search_index.remove(photo_id)
+
+
+@log_function
+async def search_photos(db: AsyncSession, query: str, cursor: Optional[int] = None,
+                        limit: int = settings.FEED_PAGE_SIZE) -> Tuple[List[Photo], Optional[int]]:
+    """
+    Searches the descriptions, tag names and comments of the photos, best match first.
+
+    The query supports the web search syntax on PostgreSQL ("quoted phrases", or, -excluded) and is matched with
+    the GIN index of photos.search_vector, ranked by ts_rank_cd. On other databases all the words must match and
+    results are ranked by the in-process index, see InvertedIndex.
+
+    Ranked results are paged by position: the cursor is the number of results already returned.
+    At most settings.SEARCH_MAX_RESULTS results can be paged through. Only the photos whose upload is done are
+    returned.
+
+    Args:
+        db (AsyncSession): The database session.
+        query (str): The search text.
+        cursor (Optional[int]): The next_cursor returned with the previous page. None for the first page.
+        limit (int): The maximum number of photos to return.
+
+    Returns:
+        Tuple[List[Photo], Optional[int]]: The photos of the page and the cursor of the next page,
+        or None if this is the last page.
+    """
+    limit = max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+    offset = max(0, cursor or 0)
+    query = (query or "").strip()
+    if not query or offset >= settings.SEARCH_MAX_RESULTS:
+        return [], None
+    limit = min(limit, settings.SEARCH_MAX_RESULTS - offset)
+
+    if uses_full_text(db):
+        ts_query = func.websearch_to_tsquery(cast(literal(settings.SEARCH_LANGUAGE), REGCONFIG), query)
+        rank = func.ts_rank_cd(Photo.search_vector, ts_query)
+        result = await db.execute(
+            select(Photo)
+            .options(selectinload(Photo.tags), selectinload(Photo.owner))
+            .where(Photo.search_vector.op('@@')(ts_query), Photo.status == PhotoStatus.READY.value)
+            .order_by(desc(rank), desc(Photo.id))
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        photos = list(result.scalars().all())
+        more = len(photos) > limit
+        photos = photos[:limit]
+    else:
+        if not search_index.ready:
+            await rebuild_search_index(db)
+        hits = search_index.search(query, offset + limit + 1)[offset:]
+        # The index also holds the photos still uploading, they are left out of the page but keep their position.
+        more = len(hits) > limit
+        hits = hits[:limit]
+        result = await db.execute(
+            select(Photo)
+            .options(selectinload(Photo.tags), selectinload(Photo.owner))
+            .where(Photo.id.in_([photo_id for photo_id, _ in hits]), Photo.status == PhotoStatus.READY.value)
+        )
+        by_id = {photo.id: photo for photo in result.scalars().all()}
+        photos = [by_id[photo_id] for photo_id, _ in hits if photo_id in by_id]
+
+    return photos, offset + limit if more else None
+
+
+@log_function
+async def rebuild_search_index(db: AsyncSession) -> int:
+    """
+    Builds the in-process index from the database.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        int: The number of indexed photos.
+    """
+    documents = await _load_documents(db)
+    search_index.clear()
+    for photo_id, fields in documents.items():
+        search_index.index(photo_id, fields)
+    search_index.ready = True
+    return len(documents)
+
+
+async def _load_documents(db: AsyncSession, photo_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, str]]:
+    photo_ids = list(photo_ids) if photo_ids is not None else None
+
+    def only(stmt, column):
+        return stmt if photo_ids is None else stmt.where(column.in_(photo_ids))
+
+    documents = {
+        photo_id: {"A": description or "", "B": "", "C": ""}
+        for photo_id, description in await db.execute(only(select(Photo.id, Photo.description), Photo.id))
+    }
+    tags = only(select(photo_m2m_tag.c.photo, Tag.name).join(Tag, Tag.id == photo_m2m_tag.c.tag),
+                photo_m2m_tag.c.photo)
+    for photo_id, name in await db.execute(tags):
+        if photo_id in documents:
+            documents[photo_id]["B"] += f" {name}"
+    for photo_id, content in await db.execute(only(select(Comment.photo_id, Comment.content), Comment.photo_id)):
+        if photo_id in documents and content:
+            documents[photo_id]["C"] += f" {content}"
+    return documents
@@ -1,7 +1,13 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
 from fastapi import HTTPException, status
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.src.config.config import settings
 from app.src.config.logging_config import log_function
 from app.src.util.models import Tag
 
@@ -50,28 +56,171 @@ async def get_tag_by_name(db: AsyncSession, tag_name: str) -> Tag:
     return tag
 
 
+class TagCache:
+    """
+    Bounded LRU map of tag name to tag id.
+
+    Tags are never renamed or deleted, so entries never go stale. Only tags read back from the database are cached,
+    tags inserted by the current transaction are not, since it may still roll back.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+
+    def get(self, name: str) -> Optional[int]:
+        tag_id = self._ids.get(name)
+        if tag_id is not None:
+            self._ids.move_to_end(name)
+        return tag_id
+
+    def put(self, name: str, tag_id: int) -> None:
+        if self.max_size <= 0:
+            return
+        self._ids[name] = tag_id
+        self._ids.move_to_end(name)
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+tag_cache = TagCache(max_size=settings.TAG_CACHE_SIZE)
+
+
+def split_tag_names(tag_names: Optional[List[str]], max_number: int) -> List[str]:
+    """
+    Splits the submitted tag fields on commas, trims and de-duplicates the names, and keeps the first ``max_number``.
+
+    Args:
+        tag_names (Optional[List[str]]): The submitted tag fields, e.g. ["nature, sea", "sunset"].
+        max_number (int): The maximum number of tags.
+
+    Returns:
+        List[str]: The tag names, in submission order.
+    """
+    names = []
+    for field in tag_names or []:
+        for name in (field or "").split(','):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+    return names[:max_number]
+
+
 @log_function
-async def parse_tags(db: AsyncSession, tag_names: list, max_number: int) -> list:
-    tags = [tag.strip() for tag in tag_names[0].split(',')]
-    if len(tags) > max_number:
-        tags = tags[:max_number]
-    tag_instances = []
-    for tag_name in tags:
-        tag_instance = await db.execute(select(Tag).where(Tag.name == tag_name))
-        existing_tag = tag_instance.scalars().first()
-        if existing_tag:
-            tag_instances.append(existing_tag)
+async def parse_tags(db: AsyncSession, tag_names: list, max_number: int) -> List[int]:
+    """
+    Resolves submitted tag names to tag ids, creating the missing tags.
+
+    Names found in the tag cache cost nothing. The others are resolved with one SELECT, and the ones still missing
+    are created with one INSERT ... ON CONFLICT DO NOTHING RETURNING. Nothing is committed and nothing is rolled
+    back, so the caller's pending changes (e.g. the photo being created) are left untouched.
+
+    Args:
+        db (AsyncSession): The database session.
+        tag_names (list): The submitted tag fields, see split_tag_names.
+        max_number (int): The maximum number of tags.
+
+    Returns:
+        List[int]: The ids of the tags, in submission order.
+    """
+    names = split_tag_names(tag_names, max_number)
+    ids: Dict[str, int] = {}
+    missing = []
+    for name in names:
+        tag_id = tag_cache.get(name)
+        if tag_id is None:
+            missing.append(name)
+        else:
+            ids[name] = tag_id
+
+    if missing:
+        for tag_id, name in await _select_tag_ids(db, missing):
+            ids[name] = tag_id
+            tag_cache.put(name, tag_id)
+        missing = [name for name in missing if name not in ids]
+
+    if missing:
+        dialect_insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        result = await db.execute(
+            dialect_insert(Tag)
+            .values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+            .returning(Tag.id, Tag.name)
+        )
+        for tag_id, name in result.all():
+            ids[name] = tag_id
+        missing = [name for name in missing if name not in ids]
+
+    if missing:
+        # Created by a concurrent transaction between our SELECT and INSERT.
+        for tag_id, name in await _select_tag_ids(db, missing):
+            ids[name] = tag_id
+
+    return [ids[name] for name in names if name in ids]
+
+
+async def get_tag_ids(db: AsyncSession, names: List[str]) -> Dict[str, int]:
+    """
+    Looks up the ids of existing tags, without creating the missing ones.
+
+    Args:
+        db (AsyncSession): The database session.
+        names (List[str]): The tag names.
+
+    Returns:
+        Dict[str, int]: The ids of the tags that exist, by name.
+    """
+    ids: Dict[str, int] = {}
+    missing = []
+    for name in names:
+        tag_id = tag_cache.get(name)
+        if tag_id is None:
+            missing.append(name)
         else:
-            new_tag = Tag(name=tag_name)
-            db.add(new_tag)
-            try:
-                await db.commit()
-                await db.refresh(new_tag)
-                tag_instances.append(new_tag)
-            except IntegrityError:
-                await db.rollback()
-                tag_instance = await db.execute(select(Tag).where(Tag.name == tag_name))
-                existing_tag = tag_instance.scalars().first()
-                if existing_tag:
-                    tag_instances.append(existing_tag)
-    return tag_instances
+            ids[name] = tag_id
+    if missing:
+        for tag_id, name in await _select_tag_ids(db, missing):
+            ids[name] = tag_id
+            tag_cache.put(name, tag_id)
+    return ids
+
+
+async def autocomplete_tags(db: AsyncSession, prefix: str, limit: int = settings.TAG_AUTOCOMPLETE_LIMIT) -> List[Tag]:
+    """
+    Retrieves the tags whose name starts with a prefix, in alphabetical order.
+
+    The LIKE 'prefix%' lookup is a range scan on the ix_tags_name_pattern index.
+
+    Args:
+        db (AsyncSession): The database session.
+        prefix (str): The beginning of the tag name. LIKE wildcards in it are matched literally.
+        limit (int): The maximum number of tags to return.
+
+    Returns:
+        List[Tag]: The matching tags.
+    """
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    result = await db.execute(
+        select(Tag)
+        .where(Tag.name.startswith(prefix, autoescape=True))
+        .order_by(Tag.name)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def _select_tag_ids(db: AsyncSession, names: List[str]):
+    if db.bind.dialect.name == "postgresql":
+        condition = Tag.name == any_(bindparam("names", names, type_=ARRAY(String)))
+    else:
+        condition = Tag.name.in_(names)
+    result = await db.execute(select(Tag.id, Tag.name).where(condition))
+    return result.all()
@@ -1,10 +1,13 @@
-from datetime import datetime
-from sqlalchemy import delete
-from ..models.token import BlacklistedToken, Token
-from app.src.util.db import AsyncSessionLocal as SessionLocal, get_db
+import time
+from datetime import datetime, timedelta
+from typing import List
+from ..models.token import BlacklistedToken, Token, RevokedToken
+from app.src.config.config import settings
+from app.src.util.db import AsyncSessionLocal as SessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.src.config.logging_config import log_function
+from app.src.services.maintenance import delete_in_batches
 
 
 async def blacklist_token(db: AsyncSession, token: str):
@@ -26,11 +29,57 @@ async def is_token_blacklisted(db: AsyncSession, token: str) -> bool:
     return blacklisted_token is not None
 
 
-async def remove_expired_tokens():
-    async for session in get_db():
-        delete_stmt = delete(Token).where(Token.expires_at < datetime.utcnow())
-        await session.execute(delete_stmt)
-        await session.commit()
+async def revoke_jti(db: AsyncSession, jti: str, expires_at: datetime, user_id: int = None) -> RevokedToken:
+    """
+    Stores the jti of a revoked token until the token's own expiry.
+
+    Args:
+        db (AsyncSession): The database session.
+        jti (str): The jti claim of the token.
+        expires_at (datetime): The expiry of the token, after which the row can be purged.
+        user_id (int): The ID of the user the token was issued to, if known.
+
+    Returns:
+        RevokedToken: The stored or already existing revocation.
+    """
+    revoked = await db.get(RevokedToken, jti)
+    if revoked:
+        return revoked
+    revoked = RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at)
+    db.add(revoked)
+    await db.commit()
+    return revoked
+
+
+async def get_revocations_since(db: AsyncSession, since: datetime) -> List[RevokedToken]:
+    """
+    Retrieves the unexpired revocations recorded at or after the given moment.
+
+    Args:
+        db (AsyncSession): The database session.
+        since (datetime): Lower bound for RevokedToken.revoked_at.
+
+    Returns:
+        List[RevokedToken]: The matching revocations.
+    """
+    result = await db.execute(
+        select(RevokedToken).filter(RevokedToken.revoked_at >= since,
+                                    RevokedToken.expires_at > datetime.utcnow())
+    )
+    return result.scalars().all()
+
+
+async def remove_expired_tokens() -> int:
+    """
+    Purges the expired tokens, oldest expiry first, in batches of settings.TOKEN_PURGE_BATCH_SIZE rows walking
+    the expires_at index. A run stops after settings.TOKEN_PURGE_TIME_BUDGET_SECONDS, the next one resumes.
+
+    Returns:
+        int: The number of tokens deleted.
+    """
+    return await delete_in_batches(Token, Token.expires_at < datetime.utcnow(), key_column=Token.expires_at,
+                                   batch_size=settings.TOKEN_PURGE_BATCH_SIZE,
+                                   time_budget=settings.TOKEN_PURGE_TIME_BUDGET_SECONDS)
 
 async def get_active_tokens_for_user(db: AsyncSession, user_id: int):
     result = await db.execute(
@@ -39,14 +88,24 @@ async def get_active_tokens_for_user(db: AsyncSession, user_id: int):
     return result.scalars().all()
 
 @log_function
-async def remove_blacklisted_tokens():
-    async for session in get_db():
-        result = await session.execute(select(BlacklistedToken))
-        tokens = result.scalars().all()
-        for token in tokens:
-            await session.delete(token)
-
-        await session.commit()
-
+async def remove_blacklisted_tokens() -> int:
+    """
+    Purges revocations that can no longer matter because the revoked token has expired.
 
+    Legacy blacklist rows carry no expiry, so they are kept for the longest token lifetime after blacklisting.
+    Both are purged like remove_expired_tokens, oldest first in index order, within one time budget.
 
+    Returns:
+        int: The number of revocations deleted.
+    """
+    started = time.perf_counter()
+    budget = settings.TOKEN_PURGE_TIME_BUDGET_SECONDS
+    now = datetime.utcnow()
+    legacy_cutoff = now - timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    deleted = await delete_in_batches(RevokedToken, RevokedToken.expires_at < now, key_column=RevokedToken.expires_at,
+                                      batch_size=settings.TOKEN_PURGE_BATCH_SIZE, time_budget=budget)
+    deleted += await delete_in_batches(BlacklistedToken, BlacklistedToken.blacklisted_on < legacy_cutoff,
+                                       key_column=BlacklistedToken.blacklisted_on,
+                                       batch_size=settings.TOKEN_PURGE_BATCH_SIZE,
+                                       time_budget=None if budget is None else budget - (time.perf_counter() - started))
+    return deleted
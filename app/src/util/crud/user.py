@@ -3,12 +3,13 @@ from app.src.config.hash import hash_handler
 from app.src.services.un_generator import generate_unique_username
 from app.src.util.models.user import UserRole
 from app.src.util.schemas import user as schema_user
-from app.src.util.models import user as model_user, User
-from app.src.config.jwt import create_access_token
+from app.src.util.models import user as model_user, User, Photo
 from app.src.config.logging_config import log_function
+from app.src.services.identity_cache import identity_cache
+from app.src.util.db import AsyncSessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, func
 
 
 @log_function
@@ -42,7 +43,6 @@ async def create_user(db: AsyncSession, user: dict[str, str]) -> User:
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
-    await create_access_token(data={"sub": db_user.email}, user_id=db_user.id, db=db)
     return db_user
 
 
@@ -136,6 +136,7 @@ async def deactivate_user(db: AsyncSession, user_id: int):
     )
     await db.execute(stmt)
     await db.commit()
+    identity_cache.invalidate_user(user_id)
 
 
 async def get_user_count(db: AsyncSession) -> int:
@@ -169,3 +170,57 @@ async def get_user_by_username(db: AsyncSession, username: str):
     if user:
         return schema_user.User.from_orm(user)
     return None
+
+
+async def adjust_photos_uploaded(db: AsyncSession, user_id: int, delta: int) -> None:
+    """
+    Adds a delta to the photos_uploaded counter of a user.
+
+    The update is a single relative UPDATE, so concurrent uploads and deletions never overwrite each other.
+    It is not committed: call it in the same transaction as the change to the photos table.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (int): The ID of the user.
+        delta (int): The change of the number of uploaded photos.
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(photos_uploaded=func.coalesce(User.photos_uploaded, 0) + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reconcile_photo_counts() -> int:
+    """
+    Scheduled job that recounts photos_uploaded of the users whose counter drifted from the photos table,
+    e.g. after photos were deleted outside the CRUD functions.
+
+    The drifted users are locked first (SELECT ... FOR UPDATE), then recounted by a second statement. Under
+    READ COMMITTED a single UPDATE ... SET photos_uploaded = (count) computes the count from its own snapshot:
+    an upload committing while it waits for the user row would be re-checked on the row but counted with the old
+    snapshot, and the job would itself introduce drift. Once the rows are locked, the uploads that held them have
+    committed and are seen by the next statement, and new uploads wait for the job to commit before they adjust
+    the counter.
+
+    Returns:
+        int: The number of users fixed.
+    """
+    actual_count = (
+        select(func.count(Photo.id)).where(Photo.user_id == User.id).correlate(User).scalar_subquery()
+    )
+    drifted = func.coalesce(User.photos_uploaded, -1) != actual_count
+    async with AsyncSessionLocal() as db:
+        user_ids = (await db.execute(select(User.id).where(drifted).with_for_update())).scalars().all()
+        if not user_ids:
+            await db.commit()
+            return 0
+        result = await db.execute(
+            update(User)
+            .where(User.id.in_(user_ids), drifted)
+            .values(photos_uploaded=actual_count)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
@@ -1,6 +1,8 @@
 from sqlalchemy.exc import OperationalError
 
 from app.src.config.config import settings
+from app.src.services.db_pool import InstrumentedPool, pool_manager
+from app.src.services.query_stats import query_stats
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
@@ -8,7 +10,18 @@ DATABASE_URL = f"postgresql+asyncpg://{settings.DATABASE_USER}:{settings.DATABAS
 
 Base = declarative_base()
 
-async_engine = create_async_engine(DATABASE_URL, echo=True, pool_pre_ping=True, pool_size=10, max_overflow=20, pool_timeout=30)
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DATABASE_ECHO,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+query_stats.attach(async_engine)
+pool_manager.attach(async_engine)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -1,7 +1,12 @@
 from .photo import Photo
+from .comment import Comment
+from .rating import Rating
 from .user import User
 from .tag import Tag
-from .token import Token, BlacklistedToken
-
-__all__ = ["User", "Photo", "Tag", "BlacklistedToken"]
+from .derived_asset import DerivedAsset
+from .photo_ranking import PhotoRanking
+from .maintenance_run import MaintenanceRun
+from .token import Token, BlacklistedToken, RevokedToken
 
+__all__ = ["User", "Photo", "Comment", "Rating", "Tag", "BlacklistedToken", "RevokedToken", "DerivedAsset",
+           "PhotoRanking", "MaintenanceRun"]
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Index
+from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 from app.src.util.db import Base
 
@@ -19,14 +19,18 @@ class Comment(Base):
     """
 
     __tablename__ = "comments"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_comments_user_id_id', 'user_id', 'id'),
+        Index('ix_comments_photo_id_id', 'photo_id', 'id'),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True)
     content = Column(String)
     photo_id = Column(Integer, ForeignKey("photos.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
-    user = relationship("User", backref="comments", lazy='selectin')
-    photo = relationship("Photo", backref="comments", lazy='selectin')
\ No newline at end of file
+    user = relationship("User", backref=backref("comments", lazy='raise'), lazy='raise')
+    photo = relationship("Photo", backref=backref("comments", lazy='raise'), lazy='raise')
\ No newline at end of file
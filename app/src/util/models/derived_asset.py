@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+from app.src.util.db import Base
+
+
+class DerivedAsset(Base):
+    """
+    This class represents a transformed variant (resize, filter) of a photo.
+
+    Only the recipe is stored, the rendered image lives in the on-disk derived cache and is regenerated from the
+    recipe when it has been evicted.
+
+    Attributes:
+    - id (int): The unique identifier of the asset.
+    - key (str): Digest of (public_id, spec), also the name of the rendered file in the cache.
+    - photo_id (int): The foreign key referencing the photo the variant belongs to.
+    - public_id (str): The public id of the original image in storage.
+    - spec (str): The transformation, as canonical JSON.
+    - created_at (datetime): The timestamp of when the variant was first requested.
+    """
+
+    __tablename__ = "derived_assets"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(64), unique=True, nullable=False)
+    photo_id = Column(Integer, ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True)
+    public_id = Column(String, nullable=False)
+    spec = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime
+from app.src.util.db import Base
+
+
+class MaintenanceRun(Base):
+    """
+    This class represents the last run of a maintenance job across all the workers of a deployment.
+
+    The row is written by the worker holding the job's advisory lock, so the workers that fire later in the
+    same interval find the job already run and skip it.
+
+    Attributes:
+    - name (str): The name of the job.
+    - last_run_at (datetime): When the last run started (UTC).
+    """
+
+    __tablename__ = "maintenance_runs"
+    __table_args__ = {'extend_existing': True}
+
+    name = Column(String(64), primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<MaintenanceRun(name={self.name}, last_run_at={self.last_run_at})>"
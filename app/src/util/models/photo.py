@@ -1,5 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Table, Index, Text, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred, backref
+from enum import Enum
 from app.src.util.db import Base
 
 photo_m2m_tag = Table(
@@ -8,9 +12,17 @@ photo_m2m_tag = Table(
     Column("id", Integer, primary_key=True),
     Column("photo", Integer, ForeignKey("photos.id", ondelete="CASCADE")),
     Column("tag", Integer, ForeignKey("tags.id", ondelete="CASCADE")),
+    Index("ix_photo_m2m_tag_tag_photo", "tag", "photo"),
+    Index("ix_photo_m2m_tag_photo_tag", "photo", "tag"),
     extend_existing=True)
 
 
+class PhotoStatus(str, Enum):
+    """Class representing the upload state of a photo."""
+    PROCESSING = 'processing'
+    READY = 'ready'
+    FAILED = 'failed'
+
 
 class Photo(Base):
     """
@@ -20,22 +32,49 @@ class Photo(Base):
     Attributes:
     id (int): The unique identifier of the photo.
     description (str): A brief description of the photo.
-    url (str): The URL of the photo.
+    url (str): The URL of the photo as displayed, either the original or one of its derived variants.
+    original_url (str): The URL of the original upload.
     public_id(str): The unique identifier of the photo.
+    status (str): The upload state of the photo, one of PhotoStatus. url is None until it is ready.
+    created_at (datetime): When the photo was created, used to find uploads left processing by a crash.
+    rating_count (int): The number of ratings of the photo, maintained alongside the ratings table.
+    rating_sum (int): The sum of the ratings of the photo, maintained alongside the ratings table.
+    search_vector (tsvector): The full-text search document of the photo on PostgreSQL, see update_search_document.
     user_id (int): The foreign key to the user who owns the photo.
     owner (User): The user who owns the photo.
     tags (List[Tag]): The list of tags associated with the photo.
     comments (List[Comment]): The list of comments associated with the photo.
+
+    Relationships are never loaded implicitly (lazy='raise'): queries that need them load them explicitly,
+    e.g. with selectinload(Photo.tags).
     """
 
     __tablename__ = 'photos'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_photos_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_photos_user_id_id', 'user_id', 'id'),
+        Index('ix_photos_processing_created_at', 'created_at', postgresql_where=text("status = 'processing'"),
+              sqlite_where=text("status = 'processing'")),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True)
     description = Column(String, nullable=True)
     url = Column(String)
+    original_url = Column(String, nullable=True)
     public_id = Column(String)
+    status = Column(String(16), nullable=False, default=PhotoStatus.READY.value, server_default=PhotoStatus.READY.value)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    rating_count = Column(Integer, nullable=False, default=0, server_default='0')
+    rating_sum = Column(Integer, nullable=False, default=0, server_default='0')
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), 'postgresql'), nullable=True))
     user_id = Column(Integer, ForeignKey('users.id'))
-    owner = relationship("User", backref="photos", lazy='selectin')
-    tags = relationship("Tag", secondary=photo_m2m_tag, back_populates="photos", lazy='selectin')
+    owner = relationship("User", backref=backref("photos", lazy='raise'), lazy='raise')
+    tags = relationship("Tag", secondary=photo_m2m_tag, back_populates="photos", lazy='raise')
 
+    @property
+    def average_rating(self):
+        """The average rating rounded to 2 decimals, or None if the photo has not been rated."""
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from datetime import datetime
+from app.src.util.db import Base
+
+
+class PhotoRanking(Base):
+    """
+    This class represents one entry of a materialized photo leaderboard.
+
+    The table is rebuilt periodically by refresh_photo_rankings. Its primary key is (kind, rank), so a ranked page
+    is a single range read on the primary key.
+
+    Attributes:
+    - kind (str): The leaderboard, "top" or "trending".
+    - rank (int): The 1-based position of the photo in the leaderboard.
+    - photo_id (int): The foreign key referencing the ranked photo.
+    - score (float): The score the photo was ranked by.
+    - computed_at (datetime): The timestamp of the refresh that produced the entry.
+    """
+
+    __tablename__ = "photo_rankings"
+    __table_args__ = {'extend_existing': True}
+
+    kind = Column(String(16), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    photo_id = Column(Integer, ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer,ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from datetime import datetime
+from sqlalchemy.orm import relationship, backref
 from app.src.util.db import Base
 
 class Rating(Base):
@@ -11,16 +12,23 @@ class Rating(Base):
     - rating (int): The rating value, typically an integer between 1 and 5.
     - user_id (int): The foreign key referencing the user who made the rating.
     - photo_id (int): The foreign key referencing the photo being rated.
+    - created_at (datetime): The timestamp of when the rating was made.
     - owner (User): The relationship with the User who made the rating.
     - photo (Photo): The relationship with the Photo being rated.
     """
 
     __tablename__ = 'ratings'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_ratings_user_id_id', 'user_id', 'id'),
+        Index('ix_ratings_photo_id_id', 'photo_id', 'id'),
+        Index('ix_ratings_photo_id_user_id', 'photo_id', 'user_id', unique=True),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True)
-    rating = Column(Integer, index=True)
+    rating = Column(Integer)
     user_id = Column(Integer, ForeignKey('users.id'))
     photo_id = Column(Integer, ForeignKey('photos.id'))
-    owner = relationship("User", backref="ratings", lazy='selectin')
-    photo = relationship("Photo", backref='ratings', lazy='selectin')
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    owner = relationship("User", backref=backref("ratings", lazy='raise'), lazy='raise')
+    photo = relationship("Photo", backref=backref("ratings", lazy='raise'), lazy='raise')
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 from app.src.util.db import Base
 from app.src.util.models.photo import photo_m2m_tag
@@ -16,6 +16,8 @@ class Tag(Base):
         The primary key column for the Tag.
     name : sqlalchemy.Column
         The unique name of the Tag.
+    photos : sqlalchemy.orm.relationship
+        The photos with the Tag. Never loaded implicitly, a popular tag has too many; query photo_m2m_tag instead.
 
     Methods
     -------
@@ -24,10 +26,14 @@ class Tag(Base):
     """
 
     __tablename__ = "tags"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Serves the LIKE 'prefix%' lookups of tag autocompletion on PostgreSQL regardless of the collation.
+        Index('ix_tags_name_pattern', 'name', postgresql_ops={'name': 'varchar_pattern_ops'}),
+        {'extend_existing': True},
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, unique=True, nullable=False)
-    photos = relationship("Photo", secondary=photo_m2m_tag, back_populates="tags", lazy='selectin')
+    photos = relationship("Photo", secondary=photo_m2m_tag, back_populates="tags", lazy='raise')
 
     def __repr__(self):
         return f"<Tag(tag_name={self.name})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
 from datetime import datetime as dt, timedelta
 from app.src.util.db import Base
 
@@ -8,18 +8,44 @@ class BlacklistedToken(Base):
     __table_args__ = {'extend_existing': True}
 
     token = Column(String, primary_key=True, unique=True)
-    blacklisted_on = Column(DateTime, default=dt.utcnow)
+    blacklisted_on = Column(DateTime, default=dt.utcnow, index=True)
 
     def __repr__(self):
         return f"<BlacklistedToken(token={self.token}, blacklisted_on={self.blacklisted_on})>"
 
 
+class RevokedToken(Base):
+    """
+    A revoked JWT, identified by its jti claim.
+
+    Rows are only needed until the token would have expired anyway, so they are purged by expires_at.
+    revoked_at lets workers pull new revocations incrementally.
+    """
+    __tablename__ = "revoked_tokens"
+    __table_args__ = {'extend_existing': True}
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=dt.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
+
+
 class Token(Base):
+    """
+    An issued token. Only refresh tokens are stored unless PERSIST_ACCESS_TOKENS is enabled.
+    """
     __tablename__ = "tokens"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('ix_tokens_user_id_expires_at', 'user_id', 'expires_at'),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True)
     token = Column(String, unique=True, nullable=False)
+    jti = Column(String(32), unique=True, nullable=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     created_at = Column(DateTime, default=dt.utcnow)
-    expires_at = Column(DateTime)
\ No newline at end of file
+    expires_at = Column(DateTime, index=True)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from app.src.util.db import Base
 from datetime import datetime
@@ -25,6 +25,7 @@ class User(AsyncAttrs, Base):
         is_active (bool): Indicates if the user is active.
         last_login (datetime): The timestamp of the user's last login.
         photos_uploaded(int): The number of photos uploaded.
+        tokens (List[Token]): The stored tokens of the user, never loaded implicitly (lazy='raise').
     """
 
     __tablename__ = "users"
@@ -40,5 +41,5 @@ class User(AsyncAttrs, Base):
     is_active = Column(Boolean, default=True)
     photos_uploaded = Column(Integer, default=0)
 
-    tokens = relationship("Token", backref="user", cascade="all, delete-orphan", lazy='selectin')
+    tokens = relationship("Token", backref=backref("user", lazy='raise'), cascade="all, delete-orphan", lazy='raise')
 
@@ -21,9 +21,24 @@ class PhotoUpdate(PhotoBase):
 class PhotoResponse(BaseModel):
     id: int
     user_id: int
-    url: str
+    url: Optional[str] = None
+    status: Optional[str] = None
     description: Optional[str] = "No description provided"
     tags: Optional[List[TagResponse]] = "No tags provided"
+    average_rating: Optional[float] = None
+    rating_count: int = 0
 
     class Config:
         from_attributes = True
+
+
+class PhotoFeedResponse(BaseModel):
+    """
+    Schema for a single page of the photo feed.
+
+    Attributes:
+        items (List[PhotoResponse]): The photos of the page, newest first.
+        next_cursor (Optional[int]): The cursor to request the next page with, None if this is the last page.
+    """
+    items: List[PhotoResponse]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,119 @@
+"""
+Measures the per-call overhead of the log_function decorator, comparing the previous implementation
+(eager f-strings with full reprs, stdout redirection, synchronous FileHandler) with the current one
+(lazy size-capped reprs, sampling, QueueHandler/QueueListener) at several sampling rates.
+
+The decorated coroutine mimics a CRUD helper: it takes a session-like object and returns a list of
+ORM-like rows. Logs are written to a temporary directory. Only the application settings
+(see app/src/config/config.py) need to be present in the environment:
+
+    python benchmarks/log_function_overhead.py --calls 20000 --rows 100
+"""
+import argparse
+import asyncio
+import functools
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.src.config import logging_config
+from app.src.config.logging_config import configure_logging, stop_logging
+
+
+class FakeSession:
+    def __repr__(self):
+        return f"<AsyncSession bind=Engine(postgresql+asyncpg://user:***@db/photoshare) {id(self):#x}>"
+
+
+class FakeRow:
+    def __init__(self, i):
+        self.id = i
+        self.description = "A photo description " * 5
+        self.url = f"https://res.cloudinary.com/demo/image/upload/v1/photos/{i:08d}.jpg"
+
+    def __repr__(self):
+        return f"Photo(id={self.id}, description={self.description!r}, url={self.url!r})"
+
+
+def legacy_log_function(logger):
+    """The log_function decorator as it was before the QueueHandler rewrite, for async functions."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            stream = io.StringIO()
+            try:
+                logger.info(f"Function '{func.__name__}' called with args: {args} and kwargs: {kwargs}")
+                with redirect_stdout(stream):
+                    result = await func(*args, **kwargs)
+
+                output = stream.getvalue()
+                if output:
+                    logger.info(f"Print output from '{func.__name__}':\n{output}")
+                if result is None:
+                    logger.info(f"Function '{func.__name__}' completed without returning a value")
+                else:
+                    logger.info(f"Function '{func.__name__}' returned {result}")
+                return result
+            except Exception as e:
+                logger.exception(f"Function '{func.__name__}' raised an exception: {e}")
+                raise
+
+        return async_wrapper
+
+    return decorator
+
+
+async def measure(func, calls: int, rows) -> float:
+    db = FakeSession()
+    started = time.perf_counter()
+    for _ in range(calls):
+        await func(db, rows)
+    return (time.perf_counter() - started) * 1e6 / calls
+
+
+async def main(calls: int, row_count: int):
+    rows = [FakeRow(i) for i in range(row_count)]
+
+    async def get_photos(db, photos):
+        return photos
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        baseline = await measure(get_photos, calls, rows)
+
+        legacy_logger = logging.getLogger("benchmark.legacy")
+        legacy_logger.propagate = False
+        legacy_logger.setLevel(logging.INFO)
+        legacy_handler = logging.FileHandler(os.path.join(log_dir, "legacy.log"))
+        legacy_handler.setFormatter(logging.Formatter(logging_config.LOG_FORMAT))
+        legacy_logger.addHandler(legacy_handler)
+        legacy = await measure(legacy_log_function(legacy_logger)(get_photos), calls, rows)
+        legacy_handler.close()
+
+        results = [("no decorator", baseline), ("legacy", legacy)]
+        configure_logging(handlers=[logging.FileHandler(os.path.join(log_dir, "current.log"))])
+        for rate in (1.0, 0.1, 0.01, 0.0):
+            decorated = logging_config.log_function(sample_rate=rate)(get_photos)
+            results.append((f"current, sample_rate={rate}", await measure(decorated, calls, rows)))
+        stop_logging()
+
+        log_sizes = {name: os.path.getsize(os.path.join(log_dir, name)) for name in ("legacy.log", "current.log")}
+
+    print(f"{'variant':<30}{'us/call':>10}{'overhead us':>14}")
+    for label, per_call in results:
+        print(f"{label:<30}{per_call:>10.2f}{per_call - baseline:>14.2f}")
+    print(f"log bytes: legacy {log_sizes['legacy.log']}, current (all rates) {log_sizes['current.log']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.rows))
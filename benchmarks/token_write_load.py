@@ -0,0 +1,102 @@
+"""
+Measures the database write load of issuing tokens on login and on the silent refresh in get_current_user,
+with access tokens persisted (the old behaviour) and stateless (the default).
+
+Runs against an in-memory SQLite database through aiosqlite, so only the application settings
+(see app/src/config/config.py) need to be present in the environment:
+
+    python benchmarks/token_write_load.py --logins 200 --refreshes 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.src.config.config import settings
+from app.src.config.jwt import create_access_token, create_refresh_token
+from app.src.util.db import Base
+from app.src.util.models import User
+from app.src.util.models.comment import Comment
+from app.src.util.models.rating import Rating
+
+
+class StatementCounter:
+    """Counts write statements and commits issued through an engine."""
+
+    def __init__(self, engine):
+        self.writes = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def reset(self):
+        self.writes = 0
+        self.commits = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(" ", 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.writes += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+
+async def run(persist_access_tokens: bool, logins: int, refreshes: int) -> dict:
+    settings.PERSIST_ACCESS_TOKENS = persist_access_tokens
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    counter = StatementCounter(engine)
+
+    async with session_factory() as db:
+        db.add(User(id=1, email="bench@example.com", username="bench"))
+        await db.commit()
+        counter.reset()
+
+        started = time.perf_counter()
+        for _ in range(logins):
+            await create_access_token(data={"sub": "bench@example.com"}, user_id=1, db=db)
+            await create_refresh_token(data={"sub": "bench@example.com"}, user_id=1, db=db)
+        login_seconds = time.perf_counter() - started
+        login_writes, login_commits = counter.writes, counter.commits
+        counter.reset()
+
+        started = time.perf_counter()
+        for _ in range(refreshes):
+            await create_access_token(data={"sub": "bench@example.com"}, user_id=1, db=db)
+        refresh_seconds = time.perf_counter() - started
+        refresh_writes, refresh_commits = counter.writes, counter.commits
+
+    await engine.dispose()
+    return {
+        "login_writes": login_writes / logins,
+        "login_commits": login_commits / logins,
+        "login_ms": login_seconds * 1000 / logins,
+        "refresh_writes": refresh_writes / refreshes,
+        "refresh_commits": refresh_commits / refreshes,
+        "refresh_ms": refresh_seconds * 1000 / refreshes,
+    }
+
+
+async def main(logins: int, refreshes: int):
+    print(f"{'mode':<12}{'login writes':>14}{'login commits':>15}{'login ms':>10}"
+          f"{'refresh writes':>16}{'refresh commits':>17}{'refresh ms':>12}")
+    for label, persist in (("persisted", True), ("stateless", False)):
+        r = await run(persist, logins, refreshes)
+        print(f"{label:<12}{r['login_writes']:>14.2f}{r['login_commits']:>15.2f}{r['login_ms']:>10.3f}"
+              f"{r['refresh_writes']:>16.2f}{r['refresh_commits']:>17.2f}{r['refresh_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--refreshes", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.refreshes))
@@ -0,0 +1,112 @@
+"""
+Shared fixtures of the test suite.
+
+Every test gets its own SQLite database (through aiosqlite), seeded with a few users, photos, tags, comments and
+ratings, and a TestClient of the application whose database session, current user and API key are overridden.
+Storage and caches live in a temporary directory, so no external service is needed.
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+_TMP_DIR = tempfile.mkdtemp(prefix="photoshare-tests-")
+
+for _name, _value in {
+    "DEV_API_KEY": "test", "ENVIRONMENT": "test", "SECRET_KEY": "test-secret", "DATABASE_USER": "test",
+    "DATABASE_PASSWORD": "test", "DATABASE_DOMAIN": "localhost", "DATABASE_DB_NAME": "test",
+    "CLOUDINARY_CLOUD_NAME": "test", "CLOUDINARY_API_KEY": "test", "CLOUDINARY_API_SECRET": "test",
+    "CLOUDINARY_API_URL": "test",
+}.items():
+    os.environ.setdefault(_name, _value)
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_DIR"] = os.path.join(_TMP_DIR, "media")
+os.environ["DERIVED_CACHE_DIR"] = os.path.join(_TMP_DIR, "cache")
+os.environ["QR_CACHE_DIR"] = os.path.join(_TMP_DIR, "cache", "qr")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.src.config.dependency import verify_api_key
+from app.src.config.fastapi_config import app
+from app.src.config.security import get_current_user
+from app.src.services.query_stats import query_stats
+from app.src.util.db import Base, get_db
+from app.src.util.models import Comment, Photo, Rating, Tag, User
+from app.src.util.models.photo import PhotoStatus, photo_m2m_tag
+from app.src.util.models.user import UserRole
+
+ADMIN_ID = 1
+USER_ID = 2
+OTHER_USER_ID = 3
+PHOTO_IDS = (1, 2, 3)
+
+
+def run(coroutine):
+    """Runs a coroutine to completion from a synchronous test or fixture."""
+    return asyncio.run(coroutine)
+
+
+async def _seed(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        for user_id, role in ((ADMIN_ID, UserRole.ADMIN), (USER_ID, UserRole.USER), (OTHER_USER_ID, UserRole.USER)):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}", role=role,
+                        registered_at=datetime.utcnow(), is_active=True, photos_uploaded=0))
+        db.add_all([Tag(id=1, name="cat"), Tag(id=2, name="dog")])
+        await db.flush()
+        for photo_id in PHOTO_IDS:
+            db.add(Photo(id=photo_id, user_id=USER_ID, description=f"photo {photo_id}", url=f"/media/{photo_id}.jpg",
+                         public_id=f"test/{photo_id}", status=PhotoStatus.READY.value, rating_count=1,
+                         rating_sum=4))
+            db.add(Comment(id=photo_id, user_id=OTHER_USER_ID, photo_id=photo_id, content=f"comment {photo_id}"))
+            db.add(Rating(id=photo_id, user_id=OTHER_USER_ID, photo_id=photo_id, rating=4))
+        await db.flush()
+        await db.execute(insert(photo_m2m_tag), [{"photo": photo_id, "tag": tag_id}
+                                                 for photo_id in PHOTO_IDS for tag_id in (1, 2)])
+        await db.execute(User.__table__.update().where(User.id == USER_ID).values(photos_uploaded=len(PHOTO_IDS)))
+        await db.commit()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """An engine on a seeded SQLite file. NullPool, so no connection outlives the event loop that opened it."""
+    test_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+    run(_seed(test_engine))
+    query_stats.attach(test_engine)
+    yield test_engine
+    run(test_engine.dispose())
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+@pytest.fixture
+def auth():
+    """The user the client is authenticated as, by ID. Defaults to the admin, set ``auth["user_id"]`` to change."""
+    return {"user_id": ADMIN_ID}
+
+
+@pytest.fixture
+def client(session_factory, auth):
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    async def override_get_current_user():
+        async with session_factory() as db:
+            return await db.get(User, auth["user_id"])
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    app.dependency_overrides[verify_api_key] = lambda: None
+    # Without the context manager the startup handlers, which connect to the configured database, do not run.
+    yield TestClient(app, headers={"api-key": "test"}, follow_redirects=False)
+    app.dependency_overrides.clear()
@@ -0,0 +1,61 @@
+"""
+Query budgets of the hot routes.
+
+Relationships default to lazy='raise', so a route touching one that its query did not load fails, and every route
+is held to the number of statements it issues today. A new N+1 or an extra round trip fails here first.
+The seeded photos all have tags, a comment and a rating, so per-row queries would show.
+"""
+import pytest
+
+from app.src.services.query_stats import QueryBudgetExceeded, query_stats
+from app.src.util.crud.photo import get_photos_feed
+from tests.conftest import PHOTO_IDS, run
+
+
+@pytest.mark.parametrize("path, max_queries", [
+    ("/", 3),
+    ("/photos/feed", 3),
+    ("/photos?tag=cat", 5),
+    ("/photos/search?q=photo", 6),
+    ("/photo/1", 5),
+    ("/admin/delete-photo", 2),
+    ("/admin/ratings", 4),
+    ("/admin/comments", 4),
+    ("/admin/ban-user", 2),
+])
+def test_page_within_budget(client, path, max_queries):
+    with query_stats.budget(max_queries):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+def test_admin_dashboard_within_budget(client):
+    client.cookies.set("admin_access", "true")
+    with query_stats.budget(1):
+        response = client.get("/admin/dashboard")
+    assert response.status_code == 200
+
+
+def test_delete_photo_within_budget(client):
+    with query_stats.budget(10):
+        response = client.delete(f"/photos/delete-photo/{PHOTO_IDS[0]}")
+    assert response.status_code == 303
+    assert client.get(f"/photos/{PHOTO_IDS[0]}").status_code != 200
+
+
+def test_route_over_budget_fails(client):
+    with pytest.raises(QueryBudgetExceeded):
+        with query_stats.budget(4):
+            client.get("/photo/1")
+
+
+def test_direct_call_over_budget_fails(session_factory):
+    async def feed(max_queries):
+        async with session_factory() as db:
+            with query_stats.budget(max_queries):
+                photos, _ = await get_photos_feed(db)
+        return photos
+
+    assert len(run(feed(3))) == len(PHOTO_IDS)
+    with pytest.raises(QueryBudgetExceeded):
+        run(feed(2))
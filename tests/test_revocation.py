@@ -0,0 +1,125 @@
+"""
+Token revocation across workers.
+
+Each TokenRevocationList stands for one worker; two lists sharing an InMemoryRevocationBackend stand for two workers
+sharing a redis server.
+"""
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from app.src.config.config import settings
+from app.src.config.jwt import create_access_token
+from app.src.services.revocation import InMemoryRevocationBackend, TokenRevocationList
+from app.src.util.models import RevokedToken
+from tests.conftest import USER_ID, run
+
+REFRESH_SECONDS = 60
+
+
+def _token() -> str:
+    return run(create_access_token({"sub": f"user{USER_ID}@example.com"}, user_id=USER_ID))
+
+
+def _jti(token: str) -> str:
+    return jwt.get_unverified_claims(token)["jti"]
+
+
+def test_revoked_token_rejected_by_another_worker_through_backend(session_factory):
+    backend = InMemoryRevocationBackend()
+    first, second = (TokenRevocationList(REFRESH_SECONDS, backend=backend) for _ in range(2))
+    token = _token()
+
+    async def scenario():
+        async with session_factory() as db:
+            # The second worker refreshes before the revocation and not again within the test.
+            assert not await second.is_revoked(db, token)
+            assert await first.revoke(db, f"Bearer {token}", user_id=USER_ID)
+            return await second.is_revoked(db, token), await first.is_revoked(db, token)
+
+    assert run(scenario()) == (True, True)
+    assert _jti(token) not in second
+    assert _jti(token) in backend.entries
+
+
+def test_revoked_token_rejected_by_another_worker_after_refresh(session_factory):
+    first, second = TokenRevocationList(REFRESH_SECONDS), TokenRevocationList(REFRESH_SECONDS)
+    token = _token()
+
+    async def scenario():
+        async with session_factory() as db:
+            assert not await second.is_revoked(db, token)
+            await first.revoke(db, token)
+            before_refresh = await second.is_revoked(db, token)
+            await second.refresh(db, force=True)
+            return before_refresh, await second.is_revoked(db, token)
+
+    assert run(scenario()) == (False, True)
+
+
+def test_unverified_token_not_revoked(session_factory):
+    revocations = TokenRevocationList(REFRESH_SECONDS, backend=InMemoryRevocationBackend())
+    forged = jwt.encode({"sub": "someone", "jti": "forged", "exp": datetime.utcnow() + timedelta(minutes=5)},
+                        "not-the-secret", algorithm=settings.ALGORITHM)
+
+    async def scenario():
+        async with session_factory() as db:
+            return await revocations.revoke(db, forged), await db.get(RevokedToken, "forged")
+
+    assert run(scenario()) == (False, None)
+    assert not revocations.backend.entries
+
+
+def test_incremental_refresh_reads_from_watermark(session_factory):
+    revocations = TokenRevocationList(REFRESH_SECONDS)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+
+    async def scenario():
+        async with session_factory() as db:
+            await revocations.refresh(db, force=True)
+            watermark = revocations._watermark
+            db.add_all([
+                RevokedToken(jti="new", expires_at=expires_at, revoked_at=datetime.utcnow()),
+                # A late commit inside the overlap window is still picked up...
+                RevokedToken(jti="late", expires_at=expires_at,
+                             revoked_at=watermark - timedelta(seconds=REFRESH_SECONDS)),
+                # ...but older rows are not read again.
+                RevokedToken(jti="old", expires_at=expires_at,
+                             revoked_at=watermark - timedelta(seconds=REFRESH_SECONDS * 3)),
+                RevokedToken(jti="expired", expires_at=datetime.utcnow() - timedelta(seconds=1),
+                             revoked_at=datetime.utcnow()),
+            ])
+            await db.commit()
+            await revocations.refresh(db)
+            assert len(revocations) == 0, "refreshed again within the refresh interval"
+            await revocations.refresh(db, force=True)
+            assert revocations._watermark > watermark
+
+    run(scenario())
+    assert "new" in revocations and "late" in revocations
+    assert "old" not in revocations and "expired" not in revocations
+
+
+def test_full_refresh_on_first_use(session_factory):
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+
+    async def scenario():
+        async with session_factory() as db:
+            db.add(RevokedToken(jti="old", expires_at=expires_at, revoked_at=datetime.utcnow() - timedelta(days=1)))
+            await db.commit()
+            revocations = TokenRevocationList(REFRESH_SECONDS)
+            await revocations.refresh(db)
+            return revocations
+
+    assert "old" in run(scenario())
+
+
+def test_in_memory_backend_drops_expired_entries():
+    backend = InMemoryRevocationBackend()
+    run(backend.add("live", datetime.utcnow() + timedelta(minutes=5)))
+    run(backend.add("expired", datetime.utcnow() - timedelta(seconds=1)))
+
+    assert run(backend.contains("live"))
+    assert not run(backend.contains("expired"))
+    assert not run(backend.contains("unknown"))
+    assert list(backend.entries) == ["live"]
@@ -0,0 +1,38 @@
+"""
+The photos_uploaded counter under concurrent uploads, through the helpers of benchmarks/upload_counter.py.
+
+SQLite serializes writers, so the lost updates of the read-modify-write variant only show on PostgreSQL: set
+TEST_POSTGRES_URL to the async URL of a throwaway database (its tables are dropped) to run the PostgreSQL cases.
+"""
+import os
+
+import pytest
+
+from benchmarks.upload_counter import run as run_uploads, upload_read_modify_write, upload_relative_update
+from tests.conftest import run
+
+UPLOADS = 200
+CONCURRENCY = 20
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+requires_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+def _assert_counter_exact(url: str, upload) -> None:
+    result = run(run_uploads(url, upload, UPLOADS, CONCURRENCY))
+    assert result["photos"] == UPLOADS
+    assert result["counter"] == result["photos"], f"{result['photos'] - result['counter']} lost updates"
+
+
+def test_relative_update_exact_on_sqlite(tmp_path):
+    _assert_counter_exact(f"sqlite+aiosqlite:///{tmp_path / 'uploads.db'}", upload_relative_update)
+
+
+@requires_postgres
+@pytest.mark.parametrize("upload", [
+    upload_relative_update,
+    pytest.param(upload_read_modify_write,
+                 marks=pytest.mark.xfail(strict=True, reason="concurrent read-modify-write loses updates")),
+])
+def test_counter_exact_on_postgres(upload):
+    _assert_counter_exact(POSTGRES_URL, upload)